@@ -0,0 +1,74 @@
+"""ZCL/ZDO ASDU decoding of attribute reports, with and without SCHEMAS.
+
+    python benchmarks/bench_asdu.py [frames]
+
+The ASDUs are attribute reports of temperature, humidity, on/off,
+metering and power configuration clusters, with some cluster commands
+and ZDO device announcements mixed in. 'uncached' resolves the cluster
+and command schema out of the zigpy definitions for every frame.
+"""
+
+import random
+import sys
+import time
+
+import zigpy_deconz_parser.asdu as asdu
+
+HA = 0x0104
+# cluster id, attribute records, bound of the random values
+REPORTS = (
+    (0x0402, '0000' '29' '{:04x}', 256),  # temperature
+    (0x0405, '0000' '21' '{:04x}', 256),  # humidity
+    (0x0006, '0000' '10' '{:02x}', 2),  # on/off, a ZCL Boolean is 0 or 1
+    (0x0702, '0000' '25' '{:012x}', 256),  # metering summation
+    (0x0001, '2000' '20' '{:02x}' '2100' '20' '{:02x}', 256),  # battery
+)
+
+
+def asdus(count):
+    rnd = random.Random(0)
+    result = []
+    for i in range(count):
+        pick = rnd.random()
+        tsn = '{:02x}'.format(i % 256)
+        if pick < 0.8:
+            cluster_id, report, bound = rnd.choice(REPORTS)
+            values = [rnd.randrange(bound) for _ in range(report.count('{'))]
+            data = '18' + tsn + '0a' + report.format(*values)
+        elif pick < 0.95:
+            cluster_id, data = 0x0006, '11' + tsn + rnd.choice(('00', '01'))
+        else:
+            cluster_id = 0x0013
+            data = tsn + '3412' + '11' * 8 + '8e'
+            result.append((0x0000, cluster_id, bytes.fromhex(data)))
+            continue
+        result.append((HA, cluster_id, bytes.fromhex(data)))
+    return result
+
+
+def run(frames):
+    start = time.perf_counter()
+    for profile, cluster_id, data in frames:
+        asdu.decode(profile, cluster_id, data)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    frames = asdus(count)
+
+    cached = asdu.schema
+    asdu.schema = lambda *key: asdu.resolve(*key)
+    uncached = run(frames)
+    asdu.schema = cached
+    asdu.SCHEMAS.clear()
+    rate = run(frames)
+    print("{:<10} {:>12}".format('schemas', 'frames/s'))
+    print("{:<10} {:>12.0f}".format('uncached', uncached))
+    print("{:<10} {:>12.0f}".format('cached', rate))
+    print("{} schemas cached, {:.1f}x".format(len(asdu.SCHEMAS),
+                                              rate / uncached))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Per frame decoding vs NumPy batches for aggregate analyses.
+
+    python benchmarks/bench_batch.py [lines]
+
+The frames of a loggen.py log are put into a store.FrameStore, then the
+RSSI/LQI of the MAC polls and the confirm statuses are aggregated once by
+decoding every frame with an engine and once out of store.arrays(). The
+rate counts every frame of the store, including those the batch decoder
+leaves to the per frame decoders.
+"""
+
+import collections
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import loggen
+
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.store import FrameStore
+
+MAC_POLL = (pt.DeConzCommand.MAC_POLL, True)
+CONFIRM = (pt.DeConzCommand.APS_DATA_CONFIRM, True)
+ENGINES = ('schema', 'slots')
+
+
+def per_frame(store):
+    rssi = []
+    lqi = []
+    statuses = collections.Counter()
+    for ts, is_response, hdr, cmd in store:
+        if (hdr.command, is_response) == MAC_POLL:
+            rssi.append(cmd.rssi)
+            lqi.append(cmd.lqi)
+        elif (hdr.command, is_response) == CONFIRM:
+            statuses[int(cmd.confirm_status.value)] += 1
+    return statistics.median(rssi), statistics.median(lqi), statuses
+
+
+def batch(store):
+    arrays, rest = store.arrays()
+    polls = arrays[MAC_POLL]
+    values, counts = np.unique(arrays[CONFIRM]['confirm_status'],
+                               return_counts=True)
+    return (np.median(polls['rssi']), np.median(polls['lqi']),
+            collections.Counter(dict(zip(values.tolist(), counts.tolist()))))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    lines = loggen.generate(count, mix='traffic', uart_share=1)
+    stores = {engine: FrameStore(engine) for engine in ENGINES}
+    for line in lines:
+        for store in stores.values():
+            store.add_line(line)
+    frames = len(stores['slots'])
+
+    print("{:<12} {:>12}".format('decoder', 'frames/s'))
+    results = []
+    for engine, store in stores.items():
+        start = time.perf_counter()
+        results.append(per_frame(store))
+        print("{:<12} {:>12.0f}".format(
+            engine, frames / (time.perf_counter() - start)))
+    start = time.perf_counter()
+    results.append(batch(stores['slots']))
+    print("{:<12} {:>12.0f}".format(
+        'numpy', frames / (time.perf_counter() - start)))
+    assert all(result == results[0] for result in results)
+    arrays, rest = stores['slots'].arrays()
+    print("{} of {} frames in arrays".format(frames - len(rest), frames))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Repeat queries over a text log vs its binary capture.
+
+    python benchmarks/bench_capture.py [lines]
+
+The log spans one hour, one frame line in three. Every query decodes the
+matching frames with the default engine, the text log has to go through
+all its lines each time while the capture only reads the index blocks
+which can hold a match.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import loggen
+
+import zigpy_deconz_parser.capture as capture
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.correlate import epoch
+
+START = loggen.START
+SPAN = 3600
+
+
+class Counter:
+    def __init__(self, since=None, until=None, commands=None):
+        self.since, self.until, self.commands = since, until, commands
+        self.frames = 0
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+class FilteringCounter(Counter):
+    """The same query applied after decoding the text log."""
+
+    def frame(self, ts, is_response, hdr, cmd):
+        ts = epoch(ts)
+        if self.since is not None and ts < self.since:
+            return
+        if self.until is not None and ts > self.until:
+            return
+        if self.commands is not None and hdr.command not in self.commands:
+            return
+        self.frames += 1
+
+
+QUERIES = {
+    'all': {},
+    'one minute': {'since': START + 1800, 'until': START + 1859},
+    'mac poll': {'commands': {pt.DeConzCommand.MAC_POLL}},
+}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'home-assistant.log')
+        cap = os.path.join(tmp, 'home-assistant.dzcap')
+        with open(log, 'w') as file:
+            loggen.write(file, count, rate=count / SPAN)
+        start = time.perf_counter()
+        frames = capture.convert(cli.uart_lines(log), cap)
+        print("converted {} frames in {:.2f} s, {} -> {} + {} bytes".format(
+            frames, time.perf_counter() - start, os.path.getsize(log),
+            os.path.getsize(cap), os.path.getsize(cap + '.idx')))
+
+        print("{:<12} {:>8} {:>10} {:>10} {:>8}".format(
+            'query', 'frames', 'log s', 'capture s', 'speedup'))
+        for name, query in QUERIES.items():
+            counter = FilteringCounter(**query)
+            start = time.perf_counter()
+            for line in cli.uart_lines(log):
+                parser.parse(line, renderer=counter)
+            log_time = time.perf_counter() - start
+
+            found = Counter()
+            start = time.perf_counter()
+            cli.proccess_capture(cap, renderer=found, **query)
+            cap_time = time.perf_counter() - start
+            assert found.frames == counter.frames, (found.frames,
+                                                    counter.frames)
+            print("{:<12} {:>8} {:>10.2f} {:>10.3f} {:>7.1f}x".format(
+                name, found.frames, log_time, cap_time, log_time / cap_time))
+
+
+if __name__ == '__main__':
+    main()
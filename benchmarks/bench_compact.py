@@ -0,0 +1,57 @@
+"""Bytes per retained decoded frame for each DeConzCommand.
+
+    python benchmarks/bench_compact.py [frames per command]
+
+Compares keeping the decoded (header, command) pairs of the schema and
+slots engines with the packed store.FrameStore.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.store import FrameStore
+
+ENGINES = ('schema', 'slots')
+
+
+def retained(build, count):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print("{:<36}".format('command (bytes/frame)') + ''.join(
+        "{:>10}".format(name) for name in ENGINES + ('packed', )))
+    for key in loggen.MIXES['uniform']:
+        line = next(loggen.generate(1, mix={key: 1}, uart_share=1))
+        name = "{} {}".format('<' if key[0] == loggen.RX else '>', key[1])
+        row = []
+        for engine in ENGINES:
+            row.append(retained(
+                lambda: [parser.decode(line, engine) for _ in range(count)],
+                count))
+
+        def packed():
+            store = FrameStore()
+            for _ in range(count):
+                store.add_line(line)
+            return store
+
+        row.append(retained(packed, count))
+        print("{:<36}".format(name) + ''.join(
+            "{:>10.0f}".format(size) for size in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Parsing compressed logs, decompressed to disk first vs streamed.
+
+    python benchmarks/bench_compressed.py [lines]
+
+'temp file' is the previous workflow: decompress the whole log to a
+temporary file, then parse it. 'inline' streams it but decompresses on
+the parsing thread, 'thread' is sources.lines() with decompression on a
+background thread. Output is jsonl to /dev/null, so the time is mostly
+parsing.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.sources as sources
+from zigpy_deconz_parser.renderers import JsonLinesRenderer
+
+FORMATS = (
+    ('gzip', '.gz', gzip.open),
+    ('bzip2', '.bz2', bz2.open),
+    ('xz', '.xz', lzma.open),
+)
+try:
+    import zstandard
+except ImportError:
+    pass
+else:
+    FORMATS += (('zstd', '.zst', zstandard.open),)
+
+
+def parse(lines):
+    with open(os.devnull, 'wb') as devnull:
+        renderer = JsonLinesRenderer(devnull)
+        cli.proccess(lines, renderer=renderer)
+        renderer.close()
+
+
+def temp_file(path, tmp):
+    plain = os.path.join(tmp, 'plain.log')
+    with sources.open_binary(path) as src, open(plain, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    with open(plain, mode='r') as file:
+        parse(file)
+    os.unlink(plain)
+
+
+def inline(path, tmp):
+    with sources.open_binary(path) as file:
+        parse(line.decode() for line in file)
+
+
+def thread(path, tmp):
+    parse(sources.lines([path]))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'home-assistant.log')
+        with open(log, 'w') as file:
+            loggen.write(file, count)
+        print("{:<8} {:>12} {:>12} {:>12}".format(
+            'format', 'temp file/s', 'inline/s', 'thread/s'))
+        for name, suffix, opener in FORMATS:
+            path = log + suffix
+            with open(log, 'rb') as src, opener(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            rates = []
+            for run in (temp_file, inline, thread):
+                start = time.perf_counter()
+                run(path, tmp)
+                rates.append(count / (time.perf_counter() - start))
+            print("{:<8} {:>12.0f} {:>12.0f} {:>12.0f}".format(name, *rates))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compare the schema walking and the struct based command decoders.
+
+    python benchmarks/bench_engines.py [rounds]
+
+Every command is timed over PAYLOADS loggen.py payloads of its own.
+"""
+
+import sys
+import timeit
+
+import loggen
+
+from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.types as pt
+
+PAYLOADS = 10
+
+
+def payloads():
+    for direction, name in loggen.MIXES['uniform']:
+        table = RESPONSES if direction == loggen.RX else REQUESTS
+        cls = table[pt.DeConzCommand[name]]
+        if cls.SCHEMA:
+            yield cls, [data[5:] for _, data in loggen.frames(
+                PAYLOADS, mix={(direction, name): 1})]
+
+
+def decode_all(decode, cls, items):
+    for payload in items:
+        decode(cls, payload)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    names = list(parser.ENGINES)
+    print("{:<32}".format('command (us/frame)') +
+          ''.join("{:>12}".format(name) for name in names))
+    totals = dict.fromkeys(names, 0.0)
+    frames = rounds * PAYLOADS
+    for cls, items in payloads():
+        row = []
+        for name, (_, decode) in parser.ENGINES.items():
+            elapsed = min(timeit.repeat(
+                lambda: decode_all(decode, cls, items), number=rounds,
+                repeat=3))
+            totals[name] += elapsed
+            row.append(elapsed)
+        print("{:<32}".format(cls.__module__.rsplit('.', 1)[-1] + '.' +
+                              cls.__name__) +
+              ''.join("{:>12.2f}".format(e / frames * 1e6) for e in row))
+    print("{:<32}".format('total') + ''.join(
+        "{:>12.2f}".format(totals[name] / frames * 1e6) for name in names))
+    print("{:<32}".format('speedup') + ''.join(
+        "{:>11.1f}x".format(totals['schema'] / totals[name])
+        for name in names))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Enum resolution through the lookup tables vs the ValueError fallback.
+
+    python benchmarks/bench_enums.py [iterations]
+
+'fallback' is the previous deserialize(): an enum.Enum value lookup which
+raises for unknown codes and builds a new Unknown* object instead.
+Header rows decode whole frames with known and with unknown command codes.
+"""
+
+import sys
+import timeit
+
+import zigpy.types as t
+
+import zigpy_deconz_parser.compiled as compiled
+import zigpy_deconz_parser.types as pt
+
+from loggen import frame
+
+ENUMS = (
+    (pt.DeConzCommand, pt.UnknownCommand, 0x12, 0x99),
+    (pt.Status, pt.UnknownStatus, 0x00, 0x33),
+    (pt.ConfirmStatus, pt.UnknownConfirmStatus, 0xa7, 0x01),
+    (pt.DeconzParameter, pt.UnknownDeconzParameter, 0x22, 0x42),
+)
+
+
+def fallback(enum_cls, unknown_cls):
+    def deserialize(data):
+        value, rest = t.uint8_t.deserialize(data)
+        try:
+            return enum_cls(value), rest
+        except ValueError:
+            return unknown_cls.deserialize(data)
+    return deserialize
+
+
+def rate(func, arg, number):
+    return number / min(timeit.repeat(lambda: func(arg), number=number,
+                                      repeat=3))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print("{:<16} {:<8} {:>14} {:>14} {:>8}".format(
+        'enum', 'code', 'fallback/s', 'table/s', 'speedup'))
+    for enum_cls, unknown_cls, known, unknown in ENUMS:
+        old = fallback(enum_cls, unknown_cls)
+        for label, code in (('known', known), ('unknown', unknown)):
+            data = bytes((code, ))
+            assert old(data) == enum_cls.deserialize(data)
+            before = rate(old, data, number)
+            after = rate(enum_cls.deserialize, data, number)
+            print("{:<16} {:<8} {:>14.0f} {:>14.0f} {:>7.1f}x".format(
+                enum_cls.__name__, label, before, after, after / before))
+
+    print()
+    print("{:<36} {:>14}".format('header decode', 'frames/s'))
+    for label, command, status in (('known command', 0x0d, 0x00),
+                                   ('unknown command + status', 0x99, 0x33)):
+        data = frame(command, 1, status, b'\x00\x07\x05\x26')
+        for name, decode in (('schema', pt.Header.deserialize),
+                             ('memoryview', compiled.deserialize_header)):
+            print("{:<36} {:>14.0f}".format(
+                '{} {}'.format(name, label), rate(decode, data, number)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""--filter against decoding and printing everything.
+
+    python benchmarks/bench_filter.py [lines]
+
+The baseline renders every frame as text, which is what a grep over the
+output has to pay for. Filtered runs only decode and render the frames
+that match.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import loggen
+
+import zigpy_deconz_parser.filters as filters
+import zigpy_deconz_parser.main as cli
+
+# the network of loggen.generate(seed=0)
+NETWORK = loggen.Generator(random.Random(0))
+EXPRESSIONS = (
+    None,
+    'command mac_poll',
+    'nwk 0x{:04x}'.format(NETWORK.devices[0]),
+    'group 0x{:04x} cluster 0x0006'.format(NETWORK.groups[0]),
+    'confirm != SUCCESS',
+    'direction rx rssi < -50',
+)
+
+
+class Counter:
+    def __init__(self):
+        self.frames = 0
+
+    def line(self, line):
+        print(line.strip())
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.frames += 1
+        hdr.pretty_print(is_response)
+        if cmd is not None:
+            cmd.pretty_print()
+
+    def close(self):
+        pass
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    out = io.StringIO()
+    loggen.write(out, count)
+    lines = out.getvalue().splitlines(True)
+
+    print("{:<32} {:>8} {:>10} {:>8}".format('filter', 'frames', 'seconds',
+                                            'speedup'))
+    base = None
+    for text in EXPRESSIONS:
+        where = None if text is None else filters.Filter(text)
+        counter = Counter()
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            cli.proccess(lines, renderer=counter, where=where)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print("{:<32} {:>8} {:>10.2f} {:>7.1f}x".format(
+            text or '(none)', counter.frames, elapsed, base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Write to latency of --follow across log rotation and truncation.
+
+    python benchmarks/bench_follow.py [frames] [lines per second]
+
+A writer task appends frame lines to a log file, renaming it away once and
+truncating it once along the way, while main.proccess_follow() decodes
+them. Every frame must come out exactly once, in order.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+from zigpy_deconz_parser.stats import PERCENTILES
+
+
+class Recorder:
+    """Renderer keeping the arrival time of every decoded frame."""
+
+    def __init__(self):
+        self.arrived = []
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.arrived.append(time.perf_counter())
+
+    def close(self):
+        pass
+
+
+async def writer(log, lines, rate, written):
+    delay = 1 / rate
+    for i, line in enumerate(lines):
+        if i == len(lines) // 3:
+            os.rename(log, log + '.1')
+        elif i == 2 * len(lines) // 3:
+            # lines still unread when the file is truncated are lost
+            await asyncio.sleep(4 * cli.FOLLOW_INTERVAL)
+            with open(log, 'w'):
+                pass
+            await asyncio.sleep(4 * cli.FOLLOW_INTERVAL)
+        with open(log, 'a') as file:
+            file.write(line)
+        written.append(time.perf_counter())
+        await asyncio.sleep(delay)
+
+
+async def run(log, lines, rate):
+    recorder = Recorder()
+    written = []
+    follower = asyncio.ensure_future(
+        cli.proccess_follow(log, renderer=recorder))
+    await asyncio.sleep(2 * cli.FOLLOW_INTERVAL)
+    await writer(log, lines, rate, written)
+    await asyncio.sleep(4 * cli.FOLLOW_INTERVAL)
+    follower.cancel()
+    try:
+        await follower
+    except asyncio.CancelledError:
+        pass
+    return written, recorder
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 500
+    lines = list(loggen.generate(count, mix='uniform', uart_share=1))
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'home-assistant.log')
+        open(log, 'w').close()
+        written, recorder = asyncio.run(run(log, lines, rate))
+
+    if len(recorder.arrived) != count:
+        sys.exit("decoded {} of {} frames".format(len(recorder.arrived),
+                                                  count))
+    latency = sorted((arrived - sent) * 1000
+                     for sent, arrived in zip(written, recorder.arrived))
+    print("{} frames at {:.0f} lines/s, poll interval {} s".format(
+        count, rate, cli.FOLLOW_INTERVAL))
+    print("latency ms: " + ' '.join(
+        "p{}={:.1f}".format(pct, latency[min(int(pct / 100 * count),
+                                             count - 1)])
+        for pct in PERCENTILES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Time spent rendering decoded frames with each output format.
+
+    python benchmarks/bench_formats.py [frames]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.renderers import RENDERERS
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    frames = [parser.decode(line) for line in
+              loggen.generate(count, mix='uniform', uart_share=1)]
+    print("{:<10} {:>14} {:>12}".format('format', 'frames/sec', 'bytes'))
+    for name, renderer_cls in RENDERERS.items():
+        try:
+            out = io.BytesIO()
+            renderer = renderer_cls(out)
+        except ImportError as exc:
+            print("{:<10} skipped: {}".format(name, exc))
+            continue
+        text = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(text):
+            for frame in frames:
+                renderer.frame(*frame)
+            renderer.close()
+        elapsed = time.perf_counter() - start
+        size = out.tell() or len(text.getvalue().encode())
+        print("{:<10} {:>14.0f} {:>12}".format(name, count / elapsed, size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Memory and feed rate of health.Health on a large network.
+
+    python benchmarks/bench_health.py [devices] [frames]
+
+Indications, MAC polls, requests and confirms for every device are decoded
+once and fed over and over with advancing timestamps. The aggregator size
+has to stay the same whatever the number of frames.
+"""
+
+import random
+import sys
+import time
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.correlate import timestamp
+from zigpy_deconz_parser.health import COLUMNS, Health
+
+START = 1577880000
+
+
+def frames(devices):
+    rnd = random.Random(0)
+    decoded = []
+    for nwk in range(1, devices + 1):
+        addr = nwk.to_bytes(2, 'little').hex()
+        lqi = '{:02x}'.format(rnd.randrange(40, 255))
+        rssi = (rnd.randrange(-90, -30) & 0xff).to_bytes(1, 'little').hex()
+        payloads = (
+            (True, 0x17, '2200aa020000' '01' '02' + addr + '01' '0401'
+             '0600' '0500' '18120a0000' '0000' + lqi + '00000000' + rssi),
+            (True, 0x1c, '0500' '02' + addr + lqi + rssi),
+            (False, 0x12, '1a002a0002' + addr + '01' '0401' '0600' '01'
+             '0500' '1122010000' '04' '00'),
+            (True, 0x04, '0d00222a02' + addr + '01' '01' +
+             rnd.choice(('00', '00', '00', 'a7')) + '00000000'),
+        )
+        for is_response, command, payload in payloads:
+            data = loggen.frame(command, nwk % 256, 0,
+                                 bytes.fromhex(payload))
+            decoded.append(parser.decode_frame(None, is_response, data)[1:])
+    return decoded
+
+
+def size(health):
+    """Bytes held by the aggregator table."""
+    total = sys.getsizeof(health._rows)
+    for name, _ in COLUMNS:
+        total += sys.getsizeof(getattr(health, '_' + name))
+    return total
+
+
+def main():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    decoded = frames(devices)
+
+    health = Health()
+    checkpoints = {count // 100, count // 10, count}
+    start = time.perf_counter()
+    print("{:>10} {:>8} {:>12} {:>12}".format('frames', 'devices',
+                                              'frames/s', 'KiB'))
+    for i in range(1, count + 1):
+        is_response, hdr, cmd = decoded[i % len(decoded)]
+        health.feed(timestamp(START + i // 100), is_response, hdr, cmd)
+        if i in checkpoints:
+            elapsed = time.perf_counter() - start
+            print("{:>10} {:>8} {:>12.0f} {:>12.1f}".format(
+                i, len(health), i / elapsed, size(health) / 1024))
+    snapshot = health.snapshot()
+    print("failure rate of 0x0001: {:.2f}, last seen {}".format(
+        snapshot[0]['failure_rate'], snapshot[0]['last_seen']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Startup cost of the CLI, measured with python -X importtime.
+
+    python benchmarks/bench_import.py [runs]
+
+Reports the best of runs for the import of zigpy_deconz_parser.main, the
+slowest packages below it and the wall time of parsing a 50 line log.
+tests/test_imports.py checks that the modules of optional modes are not
+imported on startup.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import loggen
+
+TOP = 12
+
+
+def importtime():
+    """{module: (self us, cumulative us)} of one interpreter start."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import zigpy_deconz_parser.main'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [importtime() for _ in range(runs)]
+    best = min(samples, key=lambda times: times['zigpy_deconz_parser.main'][1])
+
+    print("import zigpy_deconz_parser.main: {:.1f} ms".format(
+        best['zigpy_deconz_parser.main'][1] / 1000))
+    print()
+    print("{:<45} {:>10} {:>10}".format('module', 'self ms', 'total ms'))
+    slowest = sorted(best.items(), key=lambda item: -item[1][1])
+    for name, (own, cumulative) in slowest[1:TOP + 1]:
+        print("{:<45} {:>10.1f} {:>10.1f}".format(name, own / 1000,
+                                                  cumulative / 1000))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'small.log')
+        with open(log, 'w') as file:
+            loggen.write(file, 50)
+        elapsed = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'zigpy_deconz_parser.main',
+                            '-i', log], stdout=subprocess.DEVNULL, check=True)
+            elapsed.append(time.perf_counter() - start)
+    print()
+    print("50 line log, whole process: {:.1f} ms".format(
+        min(elapsed) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Scaling of cli.proccess_parallel from 1 to N worker processes.
+
+    python benchmarks/bench_jobs.py [max jobs] [lines]
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+
+
+def main():
+    max_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    with tempfile.NamedTemporaryFile('w', suffix='.log') as log, \
+            open(os.devnull, 'w') as devnull:
+        loggen.write(log, count)
+        log.flush()
+        chunk_size = max(os.path.getsize(log.name) // (max_jobs * 8), 65536)
+        print("{:>5} {:>10} {:>8}".format('jobs', 'seconds', 'speedup'))
+        base = None
+        for jobs in range(1, max_jobs + 1):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                if jobs == 1:
+                    with open(log.name) as file:
+                        cli.proccess(file)
+                else:
+                    cli.proccess_parallel(log.name, jobs,
+                                           chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print("{:>5} {:>10.2f} {:>7.1f}x".format(
+                jobs, elapsed, base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Count APS_DATA_CONFIRM frames by confirm status with every engine.
+
+    python benchmarks/bench_lazy.py [lines]
+
+Only header.command and confirm_status are looked at, which is where lazy
+field decoding pays off.
+"""
+
+import collections
+import sys
+import time
+
+import loggen
+
+from zigpy_deconz_parser.commands import responses
+import zigpy_deconz_parser.parser as parser
+
+
+def count_confirms(lines, engine):
+    counts = collections.Counter()
+    for line in lines:
+        ts, is_response, hdr, cmd = parser.decode(line, engine)
+        if isinstance(cmd, responses.ApsDataConfirm):
+            counts[cmd.confirm_status] += 1
+    return counts
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    log = list(loggen.generate(count, mix='uniform', uart_share=1))
+    print("{:<12} {:>14} {:>10}".format('engine', 'frames/sec', 'speedup'))
+    base = None
+    for engine in parser.ENGINES:
+        start = time.perf_counter()
+        counts = count_confirms(log, engine)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print("{:<12} {:>14.0f} {:>9.1f}x".format(
+            engine, count / elapsed, base / elapsed))
+    for status, n in counts.most_common():
+        print("    {:<40} {:>10}".format(str(status), n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Allocation profile of the frame decoding engines over a synthetic log.
+
+    python benchmarks/bench_memory.py [lines]
+
+For every engine the header and the command of each frame are decoded
+(without printing) and tracemalloc reports per frame the average
+transient peak of intermediate allocations and the bytes allocated by
+the stages: the sum over match, unhexlify, header and command of the
+growth up to the peak of the stage. Copies which a later stage frees,
+like the header payload, count there but not always in the peak.
+
+Fails if the memoryview engine doesn't allocate less than the schema engine
+for an APS_DATA_INDICATION with a 100 byte ASDU.
+"""
+
+import binascii
+import sys
+import time
+import tracemalloc
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+
+
+def synthetic_log(count):
+    return list(loggen.generate(count, mix='uniform', uart_share=1))
+
+
+def indication_log(count, asdu_size=100):
+    asdu = bytes(i % 256 for i in range(asdu_size))
+    body = bytes.fromhex('aa' '020000' '01' '02e8b3' '01' '0401' '0600') + \
+        len(asdu).to_bytes(2, 'little') + asdu + \
+        bytes.fromhex('0000c700000000d8')
+    payload = len(body).to_bytes(2, 'little') + body
+    line = loggen.UART_LINE.format(
+        '2020-01-01 12:00:00', 'Frame received',
+        binascii.hexlify(loggen.frame(0x17, 1, 0, payload)).decode())
+    return [line] * count
+
+
+def decode(line, engine):
+    decode_header, decode_command = parser.ENGINES[engine]
+    ts, txrx, data = parser.MATCH.match(line).groups()
+    hdr, rest = decode_header(binascii.unhexlify(data))
+    cmd = parser.command_class(txrx == 'Frame received', hdr)
+    return hdr, parser.decode_payload(decode_command, cmd, hdr)
+
+
+def allocated(line, engine):
+    """Bytes allocated by the stages of decode(line, engine)."""
+    decode_header, decode_command = parser.ENGINES[engine]
+    total = 0
+
+    def stage(function, *args):
+        nonlocal total
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = function(*args)
+        total += tracemalloc.get_traced_memory()[1] - base
+        return result
+
+    ts, txrx, data = stage(lambda: parser.MATCH.match(line).groups())
+    frame = stage(binascii.unhexlify, data)
+    hdr, rest = stage(decode_header, frame)
+    cmd = parser.command_class(txrx == 'Frame received', hdr)
+    stage(parser.decode_payload, decode_command, cmd, hdr)
+    return total
+
+
+def measure(log, engine):
+    start = time.perf_counter()
+    for line in log:
+        decode(line, engine)
+    elapsed = time.perf_counter() - start
+
+    peaks = total = 0
+    tracemalloc.start()
+    for line in log:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        decode(line, engine)
+        peaks += tracemalloc.get_traced_memory()[1] - base
+    for line in log:
+        total += allocated(line, engine)
+    tracemalloc.stop()
+    return peaks / len(log), total / len(log), elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    allocations = {}
+    for title, log in (('mixed log', synthetic_log(count)),
+                       ('APS_DATA_INDICATION, 100 byte ASDU',
+                        indication_log(count)),
+                       ('APS_DATA_INDICATION, 1000 byte ASDU',
+                        indication_log(count, 1000))):
+        print(title)
+        print("{:<12} {:>16} {:>18} {:>10}".format(
+            'engine', 'peak B/frame', 'allocated B/frame', 'seconds'))
+        for engine in parser.ENGINES:
+            peak, total, elapsed = measure(log, engine)
+            allocations[(title, engine)] = total
+            print("{:<12} {:>16.1f} {:>18.1f} {:>10.2f}".format(
+                engine, peak, total, elapsed))
+    indication = 'APS_DATA_INDICATION, 100 byte ASDU'
+    assert allocations[(indication, 'memoryview')] < \
+        allocations[(indication, 'schema')], \
+        "memoryview engine allocates more than schema per " + indication
+
+if __name__ == '__main__':
+    main()
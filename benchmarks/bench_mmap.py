@@ -0,0 +1,48 @@
+"""Plain text vs memory mapped input on a log with few uart lines.
+
+    python benchmarks/bench_mmap.py [lines] [uart share]
+
+Each mode runs in a child process so its peak RSS can be reported.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import loggen
+
+MODES = {
+    'text': [],
+    'mmap': ['--mmap'],
+}
+
+
+def run(log, extra):
+    cmd = [sys.executable, '-m', 'zigpy_deconz_parser.main', '-i', log]
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        proc = subprocess.Popen(cmd + extra, stdout=devnull)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd + extra)
+    return elapsed, rusage.ru_maxrss
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    with tempfile.NamedTemporaryFile('w', suffix='.log') as log:
+        loggen.write(log, count, uart_share=share)
+        log.flush()
+        print("{:<6} {:>10} {:>14}".format('mode', 'seconds', 'max RSS KiB'))
+        for mode, extra in MODES.items():
+            elapsed, rss = run(log.name, extra)
+            print("{:<6} {:>10.2f} {:>14}".format(mode, elapsed, rss))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Text output throughput, print() per field vs one buffer per frame.
+
+    python benchmarks/bench_output.py [frames]
+
+Every row runs in a child process whose stdout is a pipe, like the CLI
+piped into less or grep. Frames are decoded up front, only the rendering
+and writing is timed. 'print' is the previous output path, every
+pretty_print() field printed straight to sys.stdout. The other rows
+render through TextRenderer into a sink from output.open_sink(): stdout,
+or a plain, gzip or xz file.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_render import frames
+
+import zigpy_deconz_parser.output as output
+from zigpy_deconz_parser.renderers import TextRenderer
+
+SINKS = (
+    ('print', None),
+    ('stdout', '-'),
+    ('file', 'out.txt'),
+    ('gzip', 'out.txt.gz'),
+    ('xz', 'out.txt.xz'),
+)
+
+
+def child(count, path):
+    decoded = frames(count)
+    start = time.perf_counter()
+    if path is None:
+        for is_response, hdr, cmd in decoded:
+            hdr.pretty_print(is_response)
+            if cmd is not None:
+                cmd.pretty_print()
+        sys.stdout.flush()
+    else:
+        sink = output.open_sink(path)
+        renderer = TextRenderer(sink)
+        for is_response, hdr, cmd in decoded:
+            renderer.frame(None, is_response, hdr, cmd)
+        renderer.close()
+        output.close_sink(sink)
+    print(time.perf_counter() - start, file=sys.stderr)
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        child(int(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else None)
+        return
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print("{:<8} {:>12} {:>10}".format('output', 'frames/s', 'size MiB'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, name in SINKS:
+            args = [sys.executable, __file__, '--child', str(count)]
+            path = None
+            if name is not None:
+                path = name if name == '-' else os.path.join(tmp, name)
+                args.append(path)
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+            size = 0
+            while True:
+                chunk = proc.stdout.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+            elapsed = float(proc.stderr.read())
+            proc.wait()
+            if path not in (None, '-'):
+                size = os.path.getsize(path)
+            print("{:<8} {:>12.0f} {:>10.1f}".format(
+                label, count / elapsed, size / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Lines/sec of the bare MATCH regex vs the staged prefilter.
+
+    python benchmarks/bench_prefilter.py [lines] [uart share]
+"""
+
+import random
+import sys
+import time
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+
+UART_NOISE = ("2020-01-01 12:00:00 DEBUG (MainThread) [zigpy_deconz.uart] "
+              "Connection lost: None\n")
+
+
+def synthetic_log(count, share):
+    lines = list(loggen.generate(count, uart_share=share))
+    rnd = random.Random(1)
+    # a few uart lines which are neither sent nor received frames
+    for i in rnd.sample(range(len(lines)), len(lines) // 200):
+        lines[i] = UART_NOISE
+    return lines
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    lines = synthetic_log(count, share)
+    print("{:<10} {:>14} {:>10}".format('filter', 'lines/sec', 'matched'))
+    for name, match in (('regex', parser.MATCH.match),
+                        ('staged', parser.match)):
+        start = time.perf_counter()
+        matched = sum(1 for line in lines if match(line) is not None)
+        elapsed = time.perf_counter() - start
+        print("{:<10} {:>14.0f} {:>10}".format(name, count / elapsed, matched))
+    for line in parser.prefilter_report():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
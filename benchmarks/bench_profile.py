@@ -0,0 +1,52 @@
+"""Cost of the --profile timers.
+
+    python benchmarks/bench_profile.py [lines]
+
+Parses a loggen.py log to jsonl on /dev/null with the profiler off and on
+and prints the profile of the last run.
+"""
+
+import os
+import sys
+import time
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.profiler as profiler
+from zigpy_deconz_parser.renderers import JsonLinesRenderer
+
+RUNS = 3
+
+
+def parse(lines, profiled):
+    with open(os.devnull, 'wb') as devnull:
+        renderer = JsonLinesRenderer(devnull)
+        if profiled:
+            renderer = profiler.Renderer(renderer)
+        start = time.perf_counter()
+        cli.proccess(lines, renderer=renderer)
+        renderer.close()
+        return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    lines = list(loggen.generate(count))
+    off = min(parse(lines, False) for _ in range(RUNS))
+    on = []
+    for _ in range(RUNS):
+        with profiler.profiling():
+            on.append(parse(lines, True))
+    on = min(on)
+    print("{:<10} {:>12}".format('profiler', 'lines/s'))
+    print("{:<10} {:>12.0f}".format('off', count / off))
+    print("{:<10} {:>12.0f}".format('on', count / on))
+    print("overhead {:.1%}".format(on / off - 1))
+    print()
+    for line in profiler.report():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Text rendering rate of a DEVICE_STATE_CHANGED heavy log.
+
+    python benchmarks/bench_render.py [frames]
+
+Frames are decoded up front, only TextRenderer.frame() is timed, writing
+to /dev/null. Most frames are DEVICE_STATE_CHANGED with random device
+states, the rest device state responses and APS data confirms/requests.
+"""
+
+import contextlib
+import os
+import random
+import sys
+import time
+
+from loggen import frame
+
+import zigpy_deconz_parser.parser as parser
+
+MIX = (
+    (0.7, True, 0x0e, lambda rnd: bytes((rnd.randrange(256), ))),
+    (0.1, True, 0x07, lambda rnd: bytes((rnd.randrange(256), 0, 0))),
+    (0.1, True, 0x04, lambda rnd: bytes.fromhex(
+        '0d00' + '{:02x}'.format(rnd.randrange(256)) + '2a02e8b30101' +
+        rnd.choice(('00', 'a7', 'e9')) + '00000000')),
+    (0.1, False, 0x12, lambda rnd: bytes.fromhex(
+        '1a002a0002e8b301040106000105001122010000' +
+        '{:02x}'.format(rnd.randrange(256)) + '00')),
+)
+
+
+def frames(count):
+    rnd = random.Random(0)
+    decoded = []
+    for seq in range(count):
+        pick = rnd.random()
+        for share, is_response, command, payload in MIX:
+            pick -= share
+            if pick < 0:
+                break
+        data = frame(command, seq % 256, 0, payload(rnd))
+        decoded.append(parser.decode_frame(None, is_response, data)[1:])
+    return decoded
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    decoded = frames(count)
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for is_response, hdr, cmd in decoded:
+            parser.TEXT.frame(None, is_response, hdr, cmd)
+        elapsed = time.perf_counter() - start
+    print("{} frames in {:.2f} s, {:.0f} frames/s".format(
+        count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
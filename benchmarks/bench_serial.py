@@ -0,0 +1,125 @@
+"""Decode SLIP framed UART streams from capture files and a pty replayer.
+
+    python benchmarks/bench_serial.py [frames] [baud rate]
+
+The loggen.py requests form the host -> radio stream and the responses
+the radio -> host stream, every command alike. Both are decoded once from
+capture files, at full speed, and once from two pseudo terminals fed at
+the given baud rate (10 bits per byte on the wire). Every frame has to
+come out once with the right direction.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.slip as slip
+
+TICK = 0.005
+
+
+class Counter:
+    """Renderer counting the decoded frames per direction."""
+
+    def __init__(self):
+        self.frames = {True: 0, False: 0}
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.frames[is_response] += 1
+
+    def close(self):
+        pass
+
+
+def stream(direction, count):
+    mix = {key: weight for key, weight in loggen.MIXES['uniform'].items()
+           if key[0] == direction}
+    return b''.join(slip.encode(data)
+                    for _, data in loggen.frames(count, mix=mix))
+
+
+def check(counter, count, elapsed, mode):
+    expected = {True: count, False: count}
+    ok = 'ok' if counter.frames == expected else \
+        'MISMATCH {}'.format(counter.frames)
+    print("{:<8} {:>10.3f} s {:>12.0f} frames/s  {}".format(
+        mode, elapsed, 2 * count / elapsed, ok))
+
+
+def replay(fd, data, baudrate):
+    """Write data at baudrate, then hang up."""
+    per_tick = max(int(baudrate / 10 * TICK), 1)
+    start = time.perf_counter()
+    for tick, offset in enumerate(range(0, len(data), per_tick)):
+        os.write(fd, data[offset:offset + per_tick])
+        delay = start + (tick + 1) * TICK - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    time.sleep(0.1)
+    os.close(fd)
+
+
+def pty_run(tx, rx, baudrate):
+    ptys = [os.openpty() for _ in range(2)]
+    paths = [os.ttyname(slave) for _, slave in ptys]
+    for _, slave in ptys:
+        tty.setraw(slave)
+    counter = Counter()
+
+    async def run():
+        reader = asyncio.ensure_future(
+            cli.proccess_serial(paths, renderer=counter, baudrate=baudrate))
+        await asyncio.sleep(0.2)
+        threads = [threading.Thread(target=replay, args=(master, data,
+                                                         baudrate))
+                   for (master, _), data in zip(ptys, (tx, rx))]
+        for thread in threads:
+            thread.start()
+        for _, slave in ptys:
+            os.close(slave)
+        await reader
+        for thread in threads:
+            thread.join()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return counter, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    baudrate = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+    tx = stream(loggen.TX, count)
+    rx = stream(loggen.RX, count)
+    print("{} frames per direction, {} + {} bytes".format(count, len(tx),
+                                                         len(rx)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, data in (('tx.bin', tx), ('rx.bin', rx)):
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'wb') as file:
+                file.write(data)
+        counter = Counter()
+        start = time.perf_counter()
+        asyncio.run(cli.proccess_serial(paths, renderer=counter))
+        check(counter, count, time.perf_counter() - start, 'capture')
+
+    counter, elapsed = pty_run(tx, rx, baudrate)
+    wire = max(len(tx), len(rx)) * 10 / baudrate
+    check(counter, count, elapsed, 'pty')
+    print("pty wire time at {} baud: {:.3f} s".format(baudrate, wire))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""Throughput and memory of every decoding stage, with regression checks.
+
+    python benchmarks/bench_stages.py [-n lines] [-m mix] [-e engine]
+                                      [-r runs] [-o results.json]
+                                      [-c baseline.json] [-t tolerance]
+
+The log comes from loggen.py, with unknown commands and statuses mixed
+in. The stages are timed one at a time over all lines or frames:
+
+    match                      parser.MATCH over every line
+    header                     Header.deserialize of every frame
+    deserialize <dir> <CMD>    Command.deserialize of the payloads of CMD
+    pretty_print header        Header.pretty_print to /dev/null
+    pretty_print <dir> <CMD>   pretty_print of the decoded commands
+
+Rates are the best of runs, stages with few items are repeated to run
+for at least MIN_SECONDS. A second, untimed pass under tracemalloc
+records the transient peak of each item. -o writes the results as JSON,
+-c compares them with an earlier file and exits 1 if a stage got slower
+than tolerance (default 0.1) or its peak memory grew by more than that.
+"""
+
+import binascii
+import gc
+import getopt
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+
+MEMORY_ITEMS = 5000
+MIN_SECONDS = 0.05  # stages with few frames are repeated up to this
+
+
+def prepare(lines, engine):
+    """The inputs of every stage: {stage: (unit, items, function)}."""
+    decode_header, decode_command = parser.ENGINES[engine]
+    frames = []
+    for line in lines:
+        result = parser.MATCH.match(line)
+        if result is not None:
+            ts, txrx, data = result.groups()
+            frames.append((txrx == 'Frame received',
+                           binascii.unhexlify(data)))
+
+    headers = []
+    payloads = {}
+    for is_response, data in frames:
+        hdr, rest = decode_header(data)
+        headers.append((hdr, is_response))
+        table = RESPONSES if is_response else REQUESTS
+        cmd = table.get(hdr.command)
+        if cmd and hdr.payload:
+            name = '{} {}'.format(loggen.RX if is_response else loggen.TX,
+                                  hdr.command.name)
+            payloads.setdefault(name, (cmd, []))[1].append(hdr.payload)
+
+    stages = {
+        'match': ('line', lines, parser.MATCH.match),
+        'header': ('frame', [data for _, data in frames], decode_header),
+    }
+    for name, (cmd, items) in sorted(payloads.items()):
+        stages['deserialize ' + name] = (
+            'frame', items, lambda payload, cmd=cmd: decode_command(cmd,
+                                                                    payload))
+    stages['pretty_print header'] = (
+        'frame', headers, lambda item: item[0].pretty_print(item[1]))
+    for name, (cmd, items) in sorted(payloads.items()):
+        decoded = [decode_command(cmd, payload)[0] for payload in items]
+        stages['pretty_print ' + name] = ('frame', decoded,
+                                          lambda cmd: cmd.pretty_print())
+    return stages, len(frames)
+
+
+def timed(items, function, repeat=1):
+    """Seconds per pass over items, without garbage collection like timeit."""
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for item in items:
+                function(item)
+        return (time.perf_counter() - start) / repeat
+    finally:
+        gc.enable()
+
+
+def peaks(items, function):
+    """Largest and mean transient peak of one item, in bytes.
+
+    Printed text goes to a StringIO which is emptied before every item, so
+    the buffer of the output file does not show up as peak.
+    """
+    items = items[:MEMORY_ITEMS]
+    largest = total = 0
+    stdout, sys.stdout = sys.stdout, io.StringIO()
+    tracemalloc.start()
+    for item in items:
+        sys.stdout.seek(0)
+        sys.stdout.truncate()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        function(item)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        largest = max(largest, peak)
+        total += peak
+    tracemalloc.stop()
+    sys.stdout = stdout
+    return largest, total / len(items)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(lines, engine, runs):
+    stages, frames = prepare(lines, engine)
+    results = []
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        for stage, (unit, items, function) in stages.items():
+            if stage.startswith('pretty_print'):
+                sys.stdout = devnull
+            try:
+                seconds = timed(items, function)
+                repeat = max(1, int(MIN_SECONDS / seconds))
+                seconds = min(timed(items, function, repeat)
+                              for _ in range(runs))
+            finally:
+                sys.stdout = stdout
+            peak, mean_peak = peaks(items, function)
+            result = {
+                'stage': stage,
+                'unit': unit,
+                'items': len(items),
+                'seconds': seconds,
+                'rate': len(items) / seconds,
+                'lines_per_s': None,
+                'frames_per_s': None,
+                'peak_bytes': peak,
+                'mean_peak_bytes': mean_peak,
+            }
+            if unit == 'line':
+                result['lines_per_s'] = len(items) / seconds
+                result['frames_per_s'] = frames / seconds
+            else:
+                result['frames_per_s'] = len(items) / seconds
+            results.append(result)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every stage, return the regressed stages."""
+    old = {result['stage']: result for result in baseline['stages']}
+    regressed = []
+    print()
+    commit = (baseline['commit'] or '?')[:10]
+    print("{:<40} {:>10} {:>10}".format('vs ' + commit, 'rate', 'peak'))
+    for result in results:
+        before = old.get(result['stage'])
+        if before is None:
+            continue
+        rate = result['rate'] / before['rate'] - 1
+        peak = (result['peak_bytes'] + 1) / (before['peak_bytes'] + 1) - 1
+        flag = ''
+        if rate < -tolerance or peak > tolerance:
+            regressed.append(result['stage'])
+            flag = ' <<'
+        print("{:<40} {:>+9.1%} {:>+9.1%}{}".format(result['stage'], rate,
+                                                    peak, flag))
+    return regressed
+
+
+def main():
+    count = 200000
+    params = {'mix': 'traffic', 'uart_share': 0.3,
+              'unknown_commands': 0.01, 'unknown_statuses': 0.01, 'seed': 0}
+    engine = parser.DEFAULT_ENGINE
+    runs = 3
+    out = baseline = None
+    tolerance = 0.1
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "n:m:e:r:o:c:t:")
+    except getopt.GetoptError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-n':
+            count = int(arg)
+        elif opt == '-m':
+            params['mix'] = arg
+        elif opt == '-e':
+            engine = arg
+        elif opt == '-r':
+            runs = int(arg)
+        elif opt == '-o':
+            out = arg
+        elif opt == '-c':
+            baseline = arg
+        elif opt == '-t':
+            tolerance = float(arg)
+
+    lines = list(loggen.generate(count, **params))
+    results = run(lines, engine, runs)
+
+    print("{:<40} {:>8} {:>12} {:>12} {:>10} {:>10}".format(
+        'stage', 'items', 'lines/s', 'frames/s', 'peak B', 'mean B'))
+    for result in results:
+        print("{:<40} {:>8} {:>12} {:>12.0f} {:>10} {:>10.1f}".format(
+            result['stage'], result['items'],
+            '' if result['lines_per_s'] is None else
+            '{:.0f}'.format(result['lines_per_s']),
+            result['frames_per_s'], result['peak_bytes'],
+            result['mean_peak_bytes']))
+
+    report = {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'engine': engine,
+        'runs': runs,
+        'lines': count,
+        'generator': params,
+        'stages': results,
+    }
+    if out is not None:
+        with open(out, 'w') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+
+    if baseline is not None:
+        with open(baseline) as file:
+            regressed = compare(results, json.load(file), tolerance)
+        if regressed:
+            print("regressed: " + ', '.join(regressed))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
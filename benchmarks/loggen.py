@@ -0,0 +1,393 @@
+"""Synthetic Home Assistant logs with deCONZ UART traffic.
+
+    python benchmarks/loggen.py [-n lines] [-m mix] [-u uart share]
+                                [--unknown-commands share]
+                                [--unknown-statuses share] [-s seed] [-o file]
+
+Every command of commands.REQUESTS and commands.RESPONSES gets frames
+with randomised but well formed payloads: addresses, endpoints, clusters,
+ZCL ASDUs, LQI/RSSI, parameters and confirm statuses. The rest of the
+lines are other loggers. Timestamps advance at RATE lines per second.
+
+mix is one of MIXES or a comma separated list of direction:COMMAND=weight
+items, e.g. 'rx:APS_DATA_INDICATION=5,tx:APS_DATA_REQUEST=1'. Unknown
+command ids get a random payload, unknown statuses keep the command.
+frames() yields the same frames without the log lines around them.
+"""
+
+import binascii
+import getopt
+import itertools
+import random
+import sys
+import time
+
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+
+START = 1577880000  # 2020-01-01 12:00:00
+RATE = 50
+
+UART_LINE = "{} DEBUG (MainThread) [zigpy_deconz.uart] {}: 0x{}\n"
+NOISE = (
+    "{} DEBUG (MainThread) [homeassistant.core] Bus:Handling <Event "
+    "state_changed[L]: entity_id=sensor.t_{}, old_state=<state "
+    "sensor.t_{}=21.5; unit_of_measurement=°C @ 2020-01-01T12:00:00+00:00>>\n",
+    "{} DEBUG (MainThread) [zigpy.zcl] [0x{:04x}:1:0x0402] ZCL deserialize: "
+    "<ZCLHeader frame_control=<FrameControl frame_type=GLOBAL_COMMAND "
+    "manufacturer_specific=False is_reply=True disable_default_response=True> "
+    "manufacturer=None tsn={} command_id=Command.Report_Attributes>\n",
+    "{} DEBUG (MainThread) [zigpy_deconz.api] Command "
+    "Command.aps_data_request ({}, {}, 0, <DeconzAddressEndpoint "
+    "address_mode=ADDRESS_MODE.NWK address=0x0000 endpoint=1>, 260, 6, 1, "
+    "b'\\x01\\x01\\x01', 4, 0)\n",
+    "{} INFO (SyncWorker_{}) [homeassistant.components.recorder] "
+    "Purging states and events before target {}\n",
+)
+
+TX = 'tx'
+RX = 'rx'
+
+UNKNOWN_COMMANDS = tuple(value for value in range(256)
+                         if value not in pt.DeConzCommand._value2member_map_)
+UNKNOWN_STATUSES = tuple(value for value in range(256)
+                         if value not in pt.Status._value2member_map_)
+
+# (direction, command name) -> weight
+MIXES = {
+    'uniform': {(direction, command.name): 1
+                for direction, table in ((TX, REQUESTS), (RX, RESPONSES))
+                for command in table},
+    'traffic': {
+        (RX, 'APS_DATA_INDICATION'): 30,
+        (RX, 'DEVICE_STATE_CHANGED'): 15,
+        (TX, 'APS_DATA_REQUEST'): 10,
+        (RX, 'APS_DATA_REQUEST'): 10,
+        (TX, 'APS_DATA_INDICATION'): 10,
+        (TX, 'APS_DATA_CONFIRM'): 8,
+        (RX, 'APS_DATA_CONFIRM'): 8,
+        (RX, 'MAC_POLL'): 4,
+        (TX, 'DEVICE_STATE'): 2,
+        (RX, 'DEVICE_STATE'): 2,
+        (RX, 'ZGP_DATA_IND'): 0.5,
+        (RX, 'SIMPLE_BEACON'): 0.5,
+    },
+    'reports': {
+        (RX, 'APS_DATA_INDICATION'): 80,
+        (TX, 'APS_DATA_INDICATION'): 10,
+        (RX, 'DEVICE_STATE_CHANGED'): 10,
+    },
+    'startup': {
+        (TX, 'VERSION'): 1,
+        (RX, 'VERSION'): 1,
+        (TX, 'READ_PARAMETER'): 10,
+        (RX, 'READ_PARAMETER'): 10,
+        (TX, 'WRITE_PARAMETER'): 4,
+        (RX, 'WRITE_PARAMETER'): 4,
+        (TX, 'CHANGE_NETWORK_STATE'): 1,
+        (RX, 'CHANGE_NETWORK_STATE'): 1,
+        (TX, 'DEVICE_STATE'): 2,
+        (RX, 'DEVICE_STATE'): 2,
+    },
+}
+
+# parameter -> value size
+PARAMETERS = {
+    pt.DeconzParameter.MAC_Address: 8,
+    pt.DeconzParameter.PAN_ID: 2,
+    pt.DeconzParameter.NWK: 2,
+    pt.DeconzParameter.EPID: 8,
+    pt.DeconzParameter.COORDINATOR: 1,
+    pt.DeconzParameter.CHANNEL_MASK: 4,
+    pt.DeconzParameter.TRUST_CENTER: 8,
+    pt.DeconzParameter.SECURITY_MODE: 1,
+    pt.DeconzParameter.NETWORK_KEY: 16,
+    pt.DeconzParameter.CURRENT_CHANNEL: 1,
+    pt.DeconzParameter.PROTOCOL_VERSION: 2,
+    pt.DeconzParameter.NWK_UPDATE_ID: 1,
+    pt.DeconzParameter.WATCHDOG_TTL: 4,
+}
+
+# cluster id, attribute id, ZCL data type, value size, values
+REPORTS = (
+    (0x0402, 0x0000, 0x29, 2, 1 << 16),  # temperature
+    (0x0405, 0x0000, 0x21, 2, 10001),  # humidity, 0-100.00 %
+    (0x0006, 0x0000, 0x10, 1, 2),  # on/off, Boolean
+    (0x0008, 0x0000, 0x20, 1, 255),  # level, 0xff is invalid
+    (0x0702, 0x0000, 0x25, 6, 1 << 48),  # metering summation
+    (0x0001, 0x0021, 0x20, 1, 201),  # battery percentage, 0-100 % in 0.5
+)
+
+CONFIRM_STATUSES = (
+    [pt.ConfirmStatus.SUCCESS] * 20 +
+    [pt.ConfirmStatus.NO_ACK, pt.ConfirmStatus.ROUTE_ERROR,
+     pt.ConfirmStatus.ROUTE_DISCOVERY_FAILED,
+     pt.ConfirmStatus.NO_SHORT_ADDRESS])
+
+
+def frame(command, seq, status, payload=b''):
+    length = 5 + len(payload)
+    return bytes((command, seq, status)) + length.to_bytes(2, 'little') + \
+        payload
+
+
+def _u16(value):
+    return value.to_bytes(2, 'little')
+
+
+def _length(body):
+    """The uint16 payload length which precedes most bodies."""
+    return _u16(len(body)) + body
+
+
+class Generator:
+    """Random but well formed payloads of a small network."""
+
+    def __init__(self, rnd, devices=50, groups=5):
+        self.rnd = rnd
+        self.devices = [rnd.randrange(1, 0xfff8) for _ in range(devices)]
+        self.groups = [rnd.randrange(1, 0xfff0) for _ in range(groups)]
+        self.request_id = 0
+        self.tsn = 0
+
+    def _state(self):
+        # connected, APS confirm / indication / free slots flags
+        return 0x02 | self.rnd.choice((0x00, 0x04, 0x08, 0x20, 0x24, 0xa8,
+                                       0xaa))
+
+    def _nwk(self):
+        return self.rnd.choice(self.devices)
+
+    def _address_endpoint(self):
+        if self.rnd.random() < 0.1:
+            return b'\x01' + _u16(self.rnd.choice(self.groups))
+        return b'\x02' + _u16(self._nwk()) + bytes((self.rnd.randrange(1, 4),))
+
+    def _next_request_id(self):
+        self.request_id = (self.request_id + 1) % 256
+        return self.request_id
+
+    def _next_tsn(self):
+        self.tsn = (self.tsn + 1) % 256
+        return self.tsn
+
+    def _parameter(self):
+        return self.rnd.choice(tuple(PARAMETERS))
+
+    def _zcl_command(self):
+        cluster_id = self.rnd.choice((0x0006, 0x0008, 0x0300))
+        if cluster_id == 0x0006:
+            command, args = self.rnd.randrange(3), b''
+        elif cluster_id == 0x0008:
+            command = 0x04
+            args = bytes((self.rnd.randrange(256),)) + _u16(5)
+        else:
+            command = 0x0a
+            args = _u16(self.rnd.randrange(153, 500)) + _u16(5)
+        return cluster_id, bytes((0x01, self._next_tsn(), command)) + args
+
+    def _zcl_report(self):
+        cluster_id, attrid, data_type, size, values = \
+            self.rnd.choice(REPORTS)
+        value = self.rnd.randrange(values).to_bytes(size, 'little')
+        return cluster_id, bytes((0x18, self._next_tsn(), 0x0a)) + \
+            _u16(attrid) + bytes((data_type,)) + value
+
+    # requests, sent to the radio
+
+    def tx_VERSION(self):
+        return b''
+
+    def tx_READ_PARAMETER(self):
+        return _u16(1) + bytes((self._parameter(),))
+
+    def tx_WRITE_PARAMETER(self):
+        parameter = self._parameter()
+        return _length(bytes((parameter,)) +
+                       self.rnd.randbytes(PARAMETERS[parameter]))
+
+    def tx_DEVICE_STATE(self):
+        return b'\x00\x00\x00'
+
+    def tx_CHANGE_NETWORK_STATE(self):
+        return bytes((self.rnd.choice(list(pt.NetworkState)),))
+
+    def tx_APS_DATA_INDICATION(self):
+        return self.rnd.choice((b'\x01', b'\x04'))
+
+    def tx_APS_DATA_REQUEST(self):
+        cluster_id, asdu = self._zcl_command()
+        return _length(bytes((self._next_request_id(), 0)) +
+                       self._address_endpoint() + _u16(0x0104) +
+                       _u16(cluster_id) + b'\x01' + _length(asdu) +
+                       b'\x04\x00')
+
+    def tx_APS_DATA_CONFIRM(self):
+        return b'\x00\x00'
+
+    # responses, received from the radio
+
+    def rx_VERSION(self):
+        return bytes((0x00, 0x07, self.rnd.choice((0x05, 0x0b)), 0x26))
+
+    def rx_READ_PARAMETER(self):
+        parameter = self._parameter()
+        return _length(bytes((parameter,)) +
+                       self.rnd.randbytes(PARAMETERS[parameter]))
+
+    def rx_WRITE_PARAMETER(self):
+        return _u16(1) + bytes((self._parameter(),))
+
+    def rx_DEVICE_STATE(self):
+        return bytes((self._state(), 0, 0))
+
+    def rx_CHANGE_NETWORK_STATE(self):
+        return bytes((self.rnd.choice(list(pt.NetworkState)),))
+
+    def rx_DEVICE_STATE_CHANGED(self):
+        return bytes((self._state(),))
+
+    def rx_APS_DATA_INDICATION(self):
+        nwk = self._nwk()
+        if self.rnd.random() < 0.05:
+            # ZDO device announcement
+            profile, cluster_id, src_ep, dst_ep = 0x0000, 0x0013, 0, 0
+            asdu = bytes((self._next_tsn(),)) + _u16(nwk) + \
+                self.rnd.randbytes(8) + b'\x8e'
+        else:
+            profile, src_ep, dst_ep = 0x0104, self.rnd.randrange(1, 4), 1
+            cluster_id, asdu = self._zcl_report()
+        rssi = self.rnd.randrange(-90, -30) & 0xff
+        return _length(bytes((self._state(),)) + b'\x02\x00\x00' +
+                       bytes((dst_ep,)) + b'\x02' + _u16(nwk) +
+                       bytes((src_ep,)) + _u16(profile) + _u16(cluster_id) +
+                       _length(asdu) + b'\x00\x00' +
+                       bytes((self.rnd.randrange(40, 256),)) +
+                       b'\x00\x00\x00\x00' + bytes((rssi,)))
+
+    def rx_APS_DATA_REQUEST(self):
+        return _u16(4) + bytes((self._state(), self.request_id))
+
+    def rx_APS_DATA_CONFIRM(self):
+        return _length(bytes((self._state(), self.request_id)) +
+                       self._address_endpoint() + b'\x01' +
+                       bytes((self.rnd.choice(CONFIRM_STATUSES),)) +
+                       b'\x00\x00\x00\x00')
+
+    def rx_MAC_POLL(self):
+        rssi = self.rnd.randrange(-90, -30) & 0xff
+        return _u16(5) + b'\x02' + _u16(self._nwk()) + \
+            bytes((self.rnd.randrange(40, 256), rssi))
+
+    def rx_ZGP_DATA_IND(self):
+        return _length(self.rnd.randbytes(self.rnd.randrange(4, 20)))
+
+    def rx_SIMPLE_BEACON(self):
+        return _u16(8) + _u16(self._nwk()) + \
+            _u16(self.rnd.randrange(65536)) + \
+            bytes((self.rnd.randrange(11, 27), 0, self.rnd.randrange(256)))
+
+
+def parse_mix(text):
+    """A MIXES name or 'direction:COMMAND=weight,...'."""
+    if text in MIXES:
+        return MIXES[text]
+    mix = {}
+    for item in text.split(','):
+        key, _, weight = item.partition('=')
+        direction, _, command = key.partition(':')
+        table = {TX: REQUESTS, RX: RESPONSES}.get(direction)
+        if table is None or pt.DeConzCommand[command.upper()] not in table:
+            raise ValueError("unknown mix item {!r}".format(item))
+        mix[(direction, command.upper())] = float(weight or 1)
+    return mix
+
+
+def _frames(gen, mix, unknown_commands, unknown_statuses):
+    """Endless (is_response, frame) pairs of gen's network."""
+    rnd = gen.rnd
+    mix = parse_mix(mix) if isinstance(mix, str) else mix
+    keys = list(mix)
+    weights = [mix[key] for key in keys]
+    seq = 0
+    while True:
+        seq = (seq + 1) % 256
+        direction, name = rnd.choices(keys, weights)[0]
+        command = pt.DeConzCommand[name].value
+        payload = getattr(gen, direction + '_' + name)()
+        status = 0
+        if rnd.random() < unknown_commands:
+            command = rnd.choice(UNKNOWN_COMMANDS)
+            payload = rnd.randbytes(rnd.randrange(8))
+        elif rnd.random() < unknown_statuses:
+            status = rnd.choice(UNKNOWN_STATUSES)
+        yield direction == RX, frame(command, seq, status, payload)
+
+
+def frames(count, mix='traffic', unknown_commands=0.0, unknown_statuses=0.0,
+           seed=0):
+    """Yield count (is_response, frame) pairs, the frames of generate()."""
+    yield from itertools.islice(
+        _frames(Generator(random.Random(seed)), mix, unknown_commands,
+                unknown_statuses), count)
+
+
+def generate(count, mix='traffic', uart_share=0.3, unknown_commands=0.0,
+             unknown_statuses=0.0, seed=0, rate=RATE):
+    """Yield count log lines."""
+    rnd = random.Random(seed)
+    uart = _frames(Generator(rnd), mix, unknown_commands, unknown_statuses)
+    stamp, ts = None, None
+    for i in range(count):
+        second = START + i // rate
+        if second != stamp:
+            stamp = second
+            ts = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second))
+        if rnd.random() >= uart_share:
+            noise = rnd.randrange(len(NOISE))
+            yield NOISE[noise].format(ts, i, i % 256, rnd.randrange(8))
+            continue
+
+        is_response, data = next(uart)
+        yield UART_LINE.format(ts, 'Frame received' if is_response else
+                               'Send', binascii.hexlify(data).decode())
+
+
+def write(file, count, **params):
+    """Write count lines of generate(count, **params) to file."""
+    file.writelines(generate(count, **params))
+
+
+def main():
+    options = {}
+    out = None
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "n:m:u:s:o:",
+                                ["unknown-commands=", "unknown-statuses="])
+    except getopt.GetoptError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(2)
+    count = 100000
+    for opt, arg in opts:
+        if opt == '-n':
+            count = int(arg)
+        elif opt == '-m':
+            options['mix'] = parse_mix(arg)
+        elif opt == '-u':
+            options['uart_share'] = float(arg)
+        elif opt == '-s':
+            options['seed'] = int(arg)
+        elif opt == '-o':
+            out = arg
+        else:
+            options[opt[2:].replace('-', '_')] = float(arg)
+    file = sys.stdout if out is None else open(out, 'w')
+    try:
+        write(file, count, **options)
+    finally:
+        if out is not None:
+            file.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,12 @@ setup(
         'pyserial-asyncio',
         'zigpy-homeassistant',
     ],
+    extras_require={
+        'msgpack': ['msgpack'],
+        'columnar': ['pyarrow'],
+        'zstd': ['zstandard'],
+        'numpy': ['numpy'],
+    },
     tests_require=[
         'pytest',
     ],
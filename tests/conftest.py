@@ -0,0 +1,6 @@
+import os
+import sys
+
+# loggen.py, the log generator of the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir,
+                                'benchmarks'))
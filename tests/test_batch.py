@@ -0,0 +1,135 @@
+"""The NumPy columns of batch.decode() hold what parser.decode() decodes."""
+
+import binascii
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.batch as batch
+import zigpy_deconz_parser.compiled as compiled
+import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.correlate import epoch
+
+np = pytest.importorskip('numpy')
+
+ADDRESS_FIELDS = ('dst_addr', 'some_address')
+
+
+def variants(line):
+    """line, its frame cut short at a few places and with a trailing byte."""
+    result = parser.match(line)
+    if result is None:
+        return [line]
+    ts, txrx, data = result.groups()
+    data = binascii.unhexlify(data)
+    cuts = sorted({len(data) - 1, len(data) - 2, 7, 6, 4})
+    frames = [data] + [data[:cut] for cut in cuts if 0 < cut < len(data)] + \
+        [data + b'\x00']
+    return [loggen.UART_LINE.format(ts, txrx, binascii.hexlify(frame).decode())
+            for frame in frames]
+
+
+@pytest.fixture(scope='module')
+def lines():
+    generated = list(loggen.generate(3000, mix='uniform', uart_share=1,
+                                     unknown_commands=0.05,
+                                     unknown_statuses=0.02))
+    extra = [variant for line in generated[:400] for variant in variants(line)]
+    return generated + extra
+
+
+def number(value):
+    """The column value of a decoded field."""
+    if value is None:
+        return 0
+    if isinstance(value, pt.UndefEnum):
+        return int(value.value)
+    if isinstance(value, list):
+        # EUI64, little endian on the wire
+        return int.from_bytes(bytes(value), 'little')
+    return int(value)
+
+
+def columns(ts, hdr, cmd):
+    row = {'timestamp': epoch(ts), 'seq': number(hdr.seq),
+           'status': number(hdr.status)}
+    for name in cmd.FIELDS:
+        value = getattr(cmd, name)
+        if name in ADDRESS_FIELDS:
+            row['address_mode'] = number(value.address_mode)
+            row['address'] = number(value.address)
+            if hasattr(value, 'endpoint'):
+                row['endpoint'] = number(value.endpoint)
+        else:
+            row[name] = number(value)
+    return row
+
+
+def expected(line):
+    """(key, columns) of a frame batch.decode() has to decode, else None.
+
+    These are the frames of a RECORDS command which decode without error,
+    with every field present and no byte left over.
+    """
+    data = binascii.unhexlify(parser.match(line).group(3))
+    try:
+        ts, is_response, hdr, cmd = parser.decode(line, 'struct')
+    except ValueError:
+        return None
+    key = (hdr.command, is_response)
+    if key not in batch.RECORDS or cmd is None or len(data) != hdr.length:
+        return None
+    _, rest = compiled.deserialize(type(cmd), hdr.payload)
+    if rest or any(getattr(cmd, name) is None for name in cmd.FIELDS):
+        return None
+    addr = next((getattr(cmd, name) for name in ADDRESS_FIELDS
+                 if name in cmd.FIELDS), None)
+    if addr is not None and addr.address_mode not in batch.ADDRESS:
+        return None
+    row = columns(ts, hdr, cmd)
+    # the default engine decodes the same values
+    ts, _, hdr, cmd = parser.decode(line)
+    assert columns(ts, hdr, cmd) == row
+    return key, row
+
+
+def test_columns_match_decode(lines):
+    frame_lines = [line for line in lines if parser.match(line) is not None]
+    rows = {}
+    undecoded = []
+    for index, line in enumerate(frame_lines):
+        found = expected(line)
+        if found is None:
+            undecoded.append(index)
+        else:
+            key, row = found
+            rows.setdefault(key, []).append((index, row))
+
+    arrays, rest = batch.decode_lines(lines)
+    assert set(arrays) == set(rows) == set(batch.RECORDS)
+    assert list(rest) == undecoded
+    for key, array in arrays.items():
+        assert array.dtype == batch.dtype(*key)
+        assert list(array['index']) == [index for index, _ in rows[key]]
+        for record, (index, row) in zip(array, rows[key]):
+            assert {name: int(record[name]) for name in row} == row, \
+                frame_lines[index]
+            # fields a layout doesn't have are 0
+            assert all(int(record[name]) == 0
+                       for name in array.dtype.names
+                       if name not in row and name != 'index')
+
+
+def test_unknown_commands_and_short_frames_are_left(lines):
+    arrays, rest = batch.decode_lines(lines)
+    frame_lines = [line for line in lines if parser.match(line) is not None]
+    commands = set()
+    for index in rest:
+        data = binascii.unhexlify(parser.match(frame_lines[index]).group(3))
+        commands.add(data[0] if data else None)
+    assert commands - {int(command) for command, _ in batch.RECORDS}
+    decoded = sum(len(array) for array in arrays.values())
+    assert decoded + len(rest) == len(frame_lines)
+    assert rest.size and decoded
@@ -0,0 +1,143 @@
+"""Binary captures, their block index and the queries seeking with it."""
+
+import io
+import os
+import shutil
+import threading
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.capture as capture
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.renderers import JsonLinesRenderer, TextRenderer
+
+BLOCK_FRAMES = 100
+MAC_POLL = 0x1c
+DEVICE_STATE_CHANGED = 0x0e
+
+
+def render(fmt, process, *args, **kwargs):
+    out = io.BytesIO()
+    renderer = {'text': TextRenderer, 'jsonl': JsonLinesRenderer}[fmt](out)
+    process(*args, renderer=renderer, **kwargs)
+    renderer.close()
+    return out.getvalue()
+
+
+@pytest.fixture(scope='module')
+def log(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('log') / 'home-assistant.log')
+    with open(path, 'w') as file:
+        loggen.write(file, 5000, unknown_commands=0.05)
+    return path
+
+
+@pytest.fixture
+def converted(log, tmp_path):
+    path = str(tmp_path / 'log.cap')
+    capture.convert(cli.uart_lines(log), path, BLOCK_FRAMES)
+    return path
+
+
+@pytest.fixture
+def blocks(tmp_path):
+    """A capture of 1000 frames one second apart, MAC polls in block 5."""
+    path = str(tmp_path / 'blocks.cap')
+    with capture.CaptureWriter(path, BLOCK_FRAMES) as writer:
+        for second in range(1000):
+            command = MAC_POLL if 500 <= second < 550 else \
+                DEVICE_STATE_CHANGED
+            writer.append(second, True, loggen.frame(
+                command, second % 256, 0, b'\x22'))
+    return path
+
+
+@pytest.mark.parametrize('fmt', ['text', 'jsonl'])
+def test_round_trip(log, converted, fmt):
+    direct = render(fmt, cli.proccess, cli.uart_lines(log))
+    assert direct
+    assert render(fmt, cli.proccess_capture, converted) == direct
+
+
+def test_query_reads_matching_blocks(blocks):
+    reader = capture.CaptureReader(blocks)
+    assert len(reader.blocks) == 10
+    offsets = [block[0] for block in reader.blocks]
+    assert [offset for offset, _ in reader.spans(commands={MAC_POLL})] == \
+        offsets[5:6]
+    assert [offset for offset, _ in reader.spans(since=250, until=349)] == \
+        offsets[2:4]
+    assert [ts for ts, _, _ in reader.raw_frames(since=250, until=349)] == \
+        list(range(250, 350))
+    assert [ts for ts, _, _ in reader.raw_frames(commands={MAC_POLL})] == \
+        list(range(500, 550))
+    assert [ts for ts, _, _ in reader.raw_frames(
+        since=520, until=700, commands={MAC_POLL})] == list(range(520, 550))
+
+
+def test_query_matches_full_scan(log, converted):
+    query = dict(since=loggen.START + 3, until=loggen.START + 6,
+                 commands={pt.DeConzCommand.APS_DATA_CONFIRM})
+    indexed = capture.CaptureReader(converted)
+    assert indexed.blocks
+    expected = list(indexed.raw_frames(**query))
+    assert expected
+    os.remove(converted + capture.INDEX_SUFFIX)
+    scanned = capture.CaptureReader(converted)
+    assert scanned.blocks is None and not scanned.stale
+    assert list(scanned.raw_frames(**query)) == expected
+
+
+def test_appended_capture_is_stale(blocks):
+    with open(blocks, 'ab') as file:
+        file.write(capture.RECORD.pack(6, 1000, True) +
+                   loggen.frame(MAC_POLL, 0, 0, b'\x22'))
+    reader = capture.CaptureReader(blocks)
+    assert reader.stale and reader.blocks is None
+    assert [ts for ts, _, _ in reader.raw_frames(commands={MAC_POLL})] == \
+        list(range(500, 550)) + [1000]
+
+
+def test_index_of_another_capture_is_stale(blocks, converted):
+    shutil.copy(converted + capture.INDEX_SUFFIX,
+                blocks + capture.INDEX_SUFFIX)
+    reader = capture.CaptureReader(blocks)
+    assert reader.stale and reader.blocks is None
+    assert len(list(reader.raw_frames())) == 1000
+
+
+@pytest.mark.parametrize('index', [b'', capture.INDEX_MAGIC,
+                                   b'DZIDX\x00\x01\n' + bytes(56)])
+def test_truncated_or_old_index_is_stale(blocks, index):
+    with open(blocks + capture.INDEX_SUFFIX, 'wb') as file:
+        file.write(index)
+    reader = capture.CaptureReader(blocks)
+    assert reader.stale and reader.blocks is None
+    assert len(list(reader.raw_frames(since=990))) == 10
+
+
+def test_stale_index_is_reported(blocks, capsys):
+    os.utime(blocks, ns=(0, 0))
+    render('jsonl', cli.proccess_capture, blocks, since=990)
+    assert blocks + capture.INDEX_SUFFIX in capsys.readouterr().err
+
+
+def test_capture_through_a_pipe(blocks):
+    read, write = os.pipe()
+
+    def feed():
+        with open(blocks, 'rb') as src, open(write, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    with open(read, 'rb') as file:
+        assert capture.is_capture(file)
+        reader = capture.CaptureReader(blocks, file)
+        frames = list(reader.raw_frames(commands={MAC_POLL}))
+    feeder.join()
+    assert not reader.stale
+    assert [ts for ts, _, _ in frames] == list(range(500, 550))
@@ -0,0 +1,216 @@
+"""Every engine of parser.ENGINES decodes frames like the schema engine."""
+
+import pytest
+import zigpy_deconz.types as dt
+
+import loggen
+
+import zigpy_deconz_parser.lazy as lazy
+import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.renderers import value
+
+HEADER_FIELDS = ('command', 'seq', 'status', 'length', 'payload')
+ENGINES = [name for name in parser.ENGINES if name != parser.DEFAULT_ENGINE]
+
+NWK = bytes.fromhex('e8b3')
+IEEE = bytes.fromhex('8877665544332211')
+# address mode -> DeconzAddress
+ADDRESS = {
+    dt.ADDRESS_MODE.GROUP: b'\x01' + NWK,
+    dt.ADDRESS_MODE.NWK: b'\x02' + NWK,
+    dt.ADDRESS_MODE.IEEE: b'\x03' + IEEE,
+    dt.ADDRESS_MODE.NWK_AND_IEEE: b'\x04' + NWK + IEEE,
+}
+# address mode -> DeconzAddressEndpoint
+ADDRESS_ENDPOINT = {
+    dt.ADDRESS_MODE.GROUP: b'\x01' + NWK,
+    dt.ADDRESS_MODE.NWK: b'\x02' + NWK + b'\x01',
+    dt.ADDRESS_MODE.IEEE: b'\x03' + IEEE + b'\x01',
+}
+ASDU = bytes.fromhex('18120a00001001')
+
+
+def _length(body):
+    return len(body).to_bytes(2, 'little') + body
+
+
+def aps_data_request(dst):
+    return _length(b'\x2a\x00' + dst + b'\x04\x01' b'\x06\x00' b'\x01' +
+                   _length(ASDU) + b'\x04\x00')
+
+
+def aps_data_confirm(dst, status=0x00):
+    return _length(b'\xaa\x2a' + dst + b'\x01' + bytes((status, )) +
+                   b'\x00\x00\x00\x00')
+
+
+def aps_data_indication(dst, src):
+    return _length(b'\xaa' + dst + b'\x01' + src + b'\x01' b'\x04\x01'
+                   b'\x06\x00' + _length(ASDU) + b'\x00\x00' b'\xc7' +
+                   b'\x00\x00\x00\x00' b'\xd8')
+
+
+def mac_poll(address):
+    return _length(address + b'\xc7\xd8')
+
+
+# (id, is_response, command, payload) of every address mode
+ADDRESSED = (
+    [('request group', False, 0x12,
+      aps_data_request(ADDRESS_ENDPOINT[dt.ADDRESS_MODE.GROUP])),
+     ('request nwk', False, 0x12,
+      aps_data_request(ADDRESS_ENDPOINT[dt.ADDRESS_MODE.NWK])),
+     ('request ieee', False, 0x12,
+      aps_data_request(ADDRESS_ENDPOINT[dt.ADDRESS_MODE.IEEE]))] +
+    [('confirm ' + mode.name.lower(), True, 0x04, aps_data_confirm(dst))
+     for mode, dst in ADDRESS_ENDPOINT.items()] +
+    [('indication {} from {}'.format(dst_mode.name.lower(),
+                                     src_mode.name.lower()),
+      True, 0x17, aps_data_indication(ADDRESS[dst_mode], ADDRESS[src_mode]))
+     for dst_mode in (dt.ADDRESS_MODE.GROUP, dt.ADDRESS_MODE.NWK,
+                      dt.ADDRESS_MODE.IEEE)
+     for src_mode in (dt.ADDRESS_MODE.NWK, dt.ADDRESS_MODE.IEEE,
+                      dt.ADDRESS_MODE.NWK_AND_IEEE)] +
+    [('mac poll ' + mode.name.lower(), True, 0x1c, mac_poll(ADDRESS[mode]))
+     for mode in (dt.ADDRESS_MODE.NWK, dt.ADDRESS_MODE.IEEE,
+                  dt.ADDRESS_MODE.NWK_AND_IEEE)]
+)
+
+
+def fields(obj, names=None):
+    if obj is None:
+        return None
+    if names is None:
+        names = type(obj).FIELDS
+    return {name: value(getattr(obj, name)) for name in names}
+
+
+def decoded(is_response, data, engine):
+    """The header and command fields, every lazy field is accessed."""
+    ts, is_response, hdr, cmd = parser.decode_frame(None, is_response, data,
+                                                    engine)
+    return fields(hdr, HEADER_FIELDS), fields(cmd)
+
+
+def outcome(is_response, data, engine):
+    try:
+        return decoded(is_response, data, engine)
+    except ValueError:
+        return ValueError
+
+
+def loggen_frames(count, **params):
+    return [pytest.param(is_response, data, id='{}-{}'.format(
+        'rx' if is_response else 'tx', data.hex()))
+        for is_response, data in loggen.frames(count, **params)]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('key', list(loggen.MIXES['uniform']),
+                         ids='{0[0]}:{0[1]}'.format)
+def test_loggen(engine, key):
+    for is_response, data in loggen.frames(20, mix={key: 1}):
+        assert decoded(is_response, data, engine) == \
+            decoded(is_response, data, parser.DEFAULT_ENGINE)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_unknown_commands_and_statuses(engine):
+    unknown = 0
+    for is_response, data in loggen.frames(2000, mix='uniform',
+                                           unknown_commands=0.1,
+                                           unknown_statuses=0.1):
+        expected = decoded(is_response, data, parser.DEFAULT_ENGINE)
+        assert decoded(is_response, data, engine) == expected
+        unknown += data[0] in loggen.UNKNOWN_COMMANDS or \
+            data[2] in loggen.UNKNOWN_STATUSES
+    assert unknown
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('status', [0x00, 0xa7, 0x01])
+def test_confirm_statuses(engine, status):
+    data = loggen.frame(0x04, 1, 0, aps_data_confirm(
+        ADDRESS_ENDPOINT[dt.ADDRESS_MODE.NWK], status))
+    hdr, cmd = decoded(True, data, engine)
+    assert cmd == decoded(True, data, parser.DEFAULT_ENGINE)[1]
+    assert cmd['confirm_status'] == value(
+        pt.ConfirmStatus.deserialize(bytes((status, )))[0])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name,is_response,command,payload', ADDRESSED,
+                         ids=[item[0] for item in ADDRESSED])
+def test_address_modes(engine, name, is_response, command, payload):
+    data = loggen.frame(command, 1, 0, payload)
+    expected = decoded(is_response, data, parser.DEFAULT_ENGINE)
+    assert decoded(is_response, data, engine) == expected
+    assert not expected[1].get('asdu') or expected[1]['asdu'] == ASDU.hex()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('payload,reserved_3', [(b'\xa6\x00\x00', 0),
+                                                (b'\xa6\x00', None)])
+def test_optional_device_state_byte(engine, payload, reserved_3):
+    data = loggen.frame(0x07, 1, 0, payload)
+    hdr, cmd = decoded(True, data, engine)
+    assert (hdr, cmd) == decoded(True, data, parser.DEFAULT_ENGINE)
+    assert cmd['reserved_3'] == reserved_3
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('is_response,data', loggen_frames(
+    200, mix='uniform') + [pytest.param(is_response,
+                                        loggen.frame(command, 1, 0, payload),
+                                        id=name)
+                           for name, is_response, command, payload
+                           in ADDRESSED])
+def test_truncated_payloads(engine, is_response, data):
+    for end in range(5, len(data)):
+        truncated = loggen.frame(data[0], data[1], data[2], data[5:end])
+        assert outcome(is_response, truncated, engine) == \
+            outcome(is_response, truncated, parser.DEFAULT_ENGINE)
+
+
+def field_outcomes(cls, payload):
+    """Every field of a lazy cls, in order, or ValueError."""
+    cmd, _ = lazy.deserialize(cls, payload)
+    outcomes = []
+    for name in cls.FIELDS:
+        try:
+            outcomes.append(value(getattr(cmd, name)))
+        except ValueError:
+            outcomes.append(ValueError)
+    return outcomes
+
+
+def expected_outcomes(cls, payload, end):
+    """Every field of cls which fits into payload[:end], or ValueError."""
+    outcomes = []
+    for index in range(len(cls.SCHEMA)):
+        args, rest = pt.deserialize(payload, cls.SCHEMA[:index + 1])
+        if len(payload) - len(rest) <= end:
+            outcomes.append(value(args[index]))
+        else:
+            outcomes.append(ValueError)
+    return outcomes
+
+
+@pytest.mark.parametrize('name,is_response,command,payload', ADDRESSED,
+                         ids=[item[0] for item in ADDRESSED])
+def test_truncated_fields(name, is_response, command, payload):
+    # filters decode single fields of a lazy command, a field cut short
+    # raises instead of decoding to whatever bytes are left
+    cls = (parser.RESPONSES if is_response else parser.REQUESTS)[command]
+    for end in range(1, len(payload)):
+        assert field_outcomes(cls, payload[:end]) == \
+            expected_outcomes(cls, payload, end)
+
+
+@pytest.mark.parametrize('engine', list(parser.ENGINES))
+def test_truncated_frames(engine):
+    for is_response, data in loggen.frames(50, mix='uniform'):
+        if len(data) > 5:
+            with pytest.raises(ValueError):
+                decoded(is_response, data[:-1], engine)
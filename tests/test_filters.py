@@ -0,0 +1,49 @@
+"""--filter expressions, and the ones no frame can match."""
+
+import random
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.filters import Filter
+
+# the network of loggen.generate(seed=0)
+NETWORK = loggen.Generator(random.Random(0))
+LINES = list(loggen.generate(20000, uart_share=1))
+
+
+def matches(text):
+    where = Filter(text)
+    return sum(1 for line in LINES
+               if parser.decode(line, where=where) is not None)
+
+
+@pytest.mark.parametrize('text', [
+    'nwk 0x{:04x} cluster 0x0006'.format(NETWORK.devices[0]),
+    'dst 0x{:04x} confirm != SUCCESS'.format(NETWORK.devices[0]),
+    'group 0x{:04x} cluster 0x0006'.format(NETWORK.groups[0]),
+    'direction rx rssi < -50',
+    'command aps_data_confirm confirm != success',
+    'cluster 0x0006 or confirm != success',
+    'not cluster 0x0006 confirm success',
+])
+def test_matches(text):
+    assert matches(text)
+
+
+@pytest.mark.parametrize('text', [
+    'nwk 0x1234 cluster 0x0006 confirm != SUCCESS',
+    'cluster 0x0006 confirm != SUCCESS',
+    'command mac_poll cluster 0x0006',
+    'command 0x99 cluster 0x0006',
+    'command != aps_data_confirm confirm success',
+    'direction tx rssi < -50',
+    'status success radius 3',
+    '(cluster 0x0006 or lqi > 5) confirm success',
+    'rssi < -50 (confirm success or radius 3)',
+])
+def test_never_matches(text):
+    with pytest.raises(ValueError, match='No frame has'):
+        Filter(text)
@@ -0,0 +1,102 @@
+"""--follow of a log which is appended to, rotated and truncated."""
+
+import asyncio
+import io
+import os
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+from zigpy_deconz_parser.health import HealthRenderer
+from zigpy_deconz_parser.stats import StatsRenderer
+
+INTERVAL = 0.01
+SETTLE = 10 * INTERVAL  # time the follower gets after every change
+LINES = list(loggen.generate(200, uart_share=1))
+
+
+class Recorder:
+    def __init__(self):
+        self.seqs = []
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.seqs.append(hdr.seq)
+
+    def close(self):
+        pass
+
+
+def append(path, lines):
+    with open(path, 'a') as file:
+        file.writelines(lines)
+
+
+def truncate(path):
+    open(path, 'w').close()
+
+
+async def follow(log, renderer):
+    """Follow log while LINES is written to it in quarters.
+
+    The quarters are appended, appended to the rotated file, written to a
+    new file and appended after a truncation.
+    """
+    rotated = log + '.1'
+    steps = (lambda: append(log, LINES[:50]),
+             lambda: os.rename(log, rotated),
+             lambda: append(rotated, LINES[50:100]),
+             lambda: append(log, LINES[100:150]),
+             lambda: truncate(log),
+             lambda: append(log, LINES[150:]))
+    follower = asyncio.ensure_future(cli.proccess_follow(
+        log, renderer=renderer, interval=INTERVAL))
+    await asyncio.sleep(SETTLE)
+    for step in steps:
+        step()
+        await asyncio.sleep(SETTLE)
+    follower.cancel()
+    try:
+        await follower
+    except asyncio.CancelledError:
+        pass
+
+
+def test_rotation_and_truncation(tmp_path):
+    log = str(tmp_path / 'home-assistant.log')
+    truncate(log)
+    recorder = Recorder()
+    asyncio.run(follow(log, recorder))
+    assert recorder.seqs == [seq % 256 for seq in range(1, len(LINES) + 1)]
+
+
+def test_stats_while_following(tmp_path):
+    log = str(tmp_path / 'home-assistant.log')
+    truncate(log)
+    out = io.BytesIO()
+    renderer = StatsRenderer(out, interval=0)
+    asyncio.run(follow(log, renderer))
+    reports = [line for line in out.getvalue().decode().splitlines()
+               if line.startswith('Frames: ')]
+    frames = [int(line.split()[1]) for line in reports]
+    assert frames == [50, 100, 150, 200]
+
+
+def test_health_while_following(tmp_path):
+    log = str(tmp_path / 'home-assistant.log')
+    truncate(log)
+    out = io.BytesIO()
+    asyncio.run(follow(log, HealthRenderer(out, interval=0)))
+    tables = out.getvalue().decode().split('\n\n')
+    assert tables.pop() == ''
+    assert len(tables) == 4
+
+    # the last table is the one of all the lines
+    whole = io.BytesIO()
+    renderer = HealthRenderer(whole)
+    cli.proccess(LINES, renderer=renderer)
+    renderer.close()
+    assert tables[-1] + '\n' == whole.getvalue().decode()
+    assert len(tables[0].splitlines()) < len(tables[-1].splitlines())
@@ -0,0 +1,63 @@
+"""Every engine renders the text output of the code before the text cache.
+
+data/golden.log.gz holds 300 frames of the uniform mix with unknown commands
+and statuses, DEVICE_STATE_CHANGED with each of the 256 device states and
+frames cut short or with a trailing byte. data/golden.txt.gz is its text
+output, rendered before DeviceState, ApsTxOptions and the enums kept their
+rendered strings.
+"""
+
+import gzip
+import io
+import os
+
+import pytest
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.renderers import TextRenderer
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+# written instead of the frame of a line which doesn't decode
+UNDECODED = b'! ValueError\n'
+
+
+def read(name):
+    with gzip.open(os.path.join(DATA, name), 'rb') as file:
+        return file.read()
+
+
+def render(lines, engine):
+    """The text output of lines, line by line."""
+    out = io.BytesIO()
+    renderer = TextRenderer(out)
+    for line in lines:
+        try:
+            cli.proccess([line], engine, renderer)
+        except ValueError:
+            renderer.close()
+            out.write(UNDECODED)
+    renderer.close()
+    return out.getvalue()
+
+
+@pytest.fixture(scope='module')
+def lines():
+    return read('golden.log.gz').decode().splitlines(keepends=True)
+
+
+@pytest.fixture(scope='module')
+def golden():
+    return read('golden.txt.gz')
+
+
+@pytest.mark.parametrize('engine', sorted(parser.ENGINES))
+def test_golden_text(lines, golden, engine):
+    assert golden.count(UNDECODED)
+    assert render(lines, engine) == golden
+
+
+def test_golden_text_of_warm_caches(lines, golden):
+    # the first render filled the caches, the second one only reads them
+    render(lines, parser.DEFAULT_ENGINE)
+    assert render(lines, parser.DEFAULT_ENGINE) == golden
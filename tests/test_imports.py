@@ -0,0 +1,132 @@
+"""Modules which only some modes need are not imported on startup."""
+
+import subprocess
+import sys
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.parser as parser
+
+# module -> the options which import it
+DEFERRED = {
+    'asyncio': '--serial, --follow',
+    'multiprocessing': '-j',
+    'zigpy': '--zcl',
+    'zigpy.types': '--zcl',
+    'zigpy.zcl': '--zcl',
+    'attr': '--zcl',
+    'zigpy_deconz_parser.asdu': '--zcl',
+    'zigpy_deconz_parser.batch': '--npz',
+    'numpy': '--npz',
+    'pyarrow': '-f arrow, -f parquet',
+    'msgpack': '-f msgpack',
+    'zstandard': '.zst input and output',
+    'zigpy_deconz_parser.capture': '-i, -c',
+    'zigpy_deconz_parser.filters': '--filter',
+    'zigpy_deconz_parser.sources': '-i',
+    'zigpy_deconz_parser.slip': '--serial',
+    'termios': '--serial, --baudrate',
+    'tty': '--serial',
+    'zigpy_deconz_parser.profiler': '--profile',
+    'zigpy_deconz_parser.columnar': '-f arrow, -f parquet',
+    'zigpy_deconz_parser.correlate': '-f correlate, --since, --until',
+    'zigpy_deconz_parser.health': '-f health',
+    'zigpy_deconz_parser.stats': '-f stats',
+}
+
+# import time budget of the CLI module in microseconds, it took about
+# 130 ms with zigpy.types and attr and is about 50 ms without them
+IMPORT_BUDGET = 100000
+
+# runs main() with the arguments after -c, then lists sys.modules on stderr
+PROBE = """
+import sys
+import zigpy_deconz_parser.main as cli
+sys.argv = ['zigpy-deconz-parser'] + sys.argv[1:]
+try:
+    cli.main()
+except SystemExit:
+    pass
+sys.stderr.write('\\n'.join(sys.modules))
+"""
+
+
+def importtime():
+    """The modules python -X importtime lists for the CLI module.
+
+    module -> its cumulative import time in microseconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import zigpy_deconz_parser.main'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, module = line.split('|')
+        # skips the header line, "self [us] | cumulative | imported package"
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def modules(*args, stdin=None):
+    """sys.modules after running the CLI with args."""
+    proc = subprocess.run(
+        [sys.executable, '-c', PROBE] + list(args), input=stdin,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    return set(proc.stderr.splitlines())
+
+
+def zigpy_or_attr(names):
+    return sorted(name for name in names
+                  if name.split('.')[0] in ('zigpy', 'attr', 'attrs'))
+
+
+@pytest.fixture(scope='module')
+def imported():
+    return importtime()
+
+
+@pytest.fixture(scope='module')
+def log(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('log') / 'home-assistant.log')
+    with open(path, 'w') as file:
+        loggen.write(file, 200, unknown_commands=0.05)
+    return path
+
+
+def test_cli_imported(imported):
+    assert 'zigpy_deconz_parser.main' in imported
+
+
+@pytest.mark.parametrize('module', DEFERRED)
+def test_deferred(imported, module):
+    assert module not in imported, "only needed by " + DEFERRED[module]
+
+
+def test_import_budget():
+    # the best of a few runs, a single one may be slowed down by the machine
+    best = min(importtime()['zigpy_deconz_parser.main'] for _ in range(3))
+    assert best < IMPORT_BUDGET
+
+
+def test_help_without_zigpy():
+    assert zigpy_or_attr(modules('-h')) == []
+
+
+@pytest.mark.parametrize('engine', sorted(parser.ENGINES))
+def test_text_parsing_without_zigpy(log, engine):
+    names = modules('-i', log, '-e', engine)
+    assert 'zigpy_deconz_parser.commands.responses' in names
+    assert zigpy_or_attr(names) == []
+
+
+def test_stdin_without_zigpy(log):
+    with open(log) as file:
+        names = modules(stdin=file.read())
+    assert zigpy_or_attr(names) == []
@@ -0,0 +1,38 @@
+"""--profile decodes and renders like the unprofiled parser."""
+
+import io
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.profiler as profiler
+from zigpy_deconz_parser.filters import Filter
+from zigpy_deconz_parser.renderers import JsonLinesRenderer
+
+LINES = list(loggen.generate(2000, mix='uniform', unknown_commands=0.05,
+                             unknown_statuses=0.05))
+
+
+def render(engine, where, profiled):
+    out = io.BytesIO()
+    renderer = JsonLinesRenderer(out)
+    if profiled:
+        renderer = profiler.Renderer(renderer)
+    cli.proccess(LINES, engine, renderer, where)
+    renderer.close()
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('engine', list(parser.ENGINES))
+@pytest.mark.parametrize('where', [None, 'direction rx', 'confirm success'])
+def test_same_output(engine, where):
+    where = where and Filter(where)
+    expected = render(engine, where, False)
+    with profiler.profiling() as counters:
+        assert render(engine, where, True) == expected
+    assert not profiler.enabled()
+    frames = sum(row['frames'] for row in profiler.rows(counters))
+    assert frames == sum(1 for line in LINES if parser.match(line))
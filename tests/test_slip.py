@@ -0,0 +1,221 @@
+"""SLIP framing, checksums and directions of raw UART streams."""
+
+import asyncio
+import os
+import threading
+import time
+import tty
+
+import pytest
+
+import zigpy_deconz_parser.main as cli
+import zigpy_deconz_parser.slip as slip
+
+# DEVICE_STATE_CHANGED, only ever sent by the radio
+STATE_CHANGED = bytes.fromhex('0e03000600aa')
+STATE_CHANGED_SLIP = bytes.fromhex('c0' '0e03000600aa' '3fff' 'c0')
+# device state 0xc0, an END byte escaped as ESC ESC_END
+STATE_END = bytes.fromhex('0e03000600c0')
+STATE_END_SLIP = bytes.fromhex('c0' '0e03000600' 'dbdc' '29ff' 'c0')
+# seq 0xdb, an ESC byte escaped as ESC ESC_ESC
+SEQ_ESC = bytes.fromhex('0edb000600aa')
+SEQ_ESC_SLIP = bytes.fromhex('c0' '0e' 'dbdd' '000600aa' '67fe' 'c0')
+# APS_DATA_REQUEST from the host to NWK 0x1234, only decodes as request
+DATA_REQUEST = bytes.fromhex(
+    '1205001900'      # command, seq, status, frame length
+    '1200'            # payload length
+    '2a00'            # request id, flags
+    '02341201'        # NWK address and endpoint
+    '04010600'        # profile, cluster
+    '01'              # source endpoint
+    '0300012a01'      # ASDU
+    '0400')           # tx options, radius
+
+
+def frames(stream, data, ts='ts'):
+    return [(is_response, frame)
+            for _, is_response, frame in stream.feed(data, ts)]
+
+
+@pytest.mark.parametrize('frame, encoded', [
+    (STATE_CHANGED, STATE_CHANGED_SLIP),
+    (STATE_END, STATE_END_SLIP),
+    (SEQ_ESC, SEQ_ESC_SLIP),
+])
+def test_encode(frame, encoded):
+    assert slip.encode(frame) == encoded
+
+
+def test_unescape():
+    assert slip.unescape(b'\x01\xdb\xdc\x02\xdb\xdd\x03') == \
+        b'\x01\xc0\x02\xdb\x03'
+    # an escaped ESC followed by what looks like ESC_END stays as it is
+    assert slip.unescape(b'\xdb\xdd\xdc') == b'\xdb\xdc'
+    assert slip.unescape(b'\x01\x02') == b'\x01\x02'
+
+
+@pytest.mark.parametrize('frame, encoded', [
+    (STATE_END, STATE_END_SLIP),
+    (SEQ_ESC, SEQ_ESC_SLIP),
+])
+def test_escaped_frames(frame, encoded):
+    decoder = slip.SlipDecoder()
+    assert decoder.feed(encoded) == [frame]
+    assert decoder.frames == 1
+
+
+def test_checksum():
+    assert slip.checksum(STATE_CHANGED) == b'\x3f\xff'
+    assert slip.checksum(b'') == b'\x00\x00'
+
+
+def test_bad_checksum_is_dropped():
+    decoder = slip.SlipDecoder()
+    bad = STATE_CHANGED_SLIP[:-3] + b'\x40\xff\xc0'
+    assert decoder.feed(bad + STATE_END_SLIP) == [STATE_END]
+    assert (decoder.frames, decoder.bad_checksum, decoder.too_short) == \
+        (1, 1, 0)
+
+
+def test_too_short_frame_is_dropped():
+    decoder = slip.SlipDecoder()
+    # 6 bytes, a frame and its checksum are at least 7
+    assert decoder.feed(b'\xc0\x0e\x03\x00\x06\xff\xff\xc0') == []
+    assert (decoder.frames, decoder.bad_checksum, decoder.too_short) == \
+        (0, 0, 1)
+
+
+def test_truncated_frame_is_held_back():
+    decoder = slip.SlipDecoder()
+    data = STATE_END_SLIP + SEQ_ESC_SLIP
+    # split within the escape sequences of both frames
+    cuts = [6, 7, 13, 14, len(data)]
+    received = []
+    start = 0
+    for cut in cuts:
+        received += decoder.feed(data[start:cut])
+        start = cut
+    assert received == [STATE_END, SEQ_ESC]
+    assert decoder.bad_checksum == decoder.too_short == 0
+
+
+def test_unterminated_frame_is_never_emitted():
+    decoder = slip.SlipDecoder()
+    assert decoder.feed(STATE_CHANGED_SLIP[:-1]) == []
+    assert decoder.frames == 0
+
+
+def test_direction_vote():
+    assert slip.direction_vote(STATE_CHANGED) == 1
+    assert slip.direction_vote(DATA_REQUEST) == -1
+    # hosts only send SUCCESS
+    assert slip.direction_vote(DATA_REQUEST[:2] + b'\x01' +
+                               DATA_REQUEST[3:]) == 1
+    assert slip.direction_vote(b'\x12\x05') == 0
+
+
+@pytest.mark.parametrize('frame, is_response', [
+    (STATE_CHANGED, True),
+    (DATA_REQUEST, False),
+])
+def test_stream_direction(frame, is_response):
+    stream = slip.Stream('uart')
+    encoded = slip.encode(frame)
+    for _ in range(slip.DIRECTION_VOTES - 1):
+        assert frames(stream, encoded) == []
+    assert stream.is_response is None
+    assert frames(stream, encoded) == \
+        [(is_response, frame)] * slip.DIRECTION_VOTES
+    assert frames(stream, encoded) == [(is_response, frame)]
+
+
+def test_stream_direction_by_majority():
+    stream = slip.Stream('uart')
+    # the votes of the two kinds cancel out until the last frame
+    mixed = [STATE_CHANGED, DATA_REQUEST] * (slip.DIRECTION_FRAMES // 2)
+    for frame in mixed[:-1]:
+        assert frames(stream, slip.encode(frame)) == []
+    released = frames(stream, slip.encode(mixed[-1]))
+    assert released == [(False, frame) for frame in mixed]
+
+
+def test_stream_finish_releases_held_frames():
+    stream = slip.Stream('uart')
+    assert frames(stream, slip.encode(STATE_CHANGED)) == []
+    assert [(is_response, frame)
+            for _, is_response, frame in stream.finish()] == \
+        [(True, STATE_CHANGED)]
+
+
+def test_stream_with_a_given_direction():
+    stream = slip.Stream('uart', is_response=False)
+    assert frames(stream, slip.encode(STATE_CHANGED)) == \
+        [(False, STATE_CHANGED)]
+
+
+class Recorder:
+    def __init__(self):
+        self.frames = []
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self.frames.append((is_response, hdr.command, hdr.seq))
+
+    def close(self):
+        pass
+
+
+def test_capture_files(tmp_path):
+    tx, rx = str(tmp_path / 'tx.bin'), str(tmp_path / 'rx.bin')
+    with open(tx, 'wb') as file:
+        file.write(slip.encode(DATA_REQUEST) * 5)
+    with open(rx, 'wb') as file:
+        file.write(STATE_CHANGED_SLIP * 5)
+    recorder = Recorder()
+    asyncio.run(cli.proccess_serial([tx, rx], renderer=recorder))
+    assert sorted(recorder.frames) == \
+        [(False, 0x12, 0x05)] * 5 + [(True, 0x0e, 0x03)] * 5
+
+
+def replay(fd, data):
+    """Write data in small pieces, like a UART, then hang up."""
+    for offset in range(0, len(data), 7):
+        os.write(fd, data[offset:offset + 7])
+        time.sleep(0.001)
+    time.sleep(0.1)
+    os.close(fd)
+
+
+def test_pty_replayer():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    path = os.ttyname(slave)
+    data = (slip.encode(DATA_REQUEST) + STATE_END_SLIP + SEQ_ESC_SLIP) * 3
+    stream = slip.Stream(path)
+
+    async def read():
+        received = []
+        async for frames in slip.read_stream(path, stream):
+            received += [(is_response, frame)
+                         for _, is_response, frame in frames]
+        return received
+
+    async def run():
+        reader = asyncio.ensure_future(read())
+        await asyncio.sleep(0.1)
+        writer = threading.Thread(target=replay, args=(master, data))
+        writer.start()
+        os.close(slave)
+        try:
+            return await asyncio.wait_for(reader, 10)
+        finally:
+            writer.join()
+
+    received = asyncio.run(run())
+    assert [frame for _, frame in received] == \
+        [DATA_REQUEST, STATE_END, SEQ_ESC] * 3
+    # the responses outvote the request
+    assert {is_response for is_response, _ in received} == {True}
+    assert stream.decoder.bad_checksum == stream.decoder.too_short == 0
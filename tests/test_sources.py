@@ -0,0 +1,129 @@
+"""Compressed logs, globs of rotated logs and inputs which are pipes."""
+
+import bz2
+import gzip
+import lzma
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import loggen
+
+import zigpy_deconz_parser.sources as sources
+
+LINES = list(loggen.generate(300))
+
+
+def _zstd(path, mode):
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.open(path, mode)
+
+
+# suffix -> opener for writing
+COMPRESSORS = {
+    '': open,
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.zst': _zstd,
+}
+
+
+def write(path, lines, suffix=''):
+    with COMPRESSORS[suffix](path + suffix, 'wt') as file:
+        file.writelines(lines)
+    return path + suffix
+
+
+def shifted(lines, hours):
+    """lines with their timestamps hours later."""
+    return [line.replace(' 12:', ' {:02d}:'.format(12 + hours), 1)
+            for line in lines]
+
+
+@pytest.mark.parametrize('suffix', list(COMPRESSORS))
+def test_decompressed(tmp_path, suffix):
+    path = write(str(tmp_path / 'home-assistant.log'), LINES, suffix)
+    assert list(sources.lines([path])) == LINES
+    with open(path, 'rb') as raw:
+        assert (sources.decompressed(raw) is raw) == (suffix == '')
+    assert sources.first_timestamp(path) == LINES[0][:19].encode()
+
+
+@pytest.mark.parametrize('suffix', list(COMPRESSORS))
+def test_decompressed_from_a_pipe(suffix, tmp_path):
+    path = write(str(tmp_path / 'home-assistant.log'), LINES, suffix)
+    read, write_end = os.pipe()
+
+    def feed():
+        with open(path, 'rb') as src, open(write_end, 'wb') as dst:
+            dst.write(src.read())
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    with open(read, 'rb') as raw:
+        assert list(sources.lines([sources.decompressed(raw)])) == LINES
+    feeder.join()
+
+
+def test_expand_orders_by_first_timestamp(tmp_path):
+    base = str(tmp_path / 'home-assistant.log')
+    # the rotation numbers disagree with the timestamps on purpose
+    newest = write(base, shifted(LINES, 3))
+    middle = write(base + '.1', shifted(LINES, 1), '.gz')
+    oldest = write(base + '.2', LINES, '.xz')
+    latest = write(base + '.3', shifted(LINES, 2), '.bz2')
+    assert sources.expand(base + '*') == [oldest, middle, latest, newest]
+
+
+def test_expand_orders_by_rotation_without_timestamps(tmp_path,
+                                                     monkeypatch):
+    monkeypatch.setattr(sources, 'ORDER_LINES', 1)
+    base = str(tmp_path / 'home-assistant.log')
+    paths = [write(base, ['no timestamp\n'] + LINES),
+             write(base + '.1', ['no timestamp\n'] + LINES, '.gz'),
+             write(base + '.2', ['no timestamp\n'] + LINES, '.bz2')]
+    assert sources.expand(base + '*') == paths[::-1]
+
+
+def test_expand_zst_glob(tmp_path):
+    base = str(tmp_path / 'home-assistant.log')
+    newest = write(base, shifted(LINES, 1))
+    oldest = write(base + '.1', LINES, '.zst')
+    assert sources.expand(base + '*') == [oldest, newest]
+    assert list(sources.lines([oldest, newest])) == \
+        LINES + shifted(LINES, 1)
+
+
+def test_expand_missing():
+    assert sources.expand('/nonexistent/home-assistant.log*') == \
+        ['/nonexistent/home-assistant.log*']
+
+
+def run(*args):
+    return subprocess.run(
+        [sys.executable, '-m', 'zigpy_deconz_parser.main'] + list(args),
+        stdout=subprocess.PIPE, check=True, timeout=60).stdout
+
+
+@pytest.mark.parametrize('suffix', ['', '.gz', '.xz'])
+def test_fifo_input(tmp_path, suffix):
+    path = write(str(tmp_path / 'home-assistant.log'), LINES[:50], suffix)
+    fifo = str(tmp_path / 'fifo')
+    os.mkfifo(fifo)
+
+    def feed():
+        with open(path, 'rb') as src, open(fifo, 'wb') as dst:
+            dst.write(src.read())
+
+    # a daemon, so a reader that never reopens the fifo fails the test
+    # instead of leaving the writer blocked in open()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    piped = run('-i', fifo, '-f', 'jsonl')
+    feeder.join(10)
+    expected = run('-i', path, '-f', 'jsonl')
+    assert expected and piped == expected
@@ -0,0 +1,182 @@
+import attr
+import zigpy.types as t
+import zigpy.zcl as zcl
+import zigpy.zcl.foundation as foundation
+import zigpy.zdo.types as zdo_t
+
+ZDO_PROFILE = 0x0000
+
+# ZCL frame control bits
+FRAME_TYPE = 0b00011
+CLUSTER_COMMAND = 0b00001
+MANUFACTURER_SPECIFIC = 0b00100
+DIRECTION = 0b01000
+
+TO_SERVER = 'client->server'
+TO_CLIENT = 'server->client'
+
+# (profile, cluster id, general, command id, direction) -> Schema. general
+# tells foundation from cluster specific commands, which share command
+# ids. ZDO commands are keyed by their cluster id with a None command id
+# and direction.
+SCHEMAS = {}
+
+
+@attr.s(slots=True, frozen=True)
+class Schema:
+    """What zigpy knows about one ZCL/ZDO command."""
+
+    cluster = attr.ib(default=None)  # None for ZDO and unknown clusters
+    command = attr.ib(default=None)  # None for unknown commands
+    names = attr.ib(default=None)  # argument names, None if zigpy has none
+    types = attr.ib(default=None)  # argument types
+    attributes = attr.ib(default=None)  # attribute id -> (name, type)
+
+
+@attr.s(slots=True)
+class Asdu:
+    """A ZCL/ZDO frame, args is None if the command could not be decoded."""
+
+    profile = attr.ib()
+    cluster_id = attr.ib()
+    tsn = attr.ib()
+    general = attr.ib(default=False)
+    command_id = attr.ib(default=None)
+    direction = attr.ib(default=None)
+    manufacturer = attr.ib(default=None)
+    schema = attr.ib(default=None)
+    args = attr.ib(default=None)
+    rest = attr.ib(default=b'')
+
+
+def resolve(profile, cluster_id, general, command_id, direction):
+    """Look the command up in the zigpy cluster definitions."""
+    if profile == ZDO_PROFILE:
+        try:
+            names, types = zdo_t.CLUSTERS[cluster_id]
+        except KeyError:
+            return Schema()
+        return Schema(None, zdo_t.ZDOCmd(cluster_id).name, tuple(names),
+                      tuple(types))
+
+    cluster = zcl.Cluster._registry.get(cluster_id)
+    name = types = None
+    if general:
+        if command_id in foundation.COMMANDS:
+            types, _ = foundation.COMMANDS[command_id]
+            name = foundation.Command(command_id).name
+    elif cluster is not None:
+        if direction == TO_CLIENT:
+            commands = cluster.client_commands
+        else:
+            commands = cluster.server_commands
+        if command_id in commands:
+            name, types, _ = commands[command_id]
+    if types is not None:
+        types = tuple(types)
+    if cluster is None:
+        return Schema(None, name, None, types)
+    return Schema(cluster.__name__, name, None, types, cluster.attributes)
+
+
+def schema(profile, cluster_id, general, command_id, direction):
+    """resolve() once per command, see SCHEMAS."""
+    key = (profile, cluster_id, general, command_id, direction)
+    try:
+        return SCHEMAS[key]
+    except KeyError:
+        result = SCHEMAS[key] = resolve(*key)
+        return result
+
+
+def decode(profile, cluster_id, data):
+    """Decode the ASDU of an APS data request or indication.
+
+    Returns None if data is too short for a ZCL/ZDO header. Commands
+    unknown to zigpy and malformed payloads come back with args None and
+    the undecoded payload in rest.
+    """
+    data = bytes(data)
+    try:
+        if profile == ZDO_PROFILE:
+            result = Asdu(profile, cluster_id, data[0])
+            rest = data[1:]
+        else:
+            frame_control = data[0]
+            pos = 1
+            manufacturer = None
+            if frame_control & MANUFACTURER_SPECIFIC:
+                manufacturer = data[1] | data[2] << 8
+                pos = 3
+            result = Asdu(
+                profile, cluster_id, data[pos],
+                frame_control & FRAME_TYPE != CLUSTER_COMMAND, data[pos + 1],
+                TO_CLIENT if frame_control & DIRECTION else TO_SERVER,
+                manufacturer)
+            rest = data[pos + 2:]
+    except IndexError:
+        return None
+
+    result.schema = schema(profile, cluster_id, result.general,
+                           result.command_id, result.direction)
+    result.rest = rest
+    if result.schema.types is not None:
+        try:
+            args, result.rest = t.deserialize(rest, result.schema.types)
+        except (ValueError, KeyError, IndexError):
+            return result
+        result.args = args
+    return result
+
+
+def _attribute(schema, record):
+    """One attribute record of a read/write/report command."""
+    name = '?'
+    if schema.attributes is not None and record.attrid in schema.attributes:
+        name = schema.attributes[record.attrid][0]
+    status = getattr(record, 'status', None)
+    if status:
+        value = status
+    else:
+        value = getattr(record, 'value', None)
+        value = getattr(value, 'value', value)
+    return "0x{:04x} {}: {}".format(record.attrid, name, value)
+
+
+def lines(asdu):
+    """The text lines of a decoded ASDU."""
+    schema = asdu.schema
+    if asdu.profile == ZDO_PROFILE:
+        head = "ZDO: [0x{:02x}] ".format(asdu.tsn)
+        if schema.command is None:
+            head += "cluster 0x{:04x}".format(asdu.cluster_id)
+        else:
+            head += "{} (0x{:04x})".format(schema.command, asdu.cluster_id)
+    else:
+        head = "ZCL: [0x{:02x}] {} ".format(asdu.tsn, asdu.direction)
+        if schema.cluster is not None:
+            head += schema.cluster + ' '
+        else:
+            head += "cluster 0x{:04x} ".format(asdu.cluster_id)
+        if schema.command is None:
+            head += "{} command 0x{:02x}".format(
+                'general' if asdu.general else 'cluster', asdu.command_id)
+        else:
+            head += "{} (0x{:02x})".format(schema.command, asdu.command_id)
+        if asdu.manufacturer is not None:
+            head += " manufacturer 0x{:04x}".format(asdu.manufacturer)
+    yield head
+
+    if asdu.args is None:
+        if asdu.rest:
+            yield "  payload: {}".format(asdu.rest.hex())
+        return
+    for i, arg in enumerate(asdu.args):
+        name = schema.names[i] if schema.names else "arg {}".format(i)
+        if isinstance(arg, list) and arg and hasattr(arg[0], 'attrid'):
+            for record in arg:
+                yield "  " + _attribute(schema, record)
+        else:
+            yield "  {}: {}".format(name, arg)
+    if asdu.rest:
+        yield "  trailing: {}".format(asdu.rest.hex())
@@ -0,0 +1,166 @@
+"""Batch decoding of fixed layout frames into NumPy structured arrays.
+
+Needs the optional numpy dependency. The frames of a store.FrameStore are
+grouped by command, direction, length and address mode with vectorized
+masks over its packed buffer, every group is then gathered and viewed as
+a structured array in one pass, without a Python object per frame.
+
+The result has one array per (command, is_response) with the RECORDS
+fields, the frame index and timestamp. Fields a layout does not have,
+like the endpoint of a group address, are 0. Frames without a fixed
+layout are left to the per frame decoders.
+"""
+
+import zigpy_deconz.types as dt
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.store import FrameStore
+
+# rows gathered at a time, bounds the temporary index arrays
+CHUNK_FRAMES = 1 << 20
+
+HEADER = (('command', 'u1'), ('seq', 'u1'), ('status', 'u1'),
+          ('length', '<u2'))
+
+# address mode -> fields of a DeconzAddressEndpoint
+ADDRESS_ENDPOINT = {
+    dt.ADDRESS_MODE.GROUP: (('address', '<u2'), ),
+    dt.ADDRESS_MODE.NWK: (('address', '<u2'), ('endpoint', 'u1')),
+    dt.ADDRESS_MODE.IEEE: (('address', '<u8'), ('endpoint', 'u1')),
+}
+# address mode -> fields of a DeconzAddress
+ADDRESS = {
+    dt.ADDRESS_MODE.GROUP: (('address', '<u2'), ),
+    dt.ADDRESS_MODE.NWK: (('address', '<u2'), ),
+    dt.ADDRESS_MODE.IEEE: (('address', '<u8'), ),
+}
+
+# (command, is_response) -> fields of its array, besides index, timestamp,
+# seq and status
+RECORDS = {
+    (pt.DeConzCommand.DEVICE_STATE_CHANGED, True): (
+        ('device_state', 'u1'), ),
+    (pt.DeConzCommand.DEVICE_STATE, True): (
+        ('device_state', 'u1'), ('reserved_2', 'u1'), ('reserved_3', 'u1')),
+    (pt.DeConzCommand.MAC_POLL, True): (
+        ('payload_length', '<u2'), ('address_mode', 'u1'),
+        ('address', '<u8'), ('lqi', 'u1'), ('rssi', 'i1')),
+    (pt.DeConzCommand.APS_DATA_REQUEST, True): (
+        ('payload_length', '<u2'), ('device_state', 'u1'),
+        ('request_id', 'u1')),
+    (pt.DeConzCommand.APS_DATA_CONFIRM, True): (
+        ('payload_length', '<u2'), ('device_state', 'u1'),
+        ('request_id', 'u1'), ('address_mode', 'u1'), ('address', '<u8'),
+        ('endpoint', 'u1'), ('src_ep', 'u1'), ('confirm_status', 'u1'),
+        ('reserved_1', 'u1'), ('reserved_2', 'u1'), ('reserved_3', 'u1'),
+        ('reserved_4', 'u1')),
+}
+
+
+def _layouts():
+    """(command, is_response, address mode offset, address mode, fields).
+
+    The fields include the header, the address mode is None for commands
+    without an address.
+    """
+    yield (pt.DeConzCommand.DEVICE_STATE_CHANGED, True, None, None,
+           HEADER + RECORDS[(pt.DeConzCommand.DEVICE_STATE_CHANGED, True)])
+    yield (pt.DeConzCommand.DEVICE_STATE, True, None, None,
+           HEADER + RECORDS[(pt.DeConzCommand.DEVICE_STATE, True)])
+    yield (pt.DeConzCommand.APS_DATA_REQUEST, True, None, None,
+           HEADER + RECORDS[(pt.DeConzCommand.APS_DATA_REQUEST, True)])
+    for mode, fields in ADDRESS.items():
+        yield (pt.DeConzCommand.MAC_POLL, True, 7, mode,
+               HEADER + (('payload_length', '<u2'), ('address_mode', 'u1')) +
+               fields + (('lqi', 'u1'), ('rssi', 'i1')))
+    for mode, fields in ADDRESS_ENDPOINT.items():
+        yield (pt.DeConzCommand.APS_DATA_CONFIRM, True, 9, mode,
+               HEADER + (('payload_length', '<u2'), ('device_state', 'u1'),
+                         ('request_id', 'u1'), ('address_mode', 'u1')) +
+               fields + (('src_ep', 'u1'), ('confirm_status', 'u1'),
+                         ('reserved_1', 'u1'), ('reserved_2', 'u1'),
+                         ('reserved_3', 'u1'), ('reserved_4', 'u1')))
+
+
+def dtype(command, is_response):
+    """The dtype of the array of a command."""
+    import numpy as np
+
+    return np.dtype([('index', '<i8'), ('timestamp', '<i8'), ('seq', 'u1'),
+                     ('status', 'u1')] + list(RECORDS[(command, is_response)]))
+
+
+def decode(buffer, offsets, responses, timestamps=None):
+    """Decode the fixed layout frames among buffer[offsets[i]:offsets[i+1]].
+
+    responses flags the frames received from the radio, timestamps are
+    seconds since the epoch. Returns {(command, is_response): array} in
+    frame order and the indexes of the frames which were not decoded.
+    """
+    import numpy as np
+
+    buf = np.frombuffer(buffer, np.uint8)
+    offsets = np.asarray(offsets, np.int64)
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+    responses = np.asarray(responses, bool)
+    commands = np.zeros(len(starts), np.int16) - 1
+    present = lengths > 0
+    commands[present] = buf[starts[present]]
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps, np.int64)
+
+    decoded = np.zeros(len(starts), bool)
+    parts = {}
+    for command, is_response, mode_at, mode, fields in _layouts():
+        raw_type = np.dtype(list(fields))
+        index = np.flatnonzero((commands == int(command)) &
+                               (responses == is_response) &
+                               (lengths == raw_type.itemsize))
+        if mode is not None:
+            index = index[buf[starts[index] + mode_at] == mode]
+        if not len(index):
+            continue
+        record = np.zeros(len(index), dtype(command, is_response))
+        record['index'] = index
+        if timestamps is not None:
+            record['timestamp'] = timestamps[index]
+        columns = [field for field in raw_type.names
+                   if field in record.dtype.names]
+        span = np.arange(raw_type.itemsize)
+        for first in range(0, len(index), CHUNK_FRAMES):
+            rows = index[first:first + CHUNK_FRAMES]
+            raw = buf[starts[rows, None] + span].view(raw_type).ravel()
+            chunk = record[first:first + CHUNK_FRAMES]
+            for field in columns:
+                chunk[field] = raw[field]
+        decoded[index] = True
+        parts.setdefault((command, is_response), []).append(record)
+
+    arrays = {}
+    for key, records in parts.items():
+        array = np.concatenate(records)
+        arrays[key] = array[np.argsort(array['index'], kind='stable')]
+    return arrays, np.flatnonzero(~decoded)
+
+
+def decode_lines(lines):
+    """decode() of the frames of log lines, see FrameStore.add_line()."""
+    store = FrameStore()
+    for line in lines:
+        store.add_line(line)
+    return store.arrays()
+
+
+def name(key):
+    """'rx_MAC_POLL' style name of a (command, is_response) key."""
+    command, is_response = key
+    return '{}_{}'.format('rx' if is_response else 'tx', command.name)
+
+
+def convert(lines, path):
+    """Save the arrays of log lines to a .npz, returns the frame count."""
+    import numpy as np
+
+    arrays, rest = decode_lines(lines)
+    np.savez(path, **{name(key): array for key, array in arrays.items()})
+    return sum(len(array) for array in arrays.values())
@@ -0,0 +1,234 @@
+import binascii
+import mmap
+import os
+import stat
+import struct
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.correlate import epoch, timestamp
+
+MAGIC = b'DZCAP\x00\x01\n'
+INDEX_MAGIC = b'DZIDX\x00\x02\n'
+INDEX_SUFFIX = '.idx'
+
+# size and modification time (ns) of the capture the index was written for
+INDEX_HEADER = struct.Struct('<Qq')
+
+# frame length, seconds since the epoch, is_response; then the raw frame
+RECORD = struct.Struct('<HqB')
+# offset of the first record, record count, first and last timestamp and a
+# bitmap of the commands in the block
+BLOCK = struct.Struct('<QIqq32s')
+BLOCK_FRAMES = 256
+
+
+def is_capture(file):
+    """Whether a buffered binary file starts with MAGIC.
+
+    The magic is only peeked, so the file can still be read from its start
+    even if it is a pipe. A pipe which delivers fewer bytes at first is
+    taken for a log.
+    """
+    return file.peek(len(MAGIC))[:len(MAGIC)] == MAGIC
+
+
+class _Block:
+    def __init__(self, offset):
+        self.offset = offset
+        self.count = 0
+        self.first = self.last = None
+        self.commands = bytearray(32)
+
+    def add(self, ts, command):
+        if self.first is None or ts < self.first:
+            self.first = ts
+        if self.last is None or ts > self.last:
+            self.last = ts
+        self.count += 1
+        self.commands[command >> 3] |= 1 << (command & 7)
+
+    def pack(self):
+        return BLOCK.pack(self.offset, self.count, self.first, self.last,
+                          bytes(self.commands))
+
+
+class CaptureWriter:
+    """Write frames to a capture file and its sidecar index.
+
+    The capture holds the raw frames with their timestamp and direction,
+    the index one entry per BLOCK_FRAMES frames with the time span and the
+    commands of the block, so queries can skip whole blocks.
+    """
+
+    def __init__(self, path, block_frames=BLOCK_FRAMES):
+        self.path = path
+        self._file = open(path, mode='wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+        self._block_frames = block_frames
+        self._blocks = []
+        self._block = None
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, ts, is_response, data):
+        """Add one frame, ts is in seconds since the epoch."""
+        if self._block is None or self._block.count >= self._block_frames:
+            self._block = _Block(self._offset)
+            self._blocks.append(self._block)
+        self._block.add(ts, data[0])
+        record = RECORD.pack(len(data), ts, is_response) + data
+        self._file.write(record)
+        self._offset += len(record)
+        self.frames += 1
+
+    def add_line(self, line):
+        """Add the frame of a log line, returns False if there is none."""
+        result = parser.match(line)
+        if result is None:
+            return False
+        ts, txrx, data = result.groups()
+        self.append(epoch(ts), txrx == 'Frame received',
+                    binascii.unhexlify(data))
+        return True
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        capture = os.stat(self.path)
+        with open(self.path + INDEX_SUFFIX, mode='wb') as index:
+            index.write(INDEX_MAGIC)
+            index.write(INDEX_HEADER.pack(capture.st_size,
+                                          capture.st_mtime_ns))
+            for block in self._blocks:
+                index.write(block.pack())
+
+
+def convert(lines, path, block_frames=BLOCK_FRAMES):
+    """Write the frames of log lines to a capture, returns the frame count."""
+    with CaptureWriter(path, block_frames) as writer:
+        for line in lines:
+            writer.add_line(line)
+    return writer.frames
+
+
+class CaptureReader:
+    """Read the frames of a capture file, optionally filtered.
+
+    Without a usable index the whole capture is scanned. An index written
+    for another size or modification time of the capture is stale, it is
+    not used and stale is set. file is the capture opened for binary
+    reading, captures which aren't regular files (pipes) are read from it
+    front to back.
+    """
+
+    def __init__(self, path, file=None):
+        self.path = path
+        self._file = file
+        self.stale = False
+        self.blocks = self._read_index(path + INDEX_SUFFIX)
+
+    def _capture_stat(self):
+        if self._file is not None:
+            return os.fstat(self._file.fileno())
+        return os.stat(self.path)
+
+    def _read_index(self, path):
+        try:
+            with open(path, mode='rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        capture = self._capture_stat()
+        if not stat.S_ISREG(capture.st_mode):
+            return None
+        data = memoryview(data)
+        start = len(INDEX_MAGIC) + INDEX_HEADER.size
+        if data[:len(INDEX_MAGIC)] != INDEX_MAGIC or len(data) < start or \
+                (len(data) - start) % BLOCK.size or \
+                INDEX_HEADER.unpack_from(data, len(INDEX_MAGIC)) != \
+                (capture.st_size, capture.st_mtime_ns):
+            self.stale = True
+            return None
+        return list(BLOCK.iter_unpack(data[start:]))
+
+    def spans(self, since=None, until=None, commands=None):
+        """(start offset, record count or None) of the blocks to read."""
+        if self.blocks is None:
+            yield len(MAGIC), None
+            return
+        for offset, count, first, last, bitmap in self.blocks:
+            if since is not None and last < since:
+                continue
+            if until is not None and first > until:
+                continue
+            if commands is not None and not any(
+                    bitmap[command >> 3] & (1 << (command & 7))
+                    for command in commands):
+                continue
+            yield offset, count
+
+    def raw_frames(self, since=None, until=None, commands=None):
+        """Yield (seconds since the epoch, is_response, frame) tuples.
+
+        since and until are inclusive epoch seconds, commands a collection
+        of command ids.
+        """
+        if commands is not None:
+            commands = frozenset(int(command) for command in commands)
+
+        def wanted(ts, command):
+            return (since is None or ts >= since) and \
+                (until is None or ts <= until) and \
+                (commands is None or command in commands)
+
+        if self._file is not None and \
+                not stat.S_ISREG(self._capture_stat().st_mode):
+            return self._stream(self._file, wanted)
+        return self._mapped(wanted, since, until, commands)
+
+    def _mapped(self, wanted, since, until, commands):
+        if self._file is None:
+            file = open(self.path, mode='rb')
+        else:
+            file = self._file
+        with file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError("{} is not a capture".format(self.path))
+            size = len(mm)
+            unpack = RECORD.unpack_from
+            header = RECORD.size
+            for offset, count in self.spans(since, until, commands):
+                while offset < size and count != 0:
+                    length, ts, is_response = unpack(mm, offset)
+                    start = offset + header
+                    offset = start + length
+                    if count is not None:
+                        count -= 1
+                    if wanted(ts, mm[start]):
+                        yield ts, bool(is_response), mm[start:offset]
+
+    def _stream(self, file, wanted):
+        with file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a capture".format(self.path))
+            while True:
+                header = file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    return
+                length, ts, is_response = RECORD.unpack(header)
+                data = file.read(length)
+                if wanted(ts, data[0]):
+                    yield ts, bool(is_response), data
+
+    def frames(self, since=None, until=None, commands=None):
+        """raw_frames() with log style timestamps."""
+        for ts, is_response, data in self.raw_frames(since, until, commands):
+            yield timestamp(ts), is_response, data
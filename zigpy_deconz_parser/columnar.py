@@ -0,0 +1,143 @@
+import sys
+
+import zigpy_deconz_parser.compiled as compiled
+from zigpy_deconz_parser.renderers import Renderer
+
+BATCH_SIZE = 65536
+
+# column name, arrow type name
+COLUMNS = (
+    ('timestamp', 'string'),
+    ('direction', 'string'),
+    ('command', 'string'),
+    ('seq', 'uint8'),
+    ('status', 'string'),
+    ('request_id', 'uint8'),
+    ('src_nwk', 'uint16'),
+    ('dst_nwk', 'uint16'),
+    ('profile', 'uint16'),
+    ('cluster', 'uint16'),
+    ('lqi', 'uint8'),
+    ('rssi', 'int8'),
+    ('confirm_status', 'string'),
+    ('asdu', 'binary'),
+)
+
+
+def _name(obj):
+    return None if obj is None else obj.name
+
+
+def _int(obj):
+    return None if obj is None else int(obj)
+
+
+def columns(ts, is_response, hdr, cmd):
+    """Flatten one decoded frame into a row of COLUMNS values."""
+    src = getattr(cmd, 'src_addr', None) or getattr(cmd, 'some_address', None)
+    asdu = getattr(cmd, 'asdu', None)
+    return (
+        ts,
+        'rx' if is_response else 'tx',
+        hdr.command.name,
+        int(hdr.seq),
+        hdr.status.name,
+        _int(getattr(cmd, 'request_id', None)),
+        compiled.nwk(src),
+        compiled.nwk(getattr(cmd, 'dst_addr', None)),
+        _int(getattr(cmd, 'profile', None)),
+        _int(getattr(cmd, 'cluster_id', None)),
+        _int(getattr(cmd, 'lqi', None)),
+        _int(getattr(cmd, 'rssi', None)),
+        _name(getattr(cmd, 'confirm_status', None)),
+        None if asdu is None else bytes(asdu),
+    )
+
+
+class ColumnarRenderer(Renderer):
+    """Collect frames into typed column batches for analytics.
+
+    Needs the optional pyarrow dependency. Batches of batch_size frames are
+    handed to write_batch() as pyarrow.RecordBatch objects.
+    """
+
+    options = ('batch_size', )
+
+    def __init__(self, out=None, batch_size=BATCH_SIZE):
+        import pyarrow as pa
+
+        self._pa = pa
+        self._out = sys.stdout.buffer if out is None else out
+        self._batch_size = batch_size
+        self._columns = [[] for _ in COLUMNS]
+        self._rows = 0
+        fields = []
+        for name, type_name in COLUMNS:
+            if name == 'timestamp':
+                type_ = pa.timestamp('s')
+            else:
+                type_ = getattr(pa, type_name)()
+            fields.append(pa.field(name, type_))
+        self.schema = pa.schema(fields)
+        self._writer = None
+
+    def frame(self, ts, is_response, hdr, cmd):
+        for column, item in zip(self._columns,
+                                columns(ts, is_response, hdr, cmd)):
+            column.append(item)
+        self._rows += 1
+        if self._rows >= self._batch_size:
+            self.flush()
+
+    def batch(self):
+        pa = self._pa
+        import pyarrow.compute as pc
+
+        arrays = []
+        for (name, type_name), column in zip(COLUMNS, self._columns):
+            if name == 'timestamp':
+                array = pc.strptime(pa.array(column, pa.string()),
+                                    format='%Y-%m-%d %H:%M:%S', unit='s')
+            else:
+                array = pa.array(column, getattr(pa, type_name)())
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def flush(self):
+        if not self._rows:
+            return
+        self.write_batch(self.batch())
+        for column in self._columns:
+            column.clear()
+        self._rows = 0
+
+    def write_batch(self, batch):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            # still write the schema for empty input
+            self.write_batch(self.batch())
+        self._writer.close()
+        self._out.flush()
+
+
+class ParquetRenderer(ColumnarRenderer):
+    """One Parquet row group per batch."""
+
+    def write_batch(self, batch):
+        if self._writer is None:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._out, self.schema)
+        self._writer.write_batch(batch)
+
+
+class ArrowRenderer(ColumnarRenderer):
+    """Arrow IPC stream, one record batch per batch."""
+
+    def write_batch(self, batch):
+        if self._writer is None:
+            self._writer = self._pa.ipc.new_stream(self._out, self.schema)
+        self._writer.write_batch(batch)
@@ -1,51 +1,45 @@
-import attr
 import binascii
 
-import zigpy.types as t
 import zigpy_deconz.types as dt
 import zigpy_deconz_parser.types as pt
 
 
-@attr.s
 class Version(pt.Command):
     @staticmethod
     def pretty_print():
         pass
 
 
-@attr.s
 class ReadParameter(pt.Command):
-    SCHEMA = (t.uint16_t, pt.DeconzParameter,)
+    SCHEMA = (pt.uint16_t, pt.DeconzParameter,)
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    parameter = attr.ib(factory=SCHEMA[1])
+    payload_length = pt.Field()
+    parameter = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
-        self.print(str(self.parameter))
+        self.print(pt.render(self.parameter))
 
 
-@attr.s
 class WriteParameter(pt.Command):
-    SCHEMA = (t.uint16_t, pt.DeconzParameter, pt.Bytes)
+    SCHEMA = (pt.uint16_t, pt.DeconzParameter, pt.Bytes)
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    parameter = attr.ib(factory=SCHEMA[1])
-    value = attr.ib(factory=SCHEMA[2])
+    payload_length = pt.Field()
+    parameter = pt.Field()
+    value = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
-        self.print(str(self.parameter))
+        self.print(pt.render(self.parameter))
         self.print("Value: {}".format(self.value))
 
 
-@attr.s
 class DeviceState(pt.Command):
-    SCHEMA = (t.uint8_t, t.uint8_t, t.uint8_t, )
+    SCHEMA = (pt.uint8_t, pt.uint8_t, pt.uint8_t, )
 
-    reserved_1 = attr.ib(factory=SCHEMA[0])
-    reserved_2 = attr.ib(factory=SCHEMA[1])
-    reserved_3 = attr.ib(factory=SCHEMA[2])
+    reserved_1 = pt.Field()
+    reserved_2 = pt.Field()
+    reserved_3 = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Reserved: {} shall be set to 0".format(self.reserved_1))
@@ -53,52 +47,49 @@ class DeviceState(pt.Command):
         self.print("Reserved: {} shall be set to 0".format(self.reserved_3))
 
 
-@attr.s
 class ChangeNetworkState(pt.Command):
     SCHEMA = (pt.NetworkState, )
 
-    network_state = attr.ib(factory=SCHEMA[0])
+    network_state = pt.Field()
 
     def pretty_print(self, *args):
-        self.print(str(self.network_state))
+        self.print(pt.render(self.network_state))
 
 
-@attr.s
 class ApsDataIndication(pt.Command):
     SCHEMA = (pt.ApsDataIndicationFlags, )
 
-    flags = attr.ib(factory=pt.ApsDataIndicationFlags)
+    flags = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Flags: {}".format(self.flags))
 
 
-@attr.s
 class ApsDataRequest(pt.Command):
     _lpad = pt.LPAD
 
-    SCHEMA = (t.uint16_t,  # payload length
-              t.uint8_t,  # request_id
-              t.uint8_t,  # flags
+    SCHEMA = (pt.uint16_t,  # payload length
+              pt.uint8_t,  # request_id
+              pt.uint8_t,  # flags
               dt.DeconzAddressEndpoint,  # destination address and ep
-              t.uint16_t,  # profile id
-              t.uint16_t,  # cluster id
-              t.uint8_t,  # source endpoint
-              t.LongOctetString,  # ASDU
+              pt.uint16_t,  # profile id
+              pt.uint16_t,  # cluster id
+              pt.uint8_t,  # source endpoint
+              pt.LongOctetString,  # ASDU
               pt.ApsTxOptions,  # tx options
-              t.uint8_t,  # radius
+              pt.uint8_t,  # radius
     )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    request_id = attr.ib(factory=SCHEMA[1])
-    flags = attr.ib(factory=SCHEMA[2])
-    dst_addr = attr.ib(factory=SCHEMA[3])
-    profile = attr.ib(factory=SCHEMA[4])
-    cluster_id = attr.ib(factory=SCHEMA[5])
-    src_ep = attr.ib(factory=SCHEMA[6])
-    asdu = attr.ib(factory=SCHEMA[7])
-    tx_options = attr.ib(factory=SCHEMA[8])
-    radius = attr.ib(factory=SCHEMA[9])
+    payload_length = pt.Field()
+    request_id = pt.Field()
+    flags = pt.Field()
+    dst_addr = pt.Field()
+    profile = pt.Field()
+    cluster_id = pt.Field()
+    src_ep = pt.Field()
+    asdu = pt.Field()
+    tx_options = pt.Field()
+    radius = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
@@ -118,11 +109,10 @@ class ApsDataRequest(pt.Command):
         self.print("Radius: {}".format(self.radius))
 
 
-@attr.s
 class ApsDataConfirm(pt.Command):
-    SCHEMA = (t.uint16_t, )
+    SCHEMA = (pt.uint16_t, )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
+    payload_length = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
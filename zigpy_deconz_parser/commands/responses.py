@@ -1,53 +1,47 @@
-import attr
 import binascii
 
-import zigpy.types as t
 import zigpy_deconz.types as dt
 import zigpy_deconz_parser.types as pt
 
 
-@attr.s
 class Version(pt.Command):
-    SCHEMA = (t.uint32_t, )
-    version = attr.ib(factory=SCHEMA[0])
+    SCHEMA = (pt.uint32_t, )
+    version = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Version: 0x{:08x}".format(self.version))
 
 
-@attr.s
 class ReadParameter(pt.Command):
-    SCHEMA = (t.uint16_t, pt.DeconzParameter, pt.Bytes)
+    SCHEMA = (pt.uint16_t, pt.DeconzParameter, pt.Bytes)
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    parameter = attr.ib(factory=SCHEMA[1])
-    value = attr.ib(factory=SCHEMA[2])
+    payload_length = pt.Field()
+    parameter = pt.Field()
+    value = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
-        self.print(str(self.parameter))
+        self.print(pt.render(self.parameter))
         self.print("Value: {}".format(binascii.hexlify(self.value)))
 
 
-@attr.s
 class WriteParameter(pt.Command):
-    SCHEMA = (t.uint16_t, pt.DeconzParameter, )
+    SCHEMA = (pt.uint16_t, pt.DeconzParameter, )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    parameter = attr.ib(factory=SCHEMA[1])
+    payload_length = pt.Field()
+    parameter = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
-        self.print(str(self.parameter))
+        self.print(pt.render(self.parameter))
 
 
-@attr.s
 class DeviceState(pt.Command):
-    SCHEMA = (pt.DeviceState, t.uint8_t, t.Optional(t.uint8_t), )
+    SCHEMA = (pt.DeviceState, pt.uint8_t, pt.Optional(pt.uint8_t), )
 
-    device_state = attr.ib(factory=SCHEMA[0])
-    reserved_2 = attr.ib(factory=SCHEMA[1])
-    reserved_3 = attr.ib(factory=SCHEMA[2])
+    device_state = pt.Field()
+    reserved_2 = pt.Field()
+    reserved_3 = pt.Field()
 
     def pretty_print(self, *args):
         self.device_state.pretty_print()
@@ -55,50 +49,47 @@ class DeviceState(pt.Command):
         self.print("Reserved: {} Shall be ignored".format(self.reserved_3))
 
 
-@attr.s
 class ChangeNetworkState(pt.Command):
     SCHEMA = (pt.NetworkState, )
 
-    network_state = attr.ib(factory=SCHEMA[0])
+    network_state = pt.Field()
 
     def pretty_print(self, *args):
-        self.print(str(self.network_state))
+        self.print(pt.render(self.network_state))
 
 
-@attr.s
 class DeviceStateChanged(pt.Command):
     SCHEMA = (pt.DeviceState, )
 
-    device_state = attr.ib(factory=SCHEMA[0])
+    device_state = pt.Field()
 
     def pretty_print(self, *args):
         self.device_state.pretty_print()
 
 
-@attr.s
 class ApsDataIndication(pt.Command):
-    SCHEMA = (t.uint16_t, pt.DeviceState, dt.DeconzAddress, t.uint8_t,
-              dt.DeconzAddress, t.uint8_t, t.uint16_t, t.uint16_t,
-              t.LongOctetString, t.uint8_t, t.uint8_t, t.uint8_t, t.uint8_t,
-              t.uint8_t, t.uint8_t, t.uint8_t, t.int8s, )
-
-    payload_length = attr.ib(factory=SCHEMA[0])
-    device_state = attr.ib(factory=SCHEMA[1])
-    dst_addr = attr.ib(factory=SCHEMA[2])
-    dst_ep = attr.ib(factory=SCHEMA[3])
-    src_addr = attr.ib(factory=SCHEMA[4])
-    src_ep = attr.ib(factory=SCHEMA[5])
-    profile = attr.ib(factory=SCHEMA[6])
-    cluster_id = attr.ib(factory=SCHEMA[7])
-    asdu = attr.ib(factory=SCHEMA[8])
-    reserved_1 = attr.ib(factory=SCHEMA[9])
-    reserved_2 = attr.ib(factory=SCHEMA[10])
-    lqi = attr.ib(factory=SCHEMA[11])
-    reserved_3 = attr.ib(factory=SCHEMA[12])
-    reserved_4 = attr.ib(factory=SCHEMA[13])
-    reserved_5 = attr.ib(factory=SCHEMA[14])
-    reserved_6 = attr.ib(factory=SCHEMA[15])
-    rssi = attr.ib(factory=SCHEMA[16])
+    SCHEMA = (pt.uint16_t, pt.DeviceState, dt.DeconzAddress, pt.uint8_t,
+              dt.DeconzAddress, pt.uint8_t, pt.uint16_t, pt.uint16_t,
+              pt.LongOctetString, pt.uint8_t, pt.uint8_t, pt.uint8_t, pt.uint8_t,
+              pt.uint8_t, pt.uint8_t, pt.uint8_t, pt.int8s, )
+
+    payload_length = pt.Field()
+    device_state = pt.Field()
+    dst_addr = pt.Field()
+    dst_ep = pt.Field()
+    src_addr = pt.Field()
+    src_ep = pt.Field()
+    profile = pt.Field()
+    cluster_id = pt.Field()
+    asdu = pt.Field()
+    reserved_1 = pt.Field()
+    reserved_2 = pt.Field()
+    lqi = pt.Field()
+    reserved_3 = pt.Field()
+    reserved_4 = pt.Field()
+    reserved_5 = pt.Field()
+    reserved_6 = pt.Field()
+    rssi = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
@@ -106,7 +97,7 @@ class ApsDataIndication(pt.Command):
 
         if self.profile == 0 and self.dst_ep == 0:
             # ZDO
-            request_id = t.uint8_t.deserialize(self.asdu)[0]
+            request_id = pt.uint8_t.deserialize(self.asdu)[0]
         else:
             # ZCL
             frame_control = self.asdu[0]
@@ -140,19 +131,18 @@ class ApsDataIndication(pt.Command):
         self.print("RSSI: {}".format(self.rssi))
 
 
-@attr.s
 class ApsDataRequest(pt.Command):
     _lpad = pt.LPAD
 
     SCHEMA = (
-        t.uint16_t,  # payload length
+        pt.uint16_t,  # payload length
         pt.DeviceState,  # Device state
-        t.uint8_t,  # request_id
+        pt.uint8_t,  # request_id
     )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    device_state = attr.ib(factory=SCHEMA[1])
-    request_id = attr.ib(factory=SCHEMA[2])
+    payload_length = pt.Field()
+    device_state = pt.Field()
+    request_id = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
@@ -164,31 +154,30 @@ class ApsDataRequest(pt.Command):
         self.device_state.pretty_print()
 
 
-@attr.s
 class ApsDataConfirm(pt.Command):
     SCHEMA = (
-        t.uint16_t,  # payload length
+        pt.uint16_t,  # payload length
         pt.DeviceState,  # Device State
-        t.uint8_t,  # Request ID
+        pt.uint8_t,  # Request ID
         dt.DeconzAddressEndpoint,  # Destination address
-        t.uint8_t,  # Source endpoint
+        pt.uint8_t,  # Source endpoint
         pt.ConfirmStatus,  # Confirm Status
-        t.uint8_t,  # Reserved below
-        t.uint8_t,
-        t.uint8_t,
-        t.uint8_t,
+        pt.uint8_t,  # Reserved below
+        pt.uint8_t,
+        pt.uint8_t,
+        pt.uint8_t,
     )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    device_state = attr.ib(factory=SCHEMA[1])
-    request_id = attr.ib(factory=SCHEMA[2])
-    dst_addr = attr.ib(factory=SCHEMA[3])
-    src_ep = attr.ib(factory=SCHEMA[4])
-    confirm_status = attr.ib(factory=SCHEMA[5])
-    reserved_1 = attr.ib(factory=SCHEMA[6])
-    reserved_2 = attr.ib(factory=SCHEMA[7])
-    reserved_3 = attr.ib(factory=SCHEMA[8])
-    reserved_4 = attr.ib(factory=SCHEMA[9])
+    payload_length = pt.Field()
+    device_state = pt.Field()
+    request_id = pt.Field()
+    dst_addr = pt.Field()
+    src_ep = pt.Field()
+    confirm_status = pt.Field()
+    reserved_1 = pt.Field()
+    reserved_2 = pt.Field()
+    reserved_3 = pt.Field()
+    reserved_4 = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
@@ -201,7 +190,7 @@ class ApsDataConfirm(pt.Command):
             self.print("NWK: 0x{:04x}".format(self.dst_addr.address))
 
         self.print("Src endpoint: {}".format(self.src_ep))
-        self.print("TX Status: {}".format(str(self.confirm_status)))
+        self.print("TX Status: " + pt.render(self.confirm_status))
         r = "reserved_1: 0x{:02x} Shall be ignored"
         self.print(r.format(self.reserved_1))
         r = "reserved_2: 0x{:02x} Shall be ignored"
@@ -212,14 +201,13 @@ class ApsDataConfirm(pt.Command):
         self.print(r.format(self.reserved_4))
 
 
-@attr.s
 class MacPoll(pt.Command):
-    SCHEMA = (t.uint16_t, dt.DeconzAddress, t.uint8_t, t.int8s, )
+    SCHEMA = (pt.uint16_t, dt.DeconzAddress, pt.uint8_t, pt.int8s, )
 
-    payload_length = attr.ib(factory=SCHEMA[0])
-    some_address = attr.ib(factory=SCHEMA[1])
-    lqi = attr.ib(factory=SCHEMA[2])
-    rssi = attr.ib(factory=SCHEMA[3])
+    payload_length = pt.Field()
+    some_address = pt.Field()
+    lqi = pt.Field()
+    rssi = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
@@ -230,26 +218,24 @@ class MacPoll(pt.Command):
         self.print("RSSI: {}".format(self.rssi))
 
 
-@attr.s
 class ZGPDataInd(pt.Command):
-    SCHEMA = (t.LongOctetString, )
+    SCHEMA = (pt.LongOctetString, )
 
-    payload = attr.ib(factory=t.LongOctetString)
+    payload = pt.Field()
 
     def pretty_print(self, *args):
         self.print('Payload: {}'.format(binascii.hexlify(self.payload)))
 
 
-@attr.s
 class SimpleBeacon(pt.Command):
-    SCHEMA = (t.uint16_t, t.NWK, t.NWK, t.uint8_t, t.uint8_t, t.uint8_t, )
-
-    payload_length = attr.ib(factory=SCHEMA[0])
-    SrcNWK = attr.ib(factory=SCHEMA[1])
-    PanId = attr.ib(factory=SCHEMA[2])
-    channel = attr.ib(factory=SCHEMA[3])
-    flags = attr.ib(factory=SCHEMA[4])
-    updateId = attr.ib(factory=SCHEMA[5])
+    SCHEMA = (pt.uint16_t, pt.NWK, pt.NWK, pt.uint8_t, pt.uint8_t, pt.uint8_t, )
+
+    payload_length = pt.Field()
+    SrcNWK = pt.Field()
+    PanId = pt.Field()
+    channel = pt.Field()
+    flags = pt.Field()
+    updateId = pt.Field()
 
     def pretty_print(self, *args):
         self.print("Payload length: {}".format(self.payload_length))
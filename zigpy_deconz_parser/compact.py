@@ -0,0 +1,88 @@
+import zigpy_deconz_parser.compiled as compiled
+import zigpy_deconz_parser.types as pt
+
+# class attributes and methods the slotted variants share with the originals
+SHARED = ('SCHEMA', '_fields', '_lpad', 'print', 'pretty_print',
+          'decode_payload')
+
+SLOTTED_CLASSES = {}
+ORIGINALS = {}
+
+
+def _static(cls, name):
+    """inspect.getattr_static() for class attributes, without inspect."""
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return vars(klass)[name]
+    raise AttributeError(name)
+
+
+def _frozen(self, name, value):
+    raise AttributeError("can't set attribute {!r}".format(name))
+
+
+def _hash(self):
+    return hash(self._values())
+
+
+def _slotted(cls, names):
+    names = tuple(names)
+    namespace = {
+        '__slots__': names,
+        'FIELDS': names,
+        '__setattr__': _frozen,
+        '__hash__': _hash,
+    }
+    for name in SHARED:
+        try:
+            namespace[name] = _static(cls, name)
+        except AttributeError:
+            pass
+    namespace['__doc__'] = cls.__doc__
+    slotted = type('Slotted' + cls.__name__, (pt.Record, ), namespace)
+    # the slot descriptors set the fields past the frozen __setattr__
+    members = tuple(enumerate(vars(slotted)[name] for name in names))
+
+    def __init__(self, *args):
+        if len(args) != len(members):
+            raise TypeError("{}() takes {} arguments, {} given".format(
+                slotted.__name__, len(members), len(args)))
+        for index, member in members:
+            member.__set__(self, args[index])
+
+    slotted.__init__ = __init__
+    ORIGINALS[slotted] = cls
+    return slotted
+
+
+def slotted_class(cls):
+    """Slotted, frozen variant of a command class.
+
+    The variant doesn't inherit from cls, so its instances have neither a
+    __dict__ nor a __weakref__ slot. Use original() instead of isinstance()
+    to find out which command it represents.
+    """
+    try:
+        return SLOTTED_CLASSES[cls]
+    except KeyError:
+        slotted = SLOTTED_CLASSES[cls] = _slotted(cls, cls.FIELDS)
+        return slotted
+
+
+def original(cls):
+    """The command class a slotted variant was built from."""
+    return ORIGINALS.get(cls, cls)
+
+
+Header = _slotted(pt.Header,
+                  [field[0] for field in pt.Header._fields] + ['payload'])
+
+
+def deserialize_header(data):
+    hdr, rest = compiled.deserialize_header(data)
+    return Header(hdr.command, hdr.seq, hdr.status, hdr.length,
+                  bytes(hdr.payload)), rest
+
+
+def deserialize(cls, data):
+    return compiled.deserialize(slotted_class(cls), data)
@@ -0,0 +1,305 @@
+import enum
+import struct
+
+import zigpy_deconz.types as dt
+import zigpy_deconz_parser.types as pt
+
+INT_FORMATS = {
+    (1, False): 'B',
+    (1, True): 'b',
+    (2, False): 'H',
+    (2, True): 'h',
+    (4, False): 'I',
+    (4, True): 'i',
+    (8, False): 'Q',
+    (8, True): 'q',
+}
+
+ADDRESS_MODES = {mode.value: mode for mode in dt.ADDRESS_MODE}
+SHORT_ADDRESS_MODES = (dt.ADDRESS_MODE.GROUP, dt.ADDRESS_MODE.NWK)
+NWK_MODES = (dt.ADDRESS_MODE.NWK, dt.ADDRESS_MODE.NWK_AND_IEEE)
+# address mode -> bytes after the mode byte
+ADDRESS_SIZES = {
+    dt.ADDRESS_MODE.GROUP: 2,
+    dt.ADDRESS_MODE.NWK: 2,
+    dt.ADDRESS_MODE.IEEE: 8,
+    dt.ADDRESS_MODE.NWK_AND_IEEE: 10,
+}
+ADDRESS_ENDPOINT_SIZES = {
+    dt.ADDRESS_MODE.GROUP: 2,
+    dt.ADDRESS_MODE.NWK: 3,
+    dt.ADDRESS_MODE.IEEE: 9,
+}
+
+DECODERS = {}
+
+
+def nwk(addr):
+    """The NWK address of a decoded address as int, None without one."""
+    if addr is None or addr.address_mode not in NWK_MODES:
+        return None
+    return int(addr.address)
+
+
+def _is_fixed(type_):
+    if getattr(type_, 'optional', False):
+        return False
+    size = getattr(type_, '_size', None)
+    signed = getattr(type_, '_signed', None)
+    return (size, signed) in INT_FORMATS and issubclass(type_, int)
+
+
+def _converter(type_):
+    if not issubclass(type_, enum.Enum):
+        return type_
+    if type_ in pt.UNKNOWN_CLASSES:
+        return pt.LOOKUP_TABLES[type_].__getitem__
+    members = {member.value: member for member in type_}
+
+    def convert(value):
+        try:
+            return members[value]
+        except KeyError:
+            # let the type produce its own Unknown* placeholder or error
+            raw = value.to_bytes(type_._size, 'little', signed=type_._signed)
+            return type_.deserialize(raw)[0]
+
+    return convert
+
+
+def _fixed_step(types):
+    fmt = struct.Struct('<' + ''.join(
+        INT_FORMATS[(tp._size, tp._signed)] for tp in types))
+    converters = tuple(enumerate(_converter(tp) for tp in types))
+
+    def step(data, offset, args):
+        try:
+            values = fmt.unpack_from(data, offset)
+        except struct.error:
+            raise ValueError(
+                "Data is too short to contain {} bytes".format(fmt.size))
+        # neither zip() nor a list comprehension, both allocate per call
+        for index, convert in converters:
+            args.append(convert(values[index]))
+        return offset + fmt.size
+
+    return step
+
+
+def _lvbytes_step(type_):
+    prefix = struct.Struct('<' + INT_FORMATS[(type_._prefix_length, False)])
+
+    def step(data, offset, args):
+        if len(data) < offset + prefix.size:
+            raise ValueError("Data is too short")
+        start = offset + prefix.size
+        end = start + prefix.unpack_from(data, offset)[0]
+        if len(data) < end:
+            raise ValueError("Data is too short")
+        args.append(type_(data[start:end]))
+        return end
+
+    return step
+
+
+def _bytes_step(type_):
+    def step(data, offset, args):
+        args.append(type_(data[offset:]))
+        return len(data)
+
+    return step
+
+
+def _optional_step(type_):
+    inner = _fixed_step((type_.__mro__[1], ))
+
+    def step(data, offset, args):
+        try:
+            offset = inner(data, offset, args)
+        except ValueError:
+            args.append(None)
+            return len(data)
+        args[-1] = type_(args[-1])
+        return offset
+
+    return step
+
+
+def _generic_step(type_):
+    def step(data, offset, args):
+        value, rest = type_.deserialize(data[offset:])
+        args.append(value)
+        return len(data) - len(rest)
+
+    return step
+
+
+def _check_address(sizes, data, offset):
+    # zigpy_deconz decodes whatever is left of a short address, like 0x00e8
+    # from a single byte, instead of raising
+    size = sizes.get(data[offset]) if offset < len(data) else None
+    if size is not None and len(data) < offset + 1 + size:
+        raise ValueError("Data is too short")
+
+
+def _address_step(type_):
+    fallback = _generic_step(type_)
+
+    def step(data, offset, args):
+        _check_address(ADDRESS_SIZES, data, offset)
+        if offset >= len(data) or data[offset] not in SHORT_ADDRESS_MODES:
+            return fallback(data, offset, args)
+        r = type_()
+        r.address_mode = ADDRESS_MODES[data[offset]]
+        r.address = dt.NWK(data[offset + 1] | data[offset + 2] << 8)
+        args.append(r)
+        return offset + 3
+
+    return step
+
+
+def _address_endpoint_step(type_):
+    fallback = _generic_step(type_)
+
+    def step(data, offset, args):
+        _check_address(ADDRESS_ENDPOINT_SIZES, data, offset)
+        if offset >= len(data) or data[offset] not in SHORT_ADDRESS_MODES:
+            return fallback(data, offset, args)
+        r = type_()
+        r.address_mode = ADDRESS_MODES[data[offset]]
+        address = data[offset + 1] | data[offset + 2] << 8
+        if r.address_mode == dt.ADDRESS_MODE.GROUP:
+            r.address = dt.GroupId(address)
+            r.endpoint = None
+            offset += 3
+        else:
+            r.address = dt.NWK(address)
+            r.endpoint = dt.uint8_t(data[offset + 3])
+            offset += 4
+        args.append(r)
+        return offset
+
+    return step
+
+
+def _variable_step(type_):
+    if getattr(type_, 'optional', False):
+        return _optional_step(type_)
+    if issubclass(type_, (pt.LVBytes, )):
+        return _lvbytes_step(type_)
+    if issubclass(type_, (pt.Bytes, dt.Bytes)):
+        return _bytes_step(type_)
+    if issubclass(type_, dt.DeconzAddressEndpoint):
+        return _address_endpoint_step(type_)
+    if issubclass(type_, dt.DeconzAddress):
+        return _address_step(type_)
+    return _generic_step(type_)
+
+
+def fixed_size(type_):
+    """Size in bytes of a fixed size field type, None for variable ones."""
+    return type_._size if _is_fixed(type_) else None
+
+
+def field_step(type_):
+    """Decoding step for a single field of type_."""
+    if _is_fixed(type_):
+        return _fixed_step((type_, ))
+    return _variable_step(type_)
+
+
+def compile_schema(schema):
+    """Build the list of decoding steps for a command SCHEMA.
+
+    Runs of fixed size integer fields are merged into a single
+    struct.Struct, everything else gets a small offset based handler.
+    """
+    steps = []
+    run = []
+    for type_ in schema:
+        if _is_fixed(type_):
+            run.append(type_)
+            continue
+        if run:
+            steps.append(_fixed_step(run))
+            run = []
+        steps.append(_variable_step(type_))
+    if run:
+        steps.append(_fixed_step(run))
+    return tuple(steps)
+
+
+def _tail(data, offset):
+    # no empty slice for the (usually empty) remainder
+    if offset >= len(data):
+        return b''
+    return data[offset:]
+
+
+def compile_command(cls):
+    steps = compile_schema(cls.SCHEMA)
+
+    def deserialize(data, offset=0):
+        args = []
+        for step in steps:
+            offset = step(data, offset, args)
+        return cls(*args), _tail(data, offset)
+
+    return deserialize
+
+
+def deserialize(cls, data, offset=0):
+    """Drop-in replacement for cls.deserialize(data[offset:]).
+
+    data isn't sliced, integers are read in place and only the values which
+    are kept (octet strings, parameter values) are copied out of it.
+    """
+    try:
+        decoder = DECODERS[cls]
+    except KeyError:
+        decoder = DECODERS[cls] = compile_command(cls)
+    return decoder(data, offset)
+
+
+_header_step = _fixed_step([field[1] for field in pt.Header._fields])
+HEADER_SIZE = sum(field[1]._size for field in pt.Header._fields)
+
+
+class FrameHeader(pt.Header):
+    """pt.Header which points into its frame instead of copying the payload.
+
+    The payload is only sliced out of the frame when it is asked for, the
+    command is decoded from the frame itself, starting at HEADER_SIZE.
+    """
+
+    @property
+    def payload(self):
+        return self.frame[HEADER_SIZE:HEADER_SIZE + self.length]
+
+    def decode_payload(self, deserialize, cls):
+        if len(self.frame) <= HEADER_SIZE or not self.length:
+            return None
+        if len(self.frame) > HEADER_SIZE + self.length:
+            # trailing bytes after the payload, hand over a bounded copy
+            return deserialize(cls, self.payload)[0]
+        return deserialize(cls, self.frame, HEADER_SIZE)[0]
+
+
+def deserialize_header(data):
+    """Zero-copy replacement for pt.Header.deserialize(data).
+
+    The header fields are read in place and the returned FrameHeader keeps
+    data itself, the command is decoded from an offset into it, so nothing
+    but the kept values is copied from the frame up to the last command
+    field. data isn't wrapped into a memoryview, a memoryview object is
+    larger than most frames; frames which already are memoryviews (of a
+    capture block or an mmap) are decoded in place just the same.
+    """
+    values = []
+    _header_step(data, 0, values)
+    r = FrameHeader()
+    r.command, r.seq, r.status, r.length = values
+    if len(data) < r.length:
+        raise ValueError("Data is too short for frame")
+    r.frame = data
+    return r, _tail(data, HEADER_SIZE + r.length)
@@ -0,0 +1,167 @@
+import calendar
+import collections
+import functools
+import time
+
+import zigpy_deconz_parser.compact as compact
+from zigpy_deconz_parser.commands import requests, responses
+from zigpy_deconz_parser.output import TextWriter
+from zigpy_deconz_parser.renderers import Renderer
+
+TIMEOUT = 60
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# how a transaction left the in-flight table
+CONFIRMED = 'confirmed'
+TIMED_OUT = 'timeout'
+SUPERSEDED = 'superseded'
+UNMATCHED = 'unmatched'
+
+
+@functools.lru_cache(maxsize=4096)
+def epoch(ts):
+    """Seconds since the epoch of a 'YYYY-MM-DD HH:MM:SS' log timestamp."""
+    return calendar.timegm(time.strptime(ts, TIMESTAMP_FORMAT))
+
+
+@functools.lru_cache(maxsize=4096)
+def timestamp(seconds):
+    """Inverse of epoch()."""
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds))
+
+
+class Transaction:
+    __slots__ = ('request_id', 'sent', 'dst_addr', 'profile', 'cluster_id',
+                 'acked', 'confirmed', 'confirm_status', 'outcome')
+
+    def __init__(self, request_id, sent=None, dst_addr=None, profile=None,
+                 cluster_id=None, acked=None, confirmed=None,
+                 confirm_status=None, outcome=None):
+        self.request_id = request_id
+        self.sent = sent
+        self.dst_addr = dst_addr
+        self.profile = profile
+        self.cluster_id = cluster_id
+        self.acked = acked
+        self.confirmed = confirmed
+        self.confirm_status = confirm_status
+        self.outcome = outcome
+
+    @property
+    def latency(self):
+        """Request to confirm latency in seconds, None if not confirmed."""
+        if self.sent is None or self.confirmed is None:
+            return None
+        return epoch(self.confirmed) - epoch(self.sent)
+
+    @property
+    def ack_latency(self):
+        if self.sent is None or self.acked is None:
+            return None
+        return epoch(self.acked) - epoch(self.sent)
+
+
+class Correlator:
+    """Join APS data requests with their ack and confirm by request_id.
+
+    Request ids are a single byte and wrap around at 256, so the in-flight
+    table never holds more than 256 entries: a new request reusing an id
+    still in flight supersedes the old one. Entries which are older than
+    timeout seconds are evicted as timed out.
+    """
+
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self._in_flight = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def feed(self, ts, is_response, hdr, cmd):
+        """Process one decoded frame, returns the finished transactions."""
+        done = self._expire(ts)
+        kind = compact.original(type(cmd))
+        if issubclass(kind, requests.ApsDataRequest):
+            old = self._in_flight.pop(cmd.request_id, None)
+            if old is not None:
+                old.outcome = SUPERSEDED
+                done.append(old)
+            self._in_flight[cmd.request_id] = Transaction(
+                cmd.request_id, ts, cmd.dst_addr, cmd.profile, cmd.cluster_id)
+        elif issubclass(kind, responses.ApsDataRequest):
+            tsn = self._in_flight.get(cmd.request_id)
+            if tsn is not None and tsn.acked is None:
+                tsn.acked = ts
+        elif issubclass(kind, responses.ApsDataConfirm):
+            tsn = self._in_flight.pop(cmd.request_id, None)
+            if tsn is None:
+                tsn = Transaction(cmd.request_id, dst_addr=cmd.dst_addr,
+                                  outcome=UNMATCHED)
+            else:
+                tsn.outcome = CONFIRMED
+            tsn.confirmed = ts
+            tsn.confirm_status = cmd.confirm_status
+            done.append(tsn)
+        return done
+
+    def _expire(self, ts):
+        done = []
+        if not self._in_flight:
+            return done
+        deadline = epoch(ts) - self.timeout
+        while self._in_flight:
+            tsn = next(iter(self._in_flight.values()))
+            if epoch(tsn.sent) >= deadline:
+                break
+            self._in_flight.popitem(last=False)
+            tsn.outcome = TIMED_OUT
+            done.append(tsn)
+        return done
+
+    def finish(self):
+        """Flush everything still in flight as timed out."""
+        done = list(self._in_flight.values())
+        self._in_flight.clear()
+        for tsn in done:
+            tsn.outcome = TIMED_OUT
+        return done
+
+
+class CorrelationRenderer(Renderer):
+    """Print one line per finished APS transaction instead of the frames."""
+
+    options = ('timeout', )
+
+    def __init__(self, out=None, timeout=TIMEOUT):
+        self.correlator = Correlator(timeout)
+        self._out = TextWriter(out)
+
+    def frame(self, ts, is_response, hdr, cmd):
+        for tsn in self.correlator.feed(ts, is_response, hdr, cmd):
+            self.print(tsn)
+
+    def close(self):
+        for tsn in self.correlator.finish():
+            self.print(tsn)
+        self._out.close()
+
+    def flush(self):
+        self._out.flush()
+
+    def print(self, tsn):
+        line = "Request id: [0x{:02x}] {:<10}".format(
+            tsn.request_id, tsn.outcome)
+        line += " sent: {}".format(tsn.sent or '-')
+        for name, latency in (('ack', tsn.ack_latency),
+                              ('confirm', tsn.latency)):
+            if latency is not None:
+                line += " {}: +{}s".format(name, latency)
+        if tsn.confirm_status is not None:
+            line += " {}".format(tsn.confirm_status)
+        if tsn.dst_addr is not None:
+            line += " {}".format(tsn.dst_addr)
+        if tsn.cluster_id is not None:
+            line += " profile: 0x{:04x} cluster: 0x{:04x}".format(
+                tsn.profile, tsn.cluster_id)
+        self._out.write(line + '\n')
+        self._out.commit()
@@ -0,0 +1,361 @@
+import operator
+import re
+
+import zigpy_deconz.types as dt
+
+import zigpy_deconz_parser.compiled as compiled
+import zigpy_deconz_parser.lazy as lazy
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+
+TOKEN = re.compile(r"\s*(\(|\)|==|!=|<=|>=|=|<|>|[^\s()=!<>]+)")
+
+OPERATORS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# (command id, is_response) of every frame there can be
+KINDS = frozenset((command, is_response) for command in range(256)
+                  for is_response in (False, True))
+
+
+class Frame:
+    """What a filter sees of one frame.
+
+    The command is only built on first use, as a lazy command which decodes
+    just the fields the filter asks for.
+    """
+
+    __slots__ = ('is_response', 'hdr', 'cls', '_cmd')
+
+    def __init__(self, is_response, hdr, cls):
+        self.is_response = is_response
+        self.hdr = hdr
+        self.cls = cls
+        self._cmd = None
+
+    def field(self, name):
+        if self.cls is None:
+            return None
+        if self._cmd is None:
+            self._cmd = self.hdr.decode_payload(lazy.deserialize, self.cls)
+        return getattr(self._cmd, name, None)
+
+
+def _header(name):
+    return lambda frame: (getattr(frame.hdr, name), )
+
+
+def _fields(*names):
+    def values(frame):
+        return tuple(value for value in map(frame.field, names)
+                     if value is not None)
+    return values, names
+
+
+def _addresses(*names, modes=compiled.NWK_MODES):
+    def values(frame):
+        found = []
+        for addr in map(frame.field, names):
+            if addr is None:
+                continue
+            if not hasattr(addr, 'address_mode'):
+                found.append(addr)
+            elif addr.address_mode in modes:
+                found.append(addr.address)
+        return tuple(found)
+    return values, names
+
+
+IEEE_NAMES = ('src_addr', 'dst_addr', 'some_address')
+
+
+def _ieee(frame):
+    found = []
+    for addr in map(frame.field, IEEE_NAMES):
+        if addr is None:
+            continue
+        if addr.address_mode == dt.ADDRESS_MODE.IEEE:
+            found.append(addr.address)
+        elif addr.address_mode == dt.ADDRESS_MODE.NWK_AND_IEEE:
+            found.append(addr.ieee)
+    return tuple(found)
+
+
+def _dst_ep(frame):
+    ep = frame.field('dst_ep')
+    if ep is not None:
+        return (ep, )
+    addr = frame.field('dst_addr')
+    endpoint = getattr(addr, 'endpoint', None)
+    return () if endpoint is None else (endpoint, )
+
+
+# field name -> (values of a frame, the command attributes they come from,
+# None for header fields)
+FIELDS = {
+    'direction': (lambda frame: ('rx' if frame.is_response else 'tx', ),
+                  None),
+    'command': (_header('command'), None),
+    'seq': (_header('seq'), None),
+    'status': (lambda frame: (frame.hdr.status, ) if frame.is_response
+               else (), None),
+    'length': (_header('length'), None),
+    'nwk': _addresses('src_addr', 'dst_addr', 'some_address', 'SrcNWK'),
+    'src': _addresses('src_addr', 'some_address', 'SrcNWK'),
+    'dst': _addresses('dst_addr'),
+    'group': _addresses('dst_addr', modes=(dt.ADDRESS_MODE.GROUP, )),
+    'ieee': (_ieee, IEEE_NAMES),
+    'profile': _fields('profile'),
+    'cluster': _fields('cluster_id'),
+    'request_id': _fields('request_id'),
+    'confirm': _fields('confirm_status'),
+    'src_ep': _fields('src_ep'),
+    'dst_ep': (_dst_ep, ('dst_ep', 'dst_addr')),
+    'lqi': _fields('lqi'),
+    'rssi': _fields('rssi'),
+    'radius': _fields('radius'),
+    'tx_options': _fields('tx_options'),
+    'device_state': _fields('device_state'),
+}
+ALIASES = {
+    'cmd': 'command',
+    'cluster_id': 'cluster',
+    'id': 'request_id',
+    'confirm_status': 'confirm',
+    'tx_status': 'confirm',
+    'ep': 'dst_ep',
+}
+
+
+def _number(value):
+    if isinstance(value, int):
+        return int(value)
+    value = getattr(value, 'value', None)
+    return value if isinstance(value, int) else None
+
+
+def _text(value):
+    name = getattr(value, 'name', None)
+    if isinstance(name, str):
+        return name.lower()
+    return str(value).lower()
+
+
+def _literal(text):
+    try:
+        return int(text, 0)
+    except ValueError:
+        return text.lower()
+
+
+def _carriers(names):
+    """The kinds of frames whose command has one of the attributes."""
+    return frozenset(
+        (int(command), is_response)
+        for is_response, table in ((False, REQUESTS), (True, RESPONSES))
+        for command, cls in table.items()
+        if any(name in names for name in cls.FIELDS))
+
+
+def _kinds(name, names, compare, negate, literal):
+    """The kinds of frames a term can match, a subset of KINDS."""
+    if names is not None:
+        return _carriers(names)
+    if name == 'status':
+        return frozenset(kind for kind in KINDS if kind[1])
+    if name == 'direction':
+        return frozenset(kind for kind in KINDS if negate !=
+                         compare('rx' if kind[1] else 'tx', literal))
+    if name == 'command':
+        if not isinstance(literal, int):
+            member = pt.DeConzCommand.__members__.get(literal.upper())
+            if member is None:
+                return KINDS
+            literal = member.value
+        return frozenset(kind for kind in KINDS
+                         if negate != compare(kind[0], literal))
+    return KINDS
+
+
+def _term(name, op, literal):
+    field = ALIASES.get(name, name)
+    try:
+        values, names = FIELDS[field]
+    except KeyError:
+        raise ValueError("Unknown filter field '{}', one of: {}".format(
+            name, ', '.join(sorted(FIELDS))))
+    try:
+        compare = OPERATORS[op]
+    except KeyError:
+        raise ValueError("Unknown filter operator '{}'".format(op))
+    if isinstance(literal, int):
+        convert = _number
+    elif compare in (operator.eq, operator.ne):
+        convert = _text
+    else:
+        raise ValueError("'{} {} {}' needs a number".format(name, op,
+                                                            literal))
+    negate = compare is operator.ne
+    if negate:
+        compare = operator.eq
+    kinds = _kinds(field, names, compare, negate, literal)
+
+    def test(frame):
+        found = [convert(value) for value in values(frame)]
+        found = [value for value in found if value is not None]
+        if not found:
+            # frames without the field never match, not even with !=
+            return False
+        matched = any(compare(value, literal) for value in found)
+        return not matched if negate else matched
+
+    return test, names is not None, kinds, (field, )
+
+
+def _all(tests):
+    def test(frame):
+        for item in tests:
+            if not item(frame):
+                return False
+        return True
+    return test
+
+
+def _any(tests):
+    def test(frame):
+        for item in tests:
+            if item(frame):
+                return True
+        return False
+    return test
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            result = TOKEN.match(text, pos)
+            if result is None:
+                raise ValueError("Can't parse filter at '{}'".format(
+                    text[pos:]))
+            self.tokens.append(result.group(1))
+            pos = result.end()
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def next(self, what):
+        token = self.peek()
+        if token is None:
+            raise ValueError("Filter ends where {} was expected".format(what))
+        self.pos += 1
+        return token
+
+    def expression(self):
+        """expression := conjunction ('or' conjunction)*"""
+        terms = [self.conjunction()]
+        while self.peek() is not None and self.peek().lower() == 'or':
+            self.pos += 1
+            terms.append(self.conjunction())
+        if len(terms) == 1:
+            return terms[0]
+        return _any([term[0] for term in terms]), \
+            any(term[1] for term in terms), \
+            frozenset().union(*(term[2] for term in terms)), \
+            sum((term[3] for term in terms), ())
+
+    def conjunction(self):
+        """conjunction := unary (['and'] unary)*, header tests first
+
+        Raises ValueError if no kind of frame has all the fields, like the
+        cluster and the confirm status which are in different frames.
+        """
+        terms = [self.unary()]
+        kinds = terms[0][2]
+        while self.peek() is not None and \
+                self.peek().lower() not in ('or', ')'):
+            if self.peek().lower() == 'and':
+                self.pos += 1
+            terms.append(self.unary())
+            if kinds and not kinds & terms[-1][2]:
+                raise ValueError("No frame has {} and {}".format(
+                    ', '.join(sum((term[3] for term in terms[:-1]), ())),
+                    ', '.join(terms[-1][3])))
+            kinds &= terms[-1][2]
+        if len(terms) == 1:
+            return terms[0]
+        terms.sort(key=lambda term: term[1])
+        return _all([term[0] for term in terms]), \
+            any(term[1] for term in terms), kinds, \
+            sum((term[3] for term in terms), ())
+
+    def unary(self):
+        """unary := 'not' unary | '(' expression ')' | field [op] value
+
+        Terms are (test, needs the payload, kinds of frames it can match,
+        field names).
+        """
+        token = self.next('a field')
+        if token.lower() == 'not':
+            test, payload, kinds, names = self.unary()
+            return (lambda frame: not test(frame)), payload, KINDS, names
+        if token == '(':
+            term = self.expression()
+            if self.next("')'") != ')':
+                raise ValueError("Expected ')' in filter")
+            return term
+        if token == ')' or token in OPERATORS:
+            raise ValueError("Unexpected '{}' in filter".format(token))
+        op = '=='
+        if self.peek() in OPERATORS:
+            op = self.next('an operator')
+        value = self.next('a value for {}'.format(token))
+        if value in ('(', ')') or value in OPERATORS:
+            raise ValueError("Unexpected '{}' in filter".format(value))
+        return _term(token.lower(), op, _literal(value))
+
+
+class Filter:
+    """A compiled filter expression.
+
+    Terms are "field [op] value" with op one of = == != < <= > >= (default
+    ==) and are joined with 'and' (also implicit), 'or', 'not' and
+    parentheses, e.g. "nwk 0x1234 cluster 0x0006" or
+    "dst 0x1234 confirm != SUCCESS". Values are numbers or names of enum
+    members, compared case insensitively. Terms on the header are tested
+    before terms needing the payload, which is decoded lazily and only as
+    far as the filter needs. A term on a field the frame doesn't have is
+    false, so terms joined with 'and' which no frame has all the fields of
+    are rejected: a confirm has no cluster, that is only in its request
+    (see -f correlate).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        parser = _Parser(text)
+        if parser.peek() is None:
+            raise ValueError("Empty filter")
+        self._test, self.payload, _, _ = parser.expression()
+        if parser.peek() is not None:
+            raise ValueError("Unexpected '{}' in filter".format(
+                parser.peek()))
+
+    def __reduce__(self):
+        # the compiled tests are closures, recompile in worker processes
+        return Filter, (self.text, )
+
+    def __call__(self, is_response, hdr, cls):
+        """True if the frame with this header and command class matches."""
+        return self._test(Frame(is_response, hdr, cls))
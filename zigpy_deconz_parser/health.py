@@ -0,0 +1,170 @@
+import array
+import math
+
+import zigpy_deconz_parser.compact as compact
+import zigpy_deconz_parser.compiled as compiled
+from zigpy_deconz_parser.commands import requests, responses
+from zigpy_deconz_parser.correlate import epoch, timestamp
+from zigpy_deconz_parser.renderers import ReportRenderer, SNAPSHOT_INTERVAL
+
+# column name, array typecode
+COLUMNS = (
+    ('nwk', 'H'),
+    ('frames', 'L'),
+    ('polls', 'L'),
+    ('sent', 'L'),
+    ('delivered', 'L'),
+    ('failed', 'L'),
+    ('samples', 'L'),
+    ('lqi_sum', 'Q'),
+    ('lqi_squares', 'Q'),
+    ('lqi_min', 'B'),
+    ('lqi_max', 'B'),
+    ('rssi_sum', 'q'),
+    ('rssi_squares', 'Q'),
+    ('rssi_min', 'b'),
+    ('rssi_max', 'b'),
+    ('last_seen', 'q'),
+)
+
+
+def _mean_std(count, total, squares):
+    if not count:
+        return None, None
+    mean = total / count
+    return mean, math.sqrt(max(squares / count - mean * mean, 0))
+
+
+class Health:
+    """Per NWK address link and delivery statistics.
+
+    Frames received from a device (APS data indications and MAC polls)
+    count towards its LQI/RSSI statistics and last seen time, requests sent
+    to it and their confirms towards its delivery failure rate. Every
+    device is one row across a set of typed arrays, so memory only grows
+    with the number of devices, not with the number of frames.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        for name, typecode in COLUMNS:
+            setattr(self, '_' + name, array.array(typecode))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _row(self, nwk):
+        try:
+            return self._rows[nwk]
+        except KeyError:
+            pass
+        row = self._rows[nwk] = len(self._rows)
+        for name, typecode in COLUMNS:
+            getattr(self, '_' + name).append(0)
+        self._nwk[row] = nwk
+        self._lqi_min[row] = 255
+        self._rssi_min[row] = 127
+        self._rssi_max[row] = -128
+        return row
+
+    def _received(self, nwk, ts, lqi, rssi):
+        row = self._row(nwk)
+        self._samples[row] += 1
+        self._lqi_sum[row] += lqi
+        self._lqi_squares[row] += lqi * lqi
+        self._lqi_min[row] = min(self._lqi_min[row], lqi)
+        self._lqi_max[row] = max(self._lqi_max[row], lqi)
+        self._rssi_sum[row] += rssi
+        self._rssi_squares[row] += rssi * rssi
+        self._rssi_min[row] = min(self._rssi_min[row], rssi)
+        self._rssi_max[row] = max(self._rssi_max[row], rssi)
+        self._last_seen[row] = max(self._last_seen[row], epoch(ts))
+        return row
+
+    def feed(self, ts, is_response, hdr, cmd):
+        kind = compact.original(type(cmd))
+        if issubclass(kind, responses.ApsDataIndication):
+            nwk = compiled.nwk(cmd.src_addr)
+            if nwk is not None:
+                row = self._received(nwk, ts, int(cmd.lqi), int(cmd.rssi))
+                self._frames[row] += 1
+        elif issubclass(kind, responses.MacPoll):
+            nwk = compiled.nwk(cmd.some_address)
+            if nwk is not None:
+                row = self._received(nwk, ts, int(cmd.lqi), int(cmd.rssi))
+                self._polls[row] += 1
+        elif issubclass(kind, requests.ApsDataRequest):
+            nwk = compiled.nwk(cmd.dst_addr)
+            if nwk is not None:
+                self._sent[self._row(nwk)] += 1
+        elif issubclass(kind, responses.ApsDataConfirm):
+            nwk = compiled.nwk(cmd.dst_addr)
+            if nwk is not None:
+                row = self._row(nwk)
+                if cmd.confirm_status == 0:
+                    self._delivered[row] += 1
+                else:
+                    self._failed[row] += 1
+
+    def snapshot(self):
+        """One dict per device, sorted by NWK address.
+
+        The rows are independent of the aggregator, which can keep going.
+        """
+        rows = []
+        for nwk, row in sorted(self._rows.items()):
+            confirmed = self._delivered[row] + self._failed[row]
+            samples = self._samples[row]
+            lqi, lqi_std = _mean_std(samples, self._lqi_sum[row],
+                                     self._lqi_squares[row])
+            rssi, rssi_std = _mean_std(samples, self._rssi_sum[row],
+                                       self._rssi_squares[row])
+            rows.append({
+                'nwk': nwk,
+                'frames': self._frames[row],
+                'polls': self._polls[row],
+                'sent': self._sent[row],
+                'delivered': self._delivered[row],
+                'failed': self._failed[row],
+                'failure_rate': self._failed[row] / confirmed
+                if confirmed else None,
+                'lqi_mean': lqi,
+                'lqi_std': lqi_std,
+                'lqi_min': self._lqi_min[row] if samples else None,
+                'lqi_max': self._lqi_max[row] if samples else None,
+                'rssi_mean': rssi,
+                'rssi_std': rssi_std,
+                'rssi_min': self._rssi_min[row] if samples else None,
+                'rssi_max': self._rssi_max[row] if samples else None,
+                'last_seen': timestamp(self._last_seen[row])
+                if samples else None,
+            })
+        return rows
+
+    def report(self):
+        yield "{:<6} {:>9} {:>8} {:>8} {:>8} {:>7} {:>15} {:>15}  {}".format(
+            'NWK', 'frames', 'polls', 'sent', 'failed', 'fail%',
+            'LQI mean/min', 'RSSI mean/min', 'last seen')
+        for row in self.snapshot():
+            rate = row['failure_rate']
+            lqi = rssi = '-'
+            if row['lqi_mean'] is not None:
+                lqi = "{:.1f}/{}".format(row['lqi_mean'], row['lqi_min'])
+                rssi = "{:.1f}/{}".format(row['rssi_mean'], row['rssi_min'])
+            yield "0x{:04x} {:>9} {:>8} {:>8} {:>8} {:>7} {:>15} {:>15}  " \
+                "{}".format(row['nwk'], row['frames'], row['polls'],
+                            row['sent'], row['failed'],
+                            '-' if rate is None else
+                            "{:.1f}".format(rate * 100),
+                            lqi, rssi, row['last_seen'] or '-')
+
+
+class HealthRenderer(ReportRenderer):
+    """Print the per device table at the end.
+
+    With --follow it is printed every interval seconds too.
+    """
+
+    def __init__(self, out=None, interval=SNAPSHOT_INTERVAL):
+        self.health = Health()
+        super().__init__(self.health, out, interval)
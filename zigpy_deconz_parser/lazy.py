@@ -0,0 +1,71 @@
+import zigpy_deconz_parser.compiled as compiled
+
+LAZY_CLASSES = {}
+
+
+def lazy_class(cls):
+    """Build a subclass of cls which decodes its fields on first access.
+
+    Instances keep the buffer and the offsets of the fields found so
+    far. Offsets of fixed size fields are computed without decoding, a
+    variable size field is decoded (and cached) when a later field needs
+    its end offset. Attribute names, values and isinstance() checks are the
+    same as for the eagerly decoded command.
+    """
+    names = cls.FIELDS
+    steps = tuple(compiled.field_step(type_) for type_ in cls.SCHEMA)
+    sizes = tuple(compiled.fixed_size(type_) for type_ in cls.SCHEMA)
+
+    def __init__(self, data, offset=0):
+        self._data = data
+        self._offsets = [offset]
+        self._values = {}
+
+    def _decode(self, index):
+        try:
+            return self._values[index]
+        except KeyError:
+            pass
+        args = []
+        end = steps[index](self._data, self._offsets[index], args)
+        if len(self._offsets) == index + 1:
+            self._offsets.append(end)
+        self._values[index] = args[0]
+        return args[0]
+
+    def _field(self, index):
+        try:
+            return self._values[index]
+        except KeyError:
+            pass
+        offsets = self._offsets
+        while len(offsets) <= index:
+            prev = len(offsets) - 1
+            if sizes[prev] is None:
+                _decode(self, prev)
+            else:
+                offsets.append(offsets[prev] + sizes[prev])
+        return _decode(self, index)
+
+    namespace = {
+        '__init__': __init__,
+        '__doc__': cls.__doc__,
+    }
+    for index, name in enumerate(names):
+        namespace[name] = property(
+            lambda self, index=index: _field(self, index))
+    return type('Lazy' + cls.__name__, (cls, ), namespace)
+
+
+def deserialize(cls, data, offset=0):
+    """Lazy counterpart of cls.deserialize(data[offset:]).
+
+    Nothing is decoded up front, so errors in the payload only show up when
+    the affected field is accessed and the returned remainder is always
+    empty.
+    """
+    try:
+        lazy = LAZY_CLASSES[cls]
+    except KeyError:
+        lazy = LAZY_CLASSES[cls] = lazy_class(cls)
+    return lazy(data, offset), b''
@@ -1,15 +1,49 @@
+import contextlib
 import getopt
+import io
+import locale
+import mmap
 import os.path
 import sys
 
+import zigpy_deconz_parser.output as output
 import zigpy_deconz_parser.parser as parser
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.renderers import RENDERERS, SNAPSHOT_INTERVAL
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MMAP_WINDOW = 16 * 1024 * 1024
+FOLLOW_INTERVAL = 0.05
+FOLLOW_READ_SIZE = 64 * 1024
 
 
 def main():
     argv = sys.argv[1:]
     infile = None
+    engine = parser.DEFAULT_ENGINE
+    jobs = 1
+    uart_only = False
+    prefilter_stats = False
+    profiled = False
+    fmt = 'text'
+    follow_file = False
+    serial = []
+    baudrate = None
+    convert = None
+    npz = None
+    query = {}
+    where = None
+    outfile = None
+    options = {}
     try:
-        opts, args = getopt.getopt(argv, "hi:", ["in-file=",])
+        opts, args = getopt.getopt(argv, "hi:e:j:mf:Fs:b:c:o:",
+                                   ["in-file=", "engine=", "jobs=", "mmap",
+                                    "prefilter-stats", "format=",
+                                    "batch-size=", "timeout=", "stats",
+                                    "follow", "serial=", "baudrate=",
+                                    "convert=", "since=", "until=",
+                                    "command=", "filter=", "output=",
+                                    "zcl", "profile", "npz="])
     except getopt.GetoptError:
         help()
         sys.exit(2)
@@ -20,24 +54,533 @@ def main():
             sys.exit(0)
         elif opt in ('-i', '--in-file'):
             infile = args
+        elif opt in ('-e', '--engine'):
+            if args not in parser.ENGINES:
+                help()
+                sys.exit(2)
+            engine = args
+        elif opt in ('-j', '--jobs'):
+            try:
+                jobs = int(args)
+            except ValueError:
+                jobs = 0
+            if jobs < 1:
+                help()
+                sys.exit(2)
+        elif opt in ('-m', '--mmap'):
+            uart_only = True
+        elif opt == '--prefilter-stats':
+            prefilter_stats = True
+        elif opt == '--profile':
+            profiled = True
+        elif opt in ('-f', '--format'):
+            if args not in RENDERERS:
+                help()
+                sys.exit(2)
+            fmt = args
+        elif opt == '--zcl':
+            options['zcl'] = True
+        elif opt == '--stats':
+            fmt = 'stats'
+        elif opt in ('-F', '--follow'):
+            follow_file = True
+        elif opt in ('-s', '--serial'):
+            serial.append(args)
+        elif opt in ('-b', '--baudrate'):
+            import termios
+
+            if not hasattr(termios, 'B' + args):
+                help()
+                sys.exit(2)
+            baudrate = int(args)
+        elif opt in ('-c', '--convert'):
+            convert = args
+        elif opt == '--npz':
+            npz = args
+        elif opt in ('--since', '--until'):
+            from zigpy_deconz_parser.correlate import epoch
+
+            try:
+                query[opt[2:]] = epoch(args)
+            except ValueError:
+                help()
+                sys.exit(2)
+        elif opt == '--command':
+            try:
+                command = pt.DeConzCommand[args.upper()]
+            except KeyError:
+                try:
+                    command = int(args, 0)
+                except ValueError:
+                    help()
+                    sys.exit(2)
+            query.setdefault('commands', set()).add(command)
+        elif opt in ('-o', '--output'):
+            outfile = args
+        elif opt == '--filter':
+            import zigpy_deconz_parser.filters as filters
+
+            try:
+                where = filters.Filter(args)
+            except ValueError as exc:
+                print(exc, file=sys.stderr)
+                help()
+                sys.exit(2)
+        elif opt in ('--batch-size', '--timeout'):
+            name = opt[2:].replace('-', '_')
+            try:
+                options[name] = int(args)
+            except ValueError:
+                options[name] = 0
+            if options[name] < 1:
+                help()
+                sys.exit(2)
+
+    if not set(options).issubset(RENDERERS[fmt].options):
+        help()
+        sys.exit(2)
+
+    if follow_file and (infile in (None, '-') or uart_only):
+        help()
+        sys.exit(2)
+    if serial and (infile is not None or follow_file or uart_only):
+        help()
+        sys.exit(2)
+
+    # a glob of rotated logs or a compressed log is streamed
+    streamed = None
+    # a single input file is opened once and its kind told from its peeked
+    # first bytes, so a pipe or FIFO loses nothing to the check
+    source = None
+    marker = parser.UART_MARKER if uart_only else None
+    if infile not in (None, '-') and not follow_file:
+        import zigpy_deconz_parser.sources as sources
+
+        paths = sources.expand(infile)
+        if len(paths) == 1:
+            infile = paths[0]
+            source = open(infile, mode='rb')
+        else:
+            streamed = sources.lines(paths, marker)
+    is_capture = False
+    if source is not None:
+        import zigpy_deconz_parser.capture as capture
+
+        is_capture = capture.is_capture(source)
+        if not is_capture:
+            file = sources.decompressed(source)
+            if file is not source:
+                streamed = sources.lines([file], marker)
+    writes_file = convert is not None or npz is not None
+    if query and not is_capture or convert and npz or \
+            writes_file and (where is not None or outfile is not None) or \
+            npz and (jobs > 1 or engine != parser.DEFAULT_ENGINE or
+                     fmt != 'text' or options):
+        help()
+        sys.exit(2)
+
+    # most modules take longer to import than a small log takes to parse,
+    # they are only imported by the modes and options which use them
+    sink = output.open_sink(outfile)
+    if profiled:
+        import zigpy_deconz_parser.profiler as profiler
 
-    if infile in (None, '-'):
-        proccess(sys.stdin)
+        profiler.enable()
+    if convert is not None or npz is not None:
+        if convert is not None:
+            import zigpy_deconz_parser.capture as capture
+
+            write, path = capture.convert, convert
+        else:
+            # numpy is optional and only needed here
+            import zigpy_deconz_parser.batch as batch
+
+            write, path = batch.convert, npz
+        if streamed is not None:
+            frames = write(streamed, path)
+        elif infile in (None, '-'):
+            frames = write(sys.stdin, path)
+        elif uart_only:
+            frames = write(uart_lines(infile), path)
+        else:
+            with text(source) as file:
+                frames = write(file, path)
+        print("{} frames written to {}".format(frames, path),
+              file=sys.stderr)
+    elif serial:
+        import asyncio
+
+        renderer = make_renderer(fmt, sink, options, profiled)
+        try:
+            asyncio.run(proccess_serial(serial, engine, renderer, baudrate,
+                                        where))
+        except KeyboardInterrupt:
+            pass
+        renderer.close()
+    elif follow_file:
+        import asyncio
+
+        renderer = make_renderer(fmt, sink, options, profiled)
+        try:
+            asyncio.run(proccess_follow(infile, engine, renderer, where))
+        except KeyboardInterrupt:
+            pass
+        renderer.close()
+    elif is_capture:
+        renderer = make_renderer(fmt, sink, options, profiled)
+        proccess_capture(infile, engine, renderer, where=where, file=source,
+                         **query)
+        renderer.close()
+    elif streamed is not None:
+        renderer = make_renderer(fmt, sink, options, profiled)
+        proccess(streamed, engine, renderer, where)
+        renderer.close()
+    elif infile not in (None, '-') and jobs > 1 and RENDERERS[fmt].mergeable:
+        proccess_parallel(infile, jobs, engine, uart_only=uart_only, fmt=fmt,
+                          where=where, out=sink, options=options,
+                          profiled=profiled)
     else:
-        with open(infile, mode='r') as file:
-            proccess(file)
+        renderer = make_renderer(fmt, sink, options, profiled)
+        if infile in (None, '-'):
+            proccess(sys.stdin, engine, renderer, where)
+        elif uart_only:
+            proccess(uart_lines(infile), engine, renderer, where)
+        else:
+            with text(source) as file:
+                proccess(file, engine, renderer, where)
+        renderer.close()
+    if source is not None:
+        source.close()
+    output.close_sink(sink)
 
+    if prefilter_stats:
+        for line in parser.prefilter_report():
+            print(line, file=sys.stderr)
+    if profiled:
+        for line in profiler.report():
+            print(line, file=sys.stderr)
 
-if __name__ == '__main__':
-    main()
 
+def text(file):
+    """A binary input file read as text, like open(path, mode='r')."""
+    return io.TextIOWrapper(file,
+                            encoding=locale.getpreferredencoding(False))
+
+
+def make_renderer(fmt, out, options, profiled=False):
+    """RENDERERS[fmt], with its output timed if profiled."""
+    renderer = RENDERERS[fmt](out, **options)
+    if profiled:
+        import zigpy_deconz_parser.profiler as profiler
+
+        renderer = profiler.Renderer(renderer)
+    return renderer
 
-def proccess(file):
+
+def proccess(file, engine=parser.DEFAULT_ENGINE, renderer=parser.TEXT,
+             where=None):
+    if where is None:
+        for line in file:
+            renderer.line(line)
+            parser.parse(line, engine, renderer)
+        return
+    # only the lines of matching frames are shown
     for line in file:
-        print(line.strip())
-        parser.parse(line)
+        frame = parser.decode(line, engine, where)
+        if frame is not None:
+            renderer.line(line)
+            renderer.frame(*frame)
+
+
+def proccess_capture(infile, engine=parser.DEFAULT_ENGINE,
+                     renderer=parser.TEXT, since=None, until=None,
+                     commands=None, where=None, file=None):
+    """Decode the frames of a capture file, see capture.CaptureReader."""
+    import zigpy_deconz_parser.capture as capture
+
+    reader = capture.CaptureReader(infile, file)
+    if reader.stale:
+        print("{}{} doesn't match the capture, it is scanned completely"
+              .format(infile, capture.INDEX_SUFFIX), file=sys.stderr)
+    for ts, is_response, data in reader.frames(since, until, commands):
+        frame = parser.decode_frame(ts, is_response, data, engine, where)
+        if frame is not None:
+            renderer.line(parser.log_line(ts, is_response, data))
+            renderer.frame(*frame)
+
+
+async def proccess_follow(infile, engine=parser.DEFAULT_ENGINE,
+                          renderer=parser.TEXT, where=None,
+                          interval=FOLLOW_INTERVAL):
+    """Parse the lines appended to infile until cancelled.
+
+    Output is flushed after every batch of lines, so frames show up as soon
+    as they were logged and stateful renderers (correlate, stats, health) are
+    kept up to date.
+    """
+    flush = getattr(renderer, 'flush', None)
+    async for lines in follow(infile, interval):
+        proccess(lines, engine, renderer, where)
+        if flush is not None:
+            flush()
+        sys.stdout.flush()
+
+
+async def proccess_serial(paths, engine=parser.DEFAULT_ENGINE,
+                          renderer=parser.TEXT, baudrate=None, where=None):
+    """Decode raw UART streams, one direction per capture file or port.
+
+    Serial ports are read at baudrate, slip.BAUDRATE by default.
+    """
+    import asyncio
+
+    import zigpy_deconz_parser.slip as slip
+
+    if baudrate is None:
+        baudrate = slip.BAUDRATE
+
+    flush = getattr(renderer, 'flush', None)
+
+    async def read(path):
+        stream = slip.Stream(path)
+        async for frames in slip.read_stream(path, stream, baudrate):
+            for ts, is_response, data in frames:
+                frame = parser.decode_frame(ts, is_response, data, engine,
+                                            where)
+                if frame is not None:
+                    renderer.line(parser.log_line(ts, is_response, data,
+                                                   'serial'))
+                    renderer.frame(*frame)
+            if flush is not None:
+                flush()
+            sys.stdout.flush()
+        decoder = stream.decoder
+        if decoder.bad_checksum or decoder.too_short:
+            print("{}: {} frames, dropped {} with a bad checksum and {} too "
+                  "short".format(path, decoder.frames, decoder.bad_checksum,
+                                 decoder.too_short), file=sys.stderr)
+
+    await asyncio.gather(*(read(path) for path in paths))
+
+
+async def follow(infile, interval=FOLLOW_INTERVAL, from_start=False):
+    """Yield batches of lines appended to infile, like tail -F.
+
+    The file is polled every interval seconds once its end was reached.
+    When infile is replaced (log rotation) the old file is read to its end
+    and the new one is followed from its start, a file which shrinks below
+    the read position (truncation) is read again from its start. A partial
+    last line is held back until its newline arrives.
+    """
+    import asyncio
+
+    encoding = locale.getpreferredencoding(False)
+    file = None
+    pending = b''
+    try:
+        while True:
+            if file is None:
+                try:
+                    file = open(infile, mode='rb')
+                except FileNotFoundError:
+                    # a file created later is read from its start
+                    from_start = True
+                    await asyncio.sleep(interval)
+                    continue
+                inode = os.fstat(file.fileno()).st_ino
+                if not from_start:
+                    file.seek(0, os.SEEK_END)
+                    from_start = True
+
+            chunk = file.read(FOLLOW_READ_SIZE)
+            if chunk:
+                *lines, pending = (pending + chunk).split(b'\n')
+                if lines:
+                    yield [line.decode(encoding, 'replace') + '\n'
+                           for line in lines]
+                continue
+
+            try:
+                stat = os.stat(infile)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and stat.st_ino != inode:
+                file.close()
+                file = None
+                if pending:
+                    yield [pending.decode(encoding, 'replace') + '\n']
+                    pending = b''
+                continue
+            if stat is not None and stat.st_size < file.tell():
+                file.seek(0)
+                pending = b''
+                continue
+            await asyncio.sleep(interval)
+    finally:
+        if file is not None:
+            file.close()
+
+
+def uart_lines(infile, start=0, end=None):
+    """Yield the zigpy_deconz.uart lines of infile[start:end].
+
+    The file is memory mapped and searched for the uart logger marker as
+    raw bytes, only the matching lines are decoded to str. Pages which were
+    already scanned are released every MMAP_WINDOW bytes to keep RSS flat.
+    """
+    marker = parser.UART_MARKER.encode()
+    encoding = locale.getpreferredencoding(False)
+    with open(infile, mode='rb') as file:
+        if end is None:
+            end = os.fstat(file.fileno()).st_size
+        if end <= start:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            advise = getattr(mm, 'madvise', None)
+            if advise:
+                advise(mmap.MADV_SEQUENTIAL)
+            released = start - start % mmap.PAGESIZE
+            pos = start
+            while True:
+                idx = mm.find(marker, pos, end)
+                if idx < 0:
+                    return
+                if advise and idx - released > MMAP_WINDOW:
+                    upto = idx - idx % mmap.PAGESIZE
+                    advise(mmap.MADV_DONTNEED, released, upto - released)
+                    released = upto
+                line_start = mm.rfind(b'\n', start, idx) + 1 or start
+                line_end = mm.find(b'\n', idx, end)
+                if line_end < 0:
+                    line_end = end
+                yield mm[line_start:line_end].decode(encoding)
+                pos = line_end + 1
+
+
+def split(infile, chunk_size=CHUNK_SIZE):
+    """Yield (start, end) byte ranges of infile aligned to line boundaries."""
+    size = os.path.getsize(infile)
+    with open(infile, mode='rb') as file:
+        start = 0
+        while start < size:
+            file.seek(min(start + chunk_size, size))
+            file.readline()
+            end = min(file.tell(), size)
+            yield start, end
+            start = end
+
+
+def proccess_range(args):
+    """Parse one byte range of a file.
+
+    Returns the rendered output (str for text, bytes for the structured
+    formats), the prefilter rejections and the profiler counters of the
+    range.
+    """
+    import zigpy_deconz_parser.profiler as profiler
+
+    infile, start, end, engine, uart_only, fmt, where, options, profiled = \
+        args
+    for stage in parser.REJECTED:
+        parser.REJECTED[stage] = 0
+    profiler.COUNTERS.clear()
+    if profiled:
+        profiler.enable()
+    if uart_only:
+        text = uart_lines(infile, start, end)
+    else:
+        with open(infile, mode='rb') as file:
+            file.seek(start)
+            chunk = file.read(end - start)
+        text = io.StringIO(chunk.decode(locale.getpreferredencoding(False)),
+                           newline=None)
+    if fmt == 'text':
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            proccess(text, engine,
+                     make_renderer(fmt, None, options, profiled), where)
+    else:
+        out = io.BytesIO()
+        renderer = make_renderer(fmt, out, options, profiled)
+        proccess(text, engine, renderer, where)
+        renderer.close()
+    return out.getvalue(), dict(parser.REJECTED), dict(profiler.COUNTERS)
+
+
+def proccess_parallel(infile, jobs, engine=parser.DEFAULT_ENGINE,
+                      chunk_size=CHUNK_SIZE, uart_only=False, fmt='text',
+                      where=None, out=None, options=None, profiled=False):
+    """Parse infile in a pool of jobs processes, keeping the line order.
+
+    out is a binary sink, sys.stdout by default.
+    """
+    import multiprocessing
+
+    import zigpy_deconz_parser.profiler as profiler
+
+    ranges = ((infile, start, end, engine, uart_only, fmt, where,
+               options or {}, profiled)
+              for start, end in split(infile, chunk_size))
+    encoding = locale.getpreferredencoding(False)
+    if out is None:
+        out = sys.stdout.buffer
+        sys.stdout.flush()
+    with multiprocessing.Pool(jobs) as pool:
+        for text, rejected, counters in pool.imap(proccess_range, ranges):
+            if fmt == 'text':
+                text = text.encode(encoding)
+            out.write(text)
+            for stage, count in rejected.items():
+                parser.REJECTED[stage] += count
+            profiler.merge(counters)
 
 
 def help():
+    import zigpy_deconz_parser.filters as filters
+    import zigpy_deconz_parser.slip as slip
+
     name = os.path.basename(sys.argv[0])
-    print(name + " -i <input file name>")
+    print(name + " -i <input file name> [-e {}] [-j <jobs>] [-m] "
+          "[-f {}] [-F] [-s <uart capture>] "
+          "[-c <capture>]".format(
+              '|'.join(sorted(parser.ENGINES)), '|'.join(sorted(RENDERERS))))
+    print("  -i, --in-file PATH  log file, compressed (gzip, bzip2, xz, zstd) "
+          "or not, or a quoted glob of rotated logs read oldest first")
+    print("  -m, --mmap  memory map the input file and show uart lines only")
+    print("  --prefilter-stats  report lines rejected by each filter stage")
+    print("  --profile  report the frames and the time spent in every "
+          "decoding stage per command, parsing about 10-25% slower")
+    print("  --batch-size N  rows per batch of the parquet and arrow formats")
+    print("  --stats  print aggregated statistics only, same as -f stats, "
+          "with --follow also every {} s like -f health".format(
+              SNAPSHOT_INTERVAL))
+    print("  -F, --follow  keep reading lines appended to the input file, "
+          "following rotation and truncation, until interrupted")
+    print("  -s, --serial PATH  decode the raw UART bytes of a capture file, "
+          "serial port or pty instead of a log, once per direction")
+    print("  -b, --baudrate N  baud rate of a --serial port (default {})"
+          .format(slip.BAUDRATE))
+    print("  -c, --convert FILE  write the frames of the input log to a "
+          "binary capture FILE and its FILE.idx index, -i reads captures "
+          "too")
+    print("  --npz FILE  decode the fixed layout frames of the input log "
+          "in batches into NumPy structured arrays saved to FILE, one per "
+          "command")
+    print("  -o, --output FILE  write the output to FILE instead of stdout, "
+          "compressed if FILE ends with .gz, .bz2, .xz or .zst")
+    print("  --since, --until 'YYYY-MM-DD HH:MM:SS'  only frames of a "
+          "capture within this time range")
+    print("  --command NAME|ID  only frames of a capture with this command, "
+          "may be repeated")
+    print("  --filter EXPR  only frames matching EXPR, e.g. "
+          "'nwk 0x1234 cluster 0x0006' or 'dst 0x1234 confirm != "
+          "SUCCESS', fields: " +
+          ', '.join(sorted(filters.FIELDS)))
+    print("  --zcl  decode the ASDU of APS data requests and indications "
+          "as ZCL/ZDO command, text and structured formats")
+    print("  --timeout N  seconds before an unconfirmed request is dropped "
+          "by the correlate and stats formats")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import bz2
+import gzip
+import io
+import locale
+import lzma
+import sys
+
+# frames a TextWriter collects before writing them to its sink
+BUFFER_FRAMES = 1024
+
+COMPRESSED = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+
+def _zstd_open(path, mode):
+    import zstandard
+
+    return zstandard.ZstdCompressor().stream_writer(open(path, mode))
+
+
+COMPRESSED['.zst'] = _zstd_open
+
+
+def open_sink(path=None):
+    """Binary file object to write the output to.
+
+    None and '-' are stdout, a .gz, .bz2, .xz or .zst (needs the optional
+    zstandard dependency) suffix compresses the file.
+    """
+    if path in (None, '-'):
+        return sys.stdout.buffer
+    for suffix, opener in COMPRESSED.items():
+        if path.endswith(suffix):
+            return opener(path, 'wb')
+    return open(path, mode='wb')
+
+
+def close_sink(sink):
+    if sink is sys.stdout.buffer:
+        sink.flush()
+    else:
+        sink.close()
+
+
+class TextWriter(io.StringIO):
+    """Collect text output and write it in large chunks.
+
+    print() to a TextWriter stays in C, the text is only encoded and
+    written to the binary sink once every BUFFER_FRAMES frames.
+    Without a sink it goes to sys.stdout as it is when commit() is called,
+    once per frame, so that redirect_stdout() and print() based callers
+    keep working.
+    """
+
+    def __init__(self, out=None, encoding=None):
+        super().__init__()
+        self._out = out
+        self._limit = BUFFER_FRAMES if out is not None else 1
+        self._pending = 0
+        self._encoding = encoding or locale.getpreferredencoding(False)
+
+    def commit(self):
+        """End of a frame, write out if enough output is pending."""
+        self._pending += 1
+        if self._pending >= self._limit:
+            self._write()
+
+    def _write(self):
+        self._pending = 0
+        text = self.getvalue()
+        if not text:
+            return
+        self.seek(0)
+        self.truncate()
+        if self._out is None:
+            sys.stdout.write(text)
+        else:
+            self._out.write(text.encode(self._encoding))
+
+    def flush(self):
+        """Write out everything pending, down to the sink."""
+        self._write()
+        if self._out is not None:
+            self._out.flush()
+        else:
+            sys.stdout.flush()
+
+    def close(self):
+        self.flush()
@@ -1,10 +1,16 @@
 import binascii
 import re
 
+import zigpy_deconz_parser.compact as compact
+import zigpy_deconz_parser.compiled as compiled
+import zigpy_deconz_parser.lazy as lazy
 import zigpy_deconz_parser.types as pt
 from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+from zigpy_deconz_parser.renderers import TextRenderer
 
 
+UART_MARKER = '[zigpy_deconz.uart]'
+
 MATCH = re.compile(("^(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})"   # Timestamp
                     "\s"
                     "DEBUG"                                   # Debug
@@ -16,28 +22,99 @@ MATCH = re.compile(("^(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})"   # Timestamp
                     "(Send|Frame\sreceived):"
                     "\s"
                     "0x([\dabcdef]+)"), re.VERBOSE)
+LOG_LINE = "{} DEBUG ({}) " + UART_MARKER + " {}: 0x{}"
+
+# engine name -> (header decoder, command decoder)
+ENGINES = {
+    'schema': (pt.Header.deserialize,
+               lambda cmd, data: cmd.deserialize(data)),
+    'struct': (pt.Header.deserialize, compiled.deserialize),
+    'memoryview': (compiled.deserialize_header, compiled.deserialize),
+    'lazy': (compiled.deserialize_header, lazy.deserialize),
+    'slots': (compact.deserialize_header, compact.deserialize),
+}
+DEFAULT_ENGINE = 'schema'
+TEXT = TextRenderer()
 
+# lines rejected by each prefilter stage, in the order the stages run
+REJECTED = {
+    'uart marker': 0,
+    'direction': 0,
+    'regex': 0,
+}
 
-def parse(line):
+
+def match(line):
+    """Cheap substring checks first, the MATCH regex only on survivors."""
+    if UART_MARKER not in line:
+        REJECTED['uart marker'] += 1
+        return None
+    if 'Send:' not in line and 'Frame received:' not in line:
+        REJECTED['direction'] += 1
+        return None
     result = MATCH.match(line)
     if result is None:
-        return
+        REJECTED['regex'] += 1
+    return result
+
+
+def prefilter_report(rejected=REJECTED):
+    yield "Prefilter rejections:"
+    for stage, count in rejected.items():
+        yield "  {:<12} {:>12}".format(stage, count)
+
+
+def decode(line, engine=DEFAULT_ENGINE, where=None):
+    """Decode a log line into (timestamp, is_response, header, command).
+
+    Returns None for lines without a frame or frames rejected by the where
+    filter, command is None when there is no decoder for the frame or it
+    has no payload.
+    """
+    result = match(line)
+    if result is None:
+        return None
     ts, txrx, data = result.groups()
     data = binascii.unhexlify(data)
     if txrx == 'Frame received':
         is_response = True
     else:
         is_response = False
+    return decode_frame(ts, is_response, data, engine, where)
+
+
+def decode_frame(ts, is_response, data, engine=DEFAULT_ENGINE, where=None):
+    """Decode the raw bytes of a frame, see decode()."""
+    decode_header, decode_command = ENGINES[engine]
+    hdr, rest = decode_header(data)
+    cmd = command_class(is_response, hdr)
+    if where is not None and not where(is_response, hdr, cmd):
+        return None
+    return ts, is_response, hdr, decode_payload(decode_command, cmd, hdr)
+
 
-    hdr, rest = pt.Header.deserialize(data)
-    hdr.pretty_print(is_response)
+def command_class(is_response, hdr):
+    """The command class of a header, None for unknown commands."""
     if is_response:
-        cmd = RESPONSES.get(hdr.command)
-    else:
-        cmd = REQUESTS.get(hdr.command)
+        return RESPONSES.get(hdr.command)
+    return REQUESTS.get(hdr.command)
+
+
+def decode_payload(decode_command, cmd, hdr):
+    """The decoded command, None without a command class or payload."""
+    if cmd:
+        return hdr.decode_payload(decode_command, cmd)
+    return None
+
 
-    if cmd and hdr.payload:
-        cmd, rest = cmd.deserialize(hdr.payload)
-        cmd.pretty_print()
+def log_line(ts, is_response, data, thread='MainThread'):
+    """The zigpy_deconz.uart log line of a raw frame."""
+    return LOG_LINE.format(ts, thread,
+                           'Frame received' if is_response else 'Send',
+                           binascii.hexlify(data).decode())
 
 
+def parse(line, engine=DEFAULT_ENGINE, renderer=None, where=None):
+    frame = decode(line, engine, where)
+    if frame is not None:
+        (renderer or TEXT).frame(*frame)
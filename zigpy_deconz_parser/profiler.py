@@ -0,0 +1,186 @@
+"""Per command timers of the decoding stages, see --profile.
+
+enable() swaps parser.decode and parser.decode_frame for versions which
+count the frames and time every stage with the same parser helpers,
+Renderer() times the output of a renderer. Nothing else is touched, so
+profiling costs nothing while it is off. While it is on, the timers slow
+parsing down by about 10-25%, see benchmarks/bench_profile.py.
+"""
+
+import binascii
+import contextlib
+from time import perf_counter_ns
+
+import zigpy_deconz_parser.parser as parser
+
+STAGES = ('match', 'unhexlify', 'header', 'filter', 'command', 'render')
+# indexes into the counters, 0 counts the frames
+MATCH, UNHEXLIFY, HEADER, FILTER, COMMAND, RENDER = range(1, len(STAGES) + 1)
+
+# (command, is_response) -> [frames, ns of every stage]. LINES counts the
+# log lines, the time spent on lines without a frame and writing the lines.
+LINES = None
+COUNTERS = {}
+
+_SWAPPED = {}
+
+
+def _counter(key):
+    try:
+        return COUNTERS[key]
+    except KeyError:
+        result = COUNTERS[key] = [0] * (len(STAGES) + 1)
+        return result
+
+
+def decode(line, engine=parser.DEFAULT_ENGINE, where=None):
+    """parser.decode() with timers."""
+    start = perf_counter_ns()
+    result = parser.match(line)
+    matched = perf_counter_ns()
+    lines = _counter(LINES)
+    lines[0] += 1
+    if result is None:
+        lines[MATCH] += matched - start
+        return None
+    ts, txrx, data = result.groups()
+    data = binascii.unhexlify(data)
+    return _decode_frame(ts, txrx == 'Frame received', data, engine, where,
+                         matched - start, perf_counter_ns() - matched)
+
+
+def decode_frame(ts, is_response, data, engine=parser.DEFAULT_ENGINE,
+                 where=None):
+    """parser.decode_frame() with timers."""
+    return _decode_frame(ts, is_response, data, engine, where)
+
+
+def _decode_frame(ts, is_response, data, engine, where, match=0,
+                  unhexlify=0):
+    decode_header, decode_command = parser.ENGINES[engine]
+    start = perf_counter_ns()
+    hdr, rest = decode_header(data)
+    done = perf_counter_ns()
+    counter = _counter((hdr.command, is_response))
+    counter[0] += 1
+    counter[MATCH] += match
+    counter[UNHEXLIFY] += unhexlify
+    counter[HEADER] += done - start
+    cmd = parser.command_class(is_response, hdr)
+    if where is not None:
+        start = done
+        keep = where(is_response, hdr, cmd)
+        done = perf_counter_ns()
+        counter[FILTER] += done - start
+        if not keep:
+            return None
+
+    cmd = parser.decode_payload(decode_command, cmd, hdr)
+    counter[COMMAND] += perf_counter_ns() - done
+    return ts, is_response, hdr, cmd
+
+
+class Renderer:
+    """Times the line() and frame() calls of another renderer."""
+
+    def __init__(self, renderer):
+        self._renderer = renderer
+
+    def __getattr__(self, name):
+        return getattr(self._renderer, name)
+
+    def line(self, line):
+        start = perf_counter_ns()
+        self._renderer.line(line)
+        _counter(LINES)[RENDER] += perf_counter_ns() - start
+
+    def frame(self, ts, is_response, hdr, cmd):
+        start = perf_counter_ns()
+        self._renderer.frame(ts, is_response, hdr, cmd)
+        _counter((hdr.command, is_response))[RENDER] += \
+            perf_counter_ns() - start
+
+
+def enable():
+    if not _SWAPPED:
+        _SWAPPED.update(decode=parser.decode,
+                        decode_frame=parser.decode_frame)
+        parser.decode = decode
+        parser.decode_frame = decode_frame
+
+
+def disable():
+    if _SWAPPED:
+        parser.decode = _SWAPPED.pop('decode')
+        parser.decode_frame = _SWAPPED.pop('decode_frame')
+
+
+def enabled():
+    return bool(_SWAPPED)
+
+
+@contextlib.contextmanager
+def profiling(reset=True):
+    """Profile the body, yields COUNTERS."""
+    if reset:
+        COUNTERS.clear()
+    enable()
+    try:
+        yield COUNTERS
+    finally:
+        disable()
+
+
+def merge(counters):
+    """Add the COUNTERS of another process."""
+    for key, values in counters.items():
+        counter = _counter(key)
+        for i, value in enumerate(values):
+            counter[i] += value
+
+
+def rows(counters=COUNTERS):
+    """One dict per command, slowest first.
+
+    seconds holds the time of every stage and the total. command and
+    is_response are None for the row of the log lines.
+    """
+    result = []
+    for key, values in counters.items():
+        command, is_response = (None, None) if key is LINES else key
+        seconds = {stage: values[i] / 1e9
+                   for i, stage in enumerate(STAGES, 1)}
+        seconds['total'] = sum(values[1:]) / 1e9
+        result.append({'command': command, 'is_response': is_response,
+                       'frames': 0 if key is LINES else values[0],
+                       'lines': values[0] if key is LINES else 0,
+                       'seconds': seconds})
+    result.sort(key=lambda row: -row['seconds']['total'])
+    return result
+
+
+def report(counters=COUNTERS):
+    columns = STAGES + ('total', )
+    yield "Profile (ms):"
+    yield "  {:<40} {:>10} ".format('command', 'frames') + ' '.join(
+        '{:>9}'.format(column) for column in columns + ('us/frame', ))
+    totals = dict.fromkeys(columns, 0)
+    frames = 0
+    for row in rows(counters):
+        seconds = row['seconds']
+        if row['command'] is None:
+            name = "{} log lines".format(row['lines'])
+            per_frame = ''
+        else:
+            name = "{} {}".format('<' if row['is_response'] else '>',
+                                  row['command'])
+            per_frame = ' {:>9.2f}'.format(
+                seconds['total'] * 1e6 / row['frames'])
+        frames += row['frames']
+        yield "  {:<40} {:>10} ".format(name, row['frames']) + ' '.join(
+            '{:>9.1f}'.format(seconds[column] * 1000)
+            for column in columns) + per_frame
+        for column in columns:
+            totals[column] += seconds[column]
+    yield "  {:<40} {:>10} ".format('all', frames) + ' '.join(
+        '{:>9.1f}'.format(totals[column] * 1000) for column in columns)
@@ -0,0 +1,326 @@
+import binascii
+import collections.abc
+import enum
+import importlib
+import json
+import sys
+import time
+
+import zigpy_deconz.types as dt
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.output import TextWriter
+
+BUFFER_RECORDS = 1024
+SNAPSHOT_INTERVAL = 10  # seconds between the reports of a followed log
+
+_FIELDS = {}
+
+
+def _fields(cls):
+    try:
+        return _FIELDS[cls]
+    except KeyError:
+        if issubclass(cls, pt.Record):
+            names = cls.FIELDS
+        else:
+            names = tuple(field[0] for field in cls._fields)
+        _FIELDS[cls] = names
+        return names
+
+
+def _enum(obj):
+    return obj._name_ if isinstance(obj, enum.Enum) else obj.name
+
+
+def _hex(obj):
+    return binascii.hexlify(obj).decode()
+
+
+def _list(obj):
+    return [value(item) for item in obj]
+
+
+def _type_value(obj):
+    return value(obj.value)
+
+
+def _struct(obj):
+    r = {name: value(getattr(obj, name, None))
+         for name in _fields(type(obj))}
+    if hasattr(obj, 'ieee'):
+        r['ieee'] = value(obj.ieee)
+    return r
+
+
+def _converter(cls):
+    if cls is type(None) or issubclass(cls, (bool, str)):
+        return None
+    if issubclass(cls, (enum.Enum, pt.UndefEnum)):
+        return _enum
+    if issubclass(cls, int):
+        return int
+    if issubclass(cls, (bytes, bytearray, memoryview)):
+        return _hex
+    if issubclass(cls, dt.EUI64):
+        return repr
+    if issubclass(cls, list):
+        return _list
+    if issubclass(cls, (dt.Struct, pt.Struct)):
+        return _struct
+    # zigpy's types and TypeValue only show up in the ASDUs --zcl decoded,
+    # after asdu imported zigpy.zcl
+    zigpy_types = sys.modules.get('zigpy.types')
+    if zigpy_types is not None and issubclass(cls, zigpy_types.Struct):
+        return _struct
+    foundation = sys.modules.get('zigpy.zcl.foundation')
+    if foundation is not None and issubclass(cls, foundation.TypeValue):
+        return _type_value
+    return str
+
+
+_CONVERTERS = {}
+
+
+def value(obj):
+    """Convert a decoded field into a JSON/msgpack friendly value."""
+    cls = type(obj)
+    try:
+        convert = _CONVERTERS[cls]
+    except KeyError:
+        convert = _CONVERTERS[cls] = _converter(cls)
+    return obj if convert is None else convert(obj)
+
+
+def record(ts, is_response, hdr, cmd):
+    """Build one structured record out of a decoded frame."""
+    r = {
+        'timestamp': ts,
+        'direction': 'rx' if is_response else 'tx',
+        'command': value(hdr.command),
+        'seq': int(hdr.seq),
+        'status': value(hdr.status),
+        'length': int(hdr.length),
+        'payload': value(hdr.payload),
+    }
+    if cmd is not None:
+        r['fields'] = {name: value(getattr(cmd, name))
+                       for name in _fields(type(cmd))}
+    return r
+
+
+def decode_asdu(cmd):
+    """The decoded ZCL/ZDO ASDU of an APS data request or indication."""
+    import zigpy_deconz_parser.asdu as asdu
+
+    data = getattr(cmd, 'asdu', None)
+    if data is None:
+        return None
+    return asdu.decode(cmd.profile, cmd.cluster_id, data)
+
+
+def asdu_record(decoded):
+    schema = decoded.schema
+    return {
+        'tsn': decoded.tsn,
+        'general': decoded.general,
+        'command_id': decoded.command_id,
+        'command': schema.command,
+        'cluster': schema.cluster,
+        'direction': decoded.direction,
+        'manufacturer': decoded.manufacturer,
+        'args': None if decoded.args is None else _list(decoded.args),
+        'rest': _hex(decoded.rest),
+    }
+
+
+class Renderer:
+    """Gets every line of the input and the frames decoded from them.
+
+    The output of mergeable renderers can be concatenated, so -j renders
+    chunks of the input in parallel. options are the keyword arguments of
+    __init__ which can be given on the command line. flush() is called after
+    every batch of a followed log.
+    """
+
+    mergeable = False
+    options = ()
+
+    def line(self, line):
+        pass
+
+    def frame(self, ts, is_response, hdr, cmd):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class ReportRenderer(Renderer):
+    """No per frame output, print the report of an aggregator at the end.
+
+    The aggregator is fed every frame and yields the lines of its report.
+    flush(), called after every batch of a followed log, also prints the
+    report every interval seconds when frames came in since the last one.
+    """
+
+    def __init__(self, aggregator, out=None, interval=SNAPSHOT_INTERVAL):
+        self._aggregator = aggregator
+        self._out = TextWriter(out)
+        self._interval = interval
+        self._frames = 0
+        self._reported = time.monotonic()
+        self._reported_frames = 0
+
+    def frame(self, ts, is_response, hdr, cmd):
+        self._aggregator.feed(ts, is_response, hdr, cmd)
+        self._frames += 1
+
+    def _report(self):
+        for line in self._aggregator.report():
+            self._out.write(line + '\n')
+
+    def flush(self):
+        now = time.monotonic()
+        if now - self._reported < self._interval or \
+                self._frames == self._reported_frames:
+            return
+        self._reported = now
+        self._reported_frames = self._frames
+        self._report()
+        self._out.write('\n')
+        self._out.flush()
+
+    def close(self):
+        self._report()
+        self._out.close()
+
+
+class TextRenderer(Renderer):
+    """The tab indented human readable output.
+
+    The pretty_print() methods print() to sys.stdout, which points to a
+    TextWriter while a frame is rendered, so every frame ends up in one
+    buffer instead of one write per field. With zcl the ASDU of APS data
+    requests and indications is decoded as ZCL/ZDO command too.
+    """
+
+    mergeable = True
+    options = ('zcl', )
+
+    def __init__(self, out=None, zcl=False):
+        self._out = TextWriter(out)
+        self._zcl = zcl
+
+    def line(self, line):
+        self._out.write(line.strip() + '\n')
+        self._out.commit()
+
+    def frame(self, ts, is_response, hdr, cmd):
+        stdout, sys.stdout = sys.stdout, self._out
+        try:
+            hdr.pretty_print(is_response)
+            if cmd is not None:
+                cmd.pretty_print()
+                if self._zcl:
+                    self.pretty_print_asdu(cmd)
+        finally:
+            sys.stdout = stdout
+        self._out.commit()
+
+    @staticmethod
+    def pretty_print_asdu(cmd):
+        import zigpy_deconz_parser.asdu as asdu
+
+        decoded = decode_asdu(cmd)
+        if decoded is not None:
+            prefix = pt.indent(pt.LPAD)
+            for line in asdu.lines(decoded):
+                print(prefix + line)
+
+    def flush(self):
+        self._out.flush()
+
+    def close(self):
+        self._out.close()
+
+
+class StructuredRenderer(Renderer):
+    """Write one record per frame, skipping all the text formatting.
+
+    With zcl, records of APS data requests and indications get the
+    decoded ZCL/ZDO command of their ASDU as 'zcl'.
+    """
+
+    mergeable = True
+    options = ('zcl', )
+
+    def __init__(self, out=None, zcl=False):
+        self._out = sys.stdout.buffer if out is None else out
+        self._buffer = []
+        self._zcl = zcl
+
+    def frame(self, ts, is_response, hdr, cmd):
+        r = record(ts, is_response, hdr, cmd)
+        if self._zcl and cmd is not None:
+            decoded = decode_asdu(cmd)
+            if decoded is not None:
+                r['zcl'] = asdu_record(decoded)
+        self._buffer.append(self.encode(r))
+        if len(self._buffer) >= BUFFER_RECORDS:
+            self.flush()
+
+    def encode(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        self._out.write(b''.join(self._buffer))
+        self._buffer.clear()
+        self._out.flush()
+
+
+class JsonLinesRenderer(StructuredRenderer):
+    def encode(self, record):
+        return json.dumps(record, separators=(',', ':')).encode() + b'\n'
+
+
+class MsgpackRenderer(StructuredRenderer):
+    def __init__(self, out=None, zcl=False):
+        import msgpack
+
+        super().__init__(out, zcl)
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    def encode(self, record):
+        return self._packer.pack(record)
+
+
+class _Renderers(collections.abc.Mapping):
+    """format -> renderer class, its module imported on first use."""
+
+    def __init__(self, classes):
+        self._classes = classes
+
+    def __getitem__(self, fmt):
+        module, name = self._classes[fmt].rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+
+    def __iter__(self):
+        return iter(self._classes)
+
+    def __len__(self):
+        return len(self._classes)
+
+
+RENDERERS = _Renderers({
+    'text': __name__ + '.TextRenderer',
+    'jsonl': __name__ + '.JsonLinesRenderer',
+    'msgpack': __name__ + '.MsgpackRenderer',
+    'parquet': 'zigpy_deconz_parser.columnar.ParquetRenderer',
+    'arrow': 'zigpy_deconz_parser.columnar.ArrowRenderer',
+    'correlate': 'zigpy_deconz_parser.correlate.CorrelationRenderer',
+    'stats': 'zigpy_deconz_parser.stats.StatsRenderer',
+    'health': 'zigpy_deconz_parser.health.HealthRenderer',
+})
@@ -0,0 +1,203 @@
+import os
+import time
+
+import zigpy_deconz_parser.types as pt
+from zigpy_deconz_parser.commands import REQUESTS, RESPONSES
+from zigpy_deconz_parser.correlate import TIMESTAMP_FORMAT
+
+END = b'\xc0'
+ESC = b'\xdb'
+ESC_END = b'\xdc'
+ESC_ESC = b'\xdd'
+
+BAUDRATE = 115200
+READ_SIZE = 64 * 1024
+
+# a stream is taken to be in one direction once the direction votes of its
+# frames differ by DIRECTION_VOTES, or by majority after DIRECTION_FRAMES
+DIRECTION_VOTES = 4
+DIRECTION_FRAMES = 32
+
+
+def checksum(data):
+    """The deCONZ frame check: two's complement of the byte sum."""
+    return (-sum(data) & 0xffff).to_bytes(2, 'little')
+
+
+def unescape(data):
+    # the byte after ESC is never ESC itself, so one pass per escape is safe
+    if ESC not in data:
+        return data
+    return data.replace(ESC + ESC_END, END).replace(ESC + ESC_ESC, ESC)
+
+
+def escape(data):
+    return data.replace(ESC, ESC + ESC_ESC).replace(END, ESC + ESC_END)
+
+
+def encode(data):
+    """SLIP framed data with its checksum, as sent over the UART."""
+    return END + escape(data + checksum(data)) + END
+
+
+class SlipDecoder:
+    """Split a raw UART byte stream into checksummed deCONZ frames.
+
+    Bytes can be fed in chunks of any size, an incomplete frame is kept
+    until its END byte arrives. Frames with a bad checksum are counted and
+    dropped.
+    """
+
+    def __init__(self):
+        self._pending = b''
+        self.frames = 0
+        self.bad_checksum = 0
+        self.too_short = 0
+
+    def feed(self, data):
+        """Returns the frames completed by data."""
+        *chunks, self._pending = (self._pending + data).split(END)
+        frames = []
+        for chunk in chunks:
+            if not chunk:
+                continue
+            frame = unescape(chunk)
+            if len(frame) < 7:
+                self.too_short += 1
+                continue
+            if checksum(frame[:-2]) != frame[-2:]:
+                self.bad_checksum += 1
+                continue
+            frames.append(frame[:-2])
+        self.frames += len(frames)
+        return frames
+
+
+def _decodes(table, hdr):
+    cls = table.get(hdr.command)
+    if cls is None:
+        return False
+    try:
+        _, rest = cls.deserialize(hdr.payload)
+    except (ValueError, IndexError, KeyError, AttributeError):
+        return False
+    return not rest
+
+
+def direction_vote(data):
+    """1 if a frame looks sent by the radio, -1 if sent by the host, or 0.
+
+    The host always sends a SUCCESS status and a few commands only come
+    from the radio, otherwise the frame votes for the command table which
+    decodes its payload exactly.
+    """
+    try:
+        hdr, _ = pt.Header.deserialize(data)
+    except ValueError:
+        return 0
+    if hdr.status != pt.Status.SUCCESS or \
+            (hdr.command in RESPONSES and hdr.command not in REQUESTS):
+        return 1
+    return _decodes(RESPONSES, hdr) - _decodes(REQUESTS, hdr)
+
+
+class Stream:
+    """One direction of a UART capture.
+
+    The direction is inferred from the frames themselves unless given,
+    frames are held back until it is known.
+    """
+
+    def __init__(self, name, is_response=None):
+        self.name = name
+        self.is_response = is_response
+        self.decoder = SlipDecoder()
+        self._votes = 0
+        self._held = []
+
+    def feed(self, data, ts=None):
+        """Returns (timestamp, is_response, frame) for every new frame."""
+        if ts is None:
+            ts = time.strftime(TIMESTAMP_FORMAT)
+        frames = self.decoder.feed(data)
+        if self.is_response is not None:
+            return [(ts, self.is_response, frame) for frame in frames]
+
+        for frame in frames:
+            self._votes += direction_vote(frame)
+            self._held.append((ts, frame))
+        if abs(self._votes) >= DIRECTION_VOTES or \
+                len(self._held) >= DIRECTION_FRAMES:
+            self.is_response = self._votes > 0
+            return self.finish()
+        return []
+
+    def finish(self):
+        """Release the held frames, guessing the direction if still open."""
+        if self.is_response is None:
+            self.is_response = self._votes > 0
+        held, self._held = self._held, []
+        return [(ts, self.is_response, frame) for ts, frame in held]
+
+
+def _configure(fd, baudrate):
+    # only serial ports and ptys are configured, termios and tty are
+    # imported for them alone
+    import termios
+    import tty
+
+    tty.setraw(fd)
+    attrs = termios.tcgetattr(fd)
+    speed = getattr(termios, 'B{}'.format(baudrate))
+    attrs[4] = attrs[5] = speed
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+
+async def read_stream(path, stream, baudrate=BAUDRATE):
+    """Yield batches of (timestamp, is_response, frame) read from path.
+
+    path is either a capture file, which is read to its end, or a serial
+    port or pseudo terminal, which is switched to raw mode at baudrate and
+    read until it is closed on the other end.
+    """
+    fd = os.open(path, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        if not os.isatty(fd):
+            os.set_blocking(fd, True)
+            while True:
+                data = os.read(fd, READ_SIZE)
+                if not data:
+                    break
+                frames = stream.feed(data)
+                if frames:
+                    yield frames
+        else:
+            import asyncio
+
+            _configure(fd, baudrate)
+            loop = asyncio.get_running_loop()
+            readable = asyncio.Event()
+            loop.add_reader(fd, readable.set)
+            try:
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    try:
+                        data = os.read(fd, READ_SIZE)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        # EIO once the other end of a pty is closed
+                        break
+                    if not data:
+                        break
+                    frames = stream.feed(data)
+                    if frames:
+                        yield frames
+            finally:
+                loop.remove_reader(fd)
+        frames = stream.finish()
+        if frames:
+            yield frames
+    finally:
+        os.close(fd)
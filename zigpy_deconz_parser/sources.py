@@ -0,0 +1,197 @@
+import bz2
+import contextlib
+import glob
+import gzip
+import io
+import locale
+import lzma
+import os
+import queue
+import re
+import stat
+import threading
+
+# decompressed bytes handed over by the reader thread at a time
+READ_SIZE = 1024 * 1024
+# chunks the reader thread may be ahead of the parser
+READ_AHEAD = 8
+# lines searched for a timestamp to order the files of a glob
+ORDER_LINES = 1000
+
+TIMESTAMP = re.compile(rb'^(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2})\s')
+# the number of a rotated log, home-assistant.log.3 or .log.3.gz
+ROTATION = re.compile(r'\.(\d+)(?:\.[a-z0-9]+)?$')
+
+
+def _zstd_open(file):
+    import zstandard
+
+    # the stream reader can't be iterated, readline() needs a buffer
+    return io.BufferedReader(
+        zstandard.ZstdDecompressor().stream_reader(file), READ_SIZE)
+
+
+# magic number, opener of a decompressing reader over a binary file
+COMPRESSED = (
+    (b'\x1f\x8b', lambda file: gzip.GzipFile(fileobj=file, mode='rb')),
+    (b'BZh', lambda file: bz2.BZ2File(file, mode='rb')),
+    (b'\xfd7zXZ\x00', lambda file: lzma.LZMAFile(file, mode='rb')),
+    (b'\x28\xb5\x2f\xfd', _zstd_open),
+)
+MAGIC_SIZE = max(len(magic) for magic, _ in COMPRESSED)
+
+
+def decompressed(file):
+    """A reader of the decompressed content of a buffered binary file.
+
+    gzip, bzip2, xz and zstd (needs the optional zstandard dependency) are
+    told by their magic number, which is only peeked, so file itself is
+    returned as is and unread when it isn't compressed. Closing the reader
+    leaves file open.
+    """
+    head = file.peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    for magic, opener in COMPRESSED:
+        if head.startswith(magic):
+            return opener(file)
+    return file
+
+
+@contextlib.contextmanager
+def open_binary(path):
+    """Binary file object of the decompressed content of path."""
+    with open(path, mode='rb') as raw, decompressed(raw) as file:
+        yield file
+
+
+def first_timestamp(path):
+    """The first log timestamp of path, None if there is none early on."""
+    with open_binary(path) as file:
+        for _, line in zip(range(ORDER_LINES), file):
+            result = TIMESTAMP.match(line)
+            if result is not None:
+                return result.group(1)
+    return None
+
+
+def _rotation(path):
+    result = ROTATION.search(path)
+    return int(result.group(1)) if result is not None else 0
+
+
+def expand(pattern):
+    """The files matching pattern, oldest log first.
+
+    Files are ordered by their first timestamp, then by rotation number,
+    so home-assistant.log.2.gz comes before home-assistant.log.1.gz and
+    home-assistant.log, then by modification time. A pattern which matches
+    nothing is returned as is, to fail on open. Only regular files are
+    searched for a timestamp, reading a pipe would lose its first lines.
+    """
+    paths = glob.glob(pattern)
+    if len(paths) < 2:
+        return paths or [pattern]
+    order = {}
+    for path in paths:
+        info = os.stat(path)
+        stamp = first_timestamp(path) if stat.S_ISREG(info.st_mode) \
+            else None
+        order[path] = (stamp is None, stamp or '', -_rotation(path),
+                       info.st_mtime)
+    return sorted(paths, key=order.__getitem__)
+
+
+class _Reader(threading.Thread):
+    """Decompress files one after the other into a bounded queue.
+
+    zlib, bz2 and lzma release the GIL, so decompression of the next
+    chunk overlaps with parsing of the previous one. A newline is put
+    between files which do not end with one.
+    """
+
+    def __init__(self, files):
+        super().__init__(name='decompress', daemon=True)
+        self.queue = queue.Queue(READ_AHEAD)
+        self.stopped = threading.Event()
+        self._files = files
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(self):
+        try:
+            for item in self._files:
+                chunk = b''
+                opened = open_binary(item) if isinstance(item, str) else item
+                with opened as file:
+                    while True:
+                        data = file.read(READ_SIZE)
+                        if not data:
+                            break
+                        chunk = data
+                        if not self._put(data):
+                            return
+                if chunk and not chunk.endswith(b'\n'):
+                    if not self._put(b'\n'):
+                        return
+        except Exception as exc:
+            self._put(exc)
+            return
+        self._put(b'')
+
+
+class _QueueIO(io.RawIOBase):
+    """Read side of a _Reader."""
+
+    def __init__(self, reader):
+        self._reader = reader
+        self._chunk = memoryview(b'')
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._chunk:
+            if self._eof:
+                return 0
+            item = self._reader.queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(item)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def close(self):
+        self._reader.stopped.set()
+        super().close()
+
+
+def lines(files, marker=None):
+    """Yield the lines of files, compressed or not, as one text stream.
+
+    files are paths or binary file objects, which are read as they are.
+    Only lines containing marker are yielded if it is given. Lines are
+    decoded like a file opened in text mode and nothing is written to disk.
+    """
+    reader = _Reader(files)
+    reader.start()
+    with io.TextIOWrapper(io.BufferedReader(_QueueIO(reader), READ_SIZE),
+                          encoding=locale.getpreferredencoding(False)) \
+            as text:
+        if marker is None:
+            yield from text
+        else:
+            for line in text:
+                if marker in line:
+                    yield line
@@ -0,0 +1,183 @@
+import collections
+
+import zigpy_deconz_parser.compact as compact
+from zigpy_deconz_parser.commands import requests
+from zigpy_deconz_parser.correlate import (CONFIRMED, Correlator, TIMEOUT,
+                                           epoch)
+from zigpy_deconz_parser.renderers import ReportRenderer, SNAPSHOT_INTERVAL
+
+RATE_WINDOW = 10
+PERCENTILES = (50, 90, 99, 99.9, 100)
+
+
+class Histogram:
+    """HDR style histogram of non negative integers in constant memory.
+
+    Values below 2 ** precision are counted exactly, larger values share a
+    bucket with everything that has the same top precision bits, so the
+    relative error stays below 2 ** -precision.
+    """
+
+    def __init__(self, precision=5):
+        self._precision = precision
+        self._counts = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.max = None
+
+    def _bucket(self, value):
+        shift = max(value.bit_length() - self._precision, 0)
+        return shift, value >> shift
+
+    def record(self, value, count=1):
+        value = max(int(value), 0)
+        self._counts[self._bucket(value)] += count
+        self.count += count
+        self.total += value * count
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct percentile."""
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for shift, top in sorted(self._counts):
+            seen += self._counts[(shift, top)]
+            if seen >= rank:
+                return min(((top + 1) << shift) - 1, self.max)
+        return self.max
+
+
+class SlidingRate:
+    """Events per second over a sliding window of whole seconds.
+
+    Only the per second counts of the current window are kept, the event
+    count of every window is sampled into a histogram.
+    """
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self._seconds = collections.deque()
+        self._in_window = 0
+        self.rates = Histogram()
+        self.peak = 0
+
+    def _evict(self, second):
+        while self._seconds and self._seconds[0][0] <= second - self.window:
+            self._in_window -= self._seconds.popleft()[1]
+
+    def record(self, second):
+        if self._seconds and self._seconds[-1][0] == second:
+            self._seconds[-1][1] += 1
+        else:
+            self._seconds.append([second, 1])
+        self._in_window += 1
+        self._evict(second)
+        self.peak = max(self.peak, self._in_window)
+
+    def sample(self, second):
+        """Record the events in the window ending with second."""
+        self._evict(second)
+        self.rates.record(self._in_window)
+
+
+class Statistics:
+    """Aggregate counters over a stream of decoded frames."""
+
+    def __init__(self, timeout=TIMEOUT, window=RATE_WINDOW):
+        self.frames = 0
+        self.commands = collections.Counter()
+        self.statuses = collections.Counter()
+        self.confirm_statuses = collections.Counter()
+        self.outcomes = collections.Counter()
+        self.latency = Histogram()
+        self.send_rate = SlidingRate(window)
+        self.first = self.last = None
+        self._correlator = Correlator(timeout)
+        self._second = None
+
+    def feed(self, ts, is_response, hdr, cmd):
+        self.frames += 1
+        self.commands[(hdr.command, is_response)] += 1
+        if is_response:
+            self.statuses[hdr.status] += 1
+        if self.first is None:
+            self.first = ts
+        self.last = ts
+
+        second = epoch(ts)
+        if self._second is not None and second != self._second:
+            self.send_rate.sample(self._second)
+        self._second = second
+        if issubclass(compact.original(type(cmd)), requests.ApsDataRequest):
+            self.send_rate.record(second)
+
+        for tsn in self._correlator.feed(ts, is_response, hdr, cmd):
+            self._done(tsn)
+
+    def _done(self, tsn):
+        self.outcomes[tsn.outcome] += 1
+        if tsn.confirm_status is not None:
+            self.confirm_statuses[tsn.confirm_status] += 1
+        if tsn.outcome == CONFIRMED:
+            self.latency.record(tsn.latency)
+
+    def finish(self):
+        for tsn in self._correlator.finish():
+            self._done(tsn)
+        if self._second is not None:
+            self.send_rate.sample(self._second)
+            self._second = None
+
+    def report(self):
+        yield "Frames: {} from {} to {}".format(self.frames, self.first,
+                                                self.last)
+        yield "Frames per command:"
+        for (command, is_response), count in self.commands.most_common():
+            yield "  {} {:<40} {:>12}".format(
+                '<' if is_response else '>', str(command), count)
+        for title, counter in (("Frames per status:", self.statuses),
+                               ("Confirms per status:",
+                                self.confirm_statuses),
+                               ("APS transactions:", self.outcomes)):
+            yield title
+            for key, count in counter.most_common():
+                yield "    {:<40} {:>12}".format(str(key), count)
+        yield "Request -> confirm latency (s), {} samples:".format(
+            self.latency.count)
+        if self.latency.count:
+            yield "    mean {:.2f} ".format(self.latency.mean) + ' '.join(
+                "p{}={}".format(pct, self.latency.percentile(pct))
+                for pct in PERCENTILES)
+        rate = self.send_rate
+        yield "APS send rate over {}s windows (req/s):".format(rate.window)
+        if rate.rates.count:
+            yield "    peak {:.1f} ".format(rate.peak / rate.window) + \
+                ' '.join("p{}={:.1f}".format(
+                    pct, rate.rates.percentile(pct) / rate.window)
+                    for pct in PERCENTILES[:-1])
+
+
+class StatsRenderer(ReportRenderer):
+    """Print the aggregated statistics at the end.
+
+    With --follow they are printed every interval seconds too, without the
+    transactions still in flight.
+    """
+
+    options = ('timeout', )
+
+    def __init__(self, out=None, timeout=TIMEOUT,
+                 interval=SNAPSHOT_INTERVAL):
+        self.stats = Statistics(timeout)
+        super().__init__(self.stats, out, interval)
+
+    def close(self):
+        self.stats.finish()
+        super().close()
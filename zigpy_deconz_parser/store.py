@@ -0,0 +1,61 @@
+import array
+import binascii
+
+import zigpy_deconz_parser.parser as parser
+from zigpy_deconz_parser.correlate import epoch, timestamp
+
+
+class FrameStore:
+    """Packed record form of many frames.
+
+    Every frame costs a timestamp, a direction flag and an offset into one
+    shared buffer holding the raw frames back to back. Frames are decoded
+    again with the given engine when they are looked up.
+    """
+
+    def __init__(self, engine='memoryview'):
+        self.engine = engine
+        self._buffer = bytearray()
+        self._offsets = array.array('Q', [0])
+        self._timestamps = array.array('q')
+        self._responses = array.array('B')
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def append(self, ts, is_response, data):
+        self._buffer += data
+        self._offsets.append(len(self._buffer))
+        self._timestamps.append(epoch(ts))
+        self._responses.append(is_response)
+
+    def add_line(self, line):
+        """Store the frame of a log line, returns False if there is none."""
+        result = parser.match(line)
+        if result is None:
+            return False
+        ts, txrx, data = result.groups()
+        self.append(ts, txrx == 'Frame received', binascii.unhexlify(data))
+        return True
+
+    def raw(self, index):
+        return bytes(self._buffer[self._offsets[index]:
+                                  self._offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return parser.decode_frame(timestamp(self._timestamps[index]),
+                                   bool(self._responses[index]),
+                                   self.raw(index), self.engine)
+
+    def arrays(self):
+        """The fixed layout frames as NumPy arrays, see batch.decode()."""
+        import zigpy_deconz_parser.batch as batch
+
+        return batch.decode(self._buffer, self._offsets, self._responses,
+                            self._timestamps)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
@@ -1,22 +1,173 @@
 import binascii
 import enum
 
-import attr
-import zigpy.types as t
-
 LPAD = 30
 
+# _lpad -> prefix of the continuation lines
+INDENTS = {}
+
+
+def indent(lpad):
+    try:
+        return INDENTS[lpad]
+    except KeyError:
+        prefix = INDENTS[lpad] = '\t\t' + ' ' * (lpad - 1)
+        return prefix
+
+
+# The integer, octet string and struct types of zigpy.types the frames are
+# made of. They decode, compare and print exactly like zigpy's, which (with
+# attr) takes longer to import than a short log takes to parse.
+
+class int_t(int):
+    _signed = True
+    _size = 0
+
+    @classmethod
+    def deserialize(cls, data):
+        if len(data) < cls._size:
+            raise ValueError(
+                "Data is too short to contain %d bytes" % cls._size)
+        r = cls.from_bytes(data[:cls._size], 'little', signed=cls._signed)
+        return r, data[cls._size:]
+
+
+class int8s(int_t):
+    _size = 1
+
+
+class uint_t(int_t):
+    _signed = False
+
+
+class uint8_t(uint_t):
+    _size = 1
+
+
+class uint16_t(uint_t):
+    _size = 2
+
+
+class uint32_t(uint_t):
+    _size = 4
+
+
+class NWK(uint16_t):
+    def __repr__(self):
+        return '0x{:04x}'.format(self)
+
+    __str__ = __repr__
+
+
+class LVBytes(bytes):
+    _prefix_length = 1
+
+    @classmethod
+    def deserialize(cls, data):
+        if len(data) < cls._prefix_length:
+            raise ValueError("Data is too short")
+        num_bytes = int.from_bytes(data[:cls._prefix_length], 'little')
+        end = cls._prefix_length + num_bytes
+        if len(data) < end:
+            raise ValueError("Data is too short")
+        return cls(data[cls._prefix_length:end]), data[end:]
+
+
+class LongOctetString(LVBytes):
+    _prefix_length = 2
+
+
+def Optional(optional_item_type):
+    class Optional(optional_item_type):
+        optional = True
+
+        @classmethod
+        def deserialize(cls, data):
+            try:
+                return super().deserialize(data)
+            except ValueError:
+                return None, b''
+
+    return Optional
+
+
+def deserialize(data, schema):
+    result = []
+    for type_ in schema:
+        value, data = type_.deserialize(data)
+        result.append(value)
+    return result, data
+
+
+class Struct:
+    _fields = []
+
+    def __init__(self, *args):
+        if len(args) == 1 and isinstance(args[0], self.__class__):
+            # copy constructor
+            for field in self._fields:
+                setattr(self, field[0], getattr(args[0], field[0]))
+        elif len(args) == len(self._fields):
+            for field, value in zip(self._fields, args):
+                setattr(self, field[0], field[1](value))
+        elif not args:
+            for field in self._fields:
+                setattr(self, field[0], None)
+
+    @classmethod
+    def deserialize(cls, data):
+        r = cls()
+        for field_name, field_type in cls._fields:
+            v, data = field_type.deserialize(data)
+            setattr(r, field_name, v)
+        return r, data
+
+    def __repr__(self):
+        return "<{} {}>".format(self.__class__.__name__, " ".join(
+            "{}={}".format(f[0], getattr(self, f[0], None))
+            for f in self._fields))
+
+
+class Field:
+    """A Command field, see Command.__init_subclass__()."""
+
+
+class Record:
+    """Compared by and shown with the values of its FIELDS."""
+
+    __slots__ = ()
+
+    FIELDS = ()
 
-@attr.s(frozen=True)
-class UndefEnum:
-    name = attr.ib()
-    value = attr.ib()
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, ', '.join(
+            "{}={!r}".format(name, getattr(self, name))
+            for name in self.FIELDS))
+
+
+class UndefEnum(Record):
+    FIELDS = ('name', 'value')
 
     cls_name = '_'
 
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def __hash__(self):
+        return hash(self._values())
+
     @classmethod
     def deserialize(cls, data):
-        cmd_id, data = t.uint8_t.deserialize(data)
+        cmd_id, data = uint8_t.deserialize(data)
         name = 'Unknown_0x{:02x}'.format(cmd_id)
         return cls(name, cmd_id), data
 
@@ -27,6 +178,62 @@ class UndefEnum:
         return "<{}.{}: {}>".format(self.cls_name, self.name, self.value)
 
 
+# enum class -> its Unknown* class, for the enums with a lookup table
+UNKNOWN_CLASSES = {}
+
+
+class _LookupTables(dict):
+    def __missing__(self, enum_cls):
+        return _build_table(enum_cls, UNKNOWN_CLASSES[enum_cls])
+
+
+# enum class -> member or Unknown* placeholder of every uint8 value, built
+# on first use to keep them out of the import time
+LOOKUP_TABLES = _LookupTables()
+
+
+def lookup_table(enum_cls, unknown_cls):
+    """Resolve all 256 values of a uint8 enum on first use.
+
+    Values which aren't members map to one shared unknown_cls instance
+    each, so decoding neither raises nor allocates for unknown codes.
+    """
+    UNKNOWN_CLASSES[enum_cls] = unknown_cls
+
+
+def _build_table(enum_cls, unknown_cls):
+    members = enum_cls._value2member_map_
+    table = []
+    for value in range(256):
+        member = members.get(value)
+        if member is None:
+            member = unknown_cls('Unknown_0x{:02x}'.format(value),
+                                 uint8_t(value))
+        table.append(member)
+    LOOKUP_TABLES[enum_cls] = table = tuple(table)
+    RENDERED[enum_cls] = RENDERED[unknown_cls] = {
+        value: str(value) for value in table}
+    return table
+
+
+# enum or Unknown* class -> {value: str(value)}
+RENDERED = {}
+
+
+def render(value):
+    """str(value), pre-rendered for the enums with a lookup table."""
+    try:
+        return RENDERED[type(value)][value]
+    except KeyError:
+        return str(value)
+
+
+def _lookup(cls, data):
+    if not data:
+        raise ValueError("Data is too short to contain 1 bytes")
+    return LOOKUP_TABLES[cls][data[0]], data[1:]
+
+
 class UnknownCommand(UndefEnum):
     cls_name = 'DeConzCommand'
 
@@ -35,7 +242,7 @@ class UnknownStatus(UndefEnum):
     cls_name = 'Status'
 
 
-class DeConzCommand(t.uint8_t, enum.Enum):
+class DeConzCommand(uint8_t, enum.Enum):
     APS_DATA_CONFIRM = 0x04
     DEVICE_STATE = 0x07
     CHANGE_NETWORK_STATE = 0x08
@@ -51,13 +258,13 @@ class DeConzCommand(t.uint8_t, enum.Enum):
 
     @classmethod
     def deserialize(cls, data):
-        try:
-            return super().deserialize(data)
-        except ValueError:
-            return UnknownCommand.deserialize(data)
+        return _lookup(cls, data)
 
 
-class Status(t.uint8_t, enum.Enum):
+lookup_table(DeConzCommand, UnknownCommand)
+
+
+class Status(uint8_t, enum.Enum):
     SUCCESS = 0x00
     FAILURE = 0x01
     BUSY = 0x02
@@ -69,17 +276,17 @@ class Status(t.uint8_t, enum.Enum):
 
     @classmethod
     def deserialize(cls, data):
-        try:
-            return super().deserialize(data)
-        except ValueError:
-            return UnknownStatus.deserialize(data)
+        return _lookup(cls, data)
+
+
+lookup_table(Status, UnknownStatus)
 
 
 class UnknownNetworkState(UndefEnum):
     cls_name = 'NetworkState'
 
 
-class NetworkState(t.uint8_t, enum.Enum):
+class NetworkState(uint8_t, enum.Enum):
     OFFLINE = 0x00
     JOINING = 0x01
     CONNECTED = 0x02
@@ -87,17 +294,17 @@ class NetworkState(t.uint8_t, enum.Enum):
 
     @classmethod
     def deserialize(cls, data):
-        try:
-            return super().deserialize(data)
-        except ValueError:
-            return UnknownNetworkState.deserialize(data)
+        return _lookup(cls, data)
+
+
+lookup_table(NetworkState, UnknownNetworkState)
 
 
 class UnknownDeconzParameter(UndefEnum):
     cls_name = 'DeconzParameter'
 
 
-class DeconzParameter(t.uint8_t, enum.Enum):
+class DeconzParameter(uint8_t, enum.Enum):
     MAC_Address = 0x01
     PAN_ID = 0x05
     NWK = 0x07
@@ -114,20 +321,20 @@ class DeconzParameter(t.uint8_t, enum.Enum):
 
     @classmethod
     def deserialize(cls, data):
-        try:
-            return super().deserialize(data)
-        except ValueError:
-            return UnknownDeconzParameter.deserialize(data)
+        return _lookup(cls, data)
+
 
+lookup_table(DeconzParameter, UnknownDeconzParameter)
 
-class Header(t.Struct):
+
+class Header(Struct):
     _lpad = LPAD
 
     _fields = [
         ('command', DeConzCommand),
-        ('seq', t.uint8_t),
+        ('seq', uint8_t),
         ('status', Status),
-        ('length', t.uint16_t),
+        ('length', uint16_t),
     ]
 
     @classmethod
@@ -138,35 +345,64 @@ class Header(t.Struct):
         r.payload = data[:r.length]
         return r, data[r.length:]
 
+    def decode_payload(self, deserialize, cls):
+        """deserialize(cls, payload) of a command, None without a payload."""
+        if not self.payload:
+            return None
+        return deserialize(cls, self.payload)[0]
+
     def pretty_print(self, is_reply: bool) -> None:
         headline = "\t\tSequence: [0x{:02x}] ".format(self.seq).ljust(
             self._lpad, '<' if is_reply else '>')
 
-        print(headline + ' ' + str(self.command))
+        print(headline + ' ' + render(self.command))
         if is_reply:
-            self.print(str(self.status))
+            self.print(render(self.status))
         self.print("Frame length: {}".format(self.length))
         if self.length > 5:
             self.print("Payload: {}".format(binascii.hexlify(self.payload)))
 
     @classmethod
     def print(cls, line):
-        print('\t\t' + ' ' * (cls._lpad - 1) + line)
+        print(indent(cls._lpad) + line)
 
 
-@attr.s
-class Command:
+class Command(Record):
     SCHEMA = ()
     _lpad = LPAD
 
+    def __init_subclass__(cls, **kwargs):
+        """Collect the Field() class attributes, in order, into FIELDS.
+
+        They name the values of the SCHEMA types, the command is created
+        with all of them as positional arguments.
+        """
+        super().__init_subclass__(**kwargs)
+        names = tuple(name for name, value in vars(cls).items()
+                      if isinstance(value, Field))
+        if not names:
+            return
+        if len(names) != len(cls.SCHEMA):
+            raise TypeError("{} has {} fields for {} SCHEMA types".format(
+                cls.__name__, len(names), len(cls.SCHEMA)))
+        for name in names:
+            delattr(cls, name)
+        cls.FIELDS = names
+
+    def __init__(self, *args):
+        if len(args) != len(self.FIELDS):
+            raise TypeError("{}() takes {} arguments, {} given".format(
+                self.__class__.__name__, len(self.FIELDS), len(args)))
+        self.__dict__.update(zip(self.FIELDS, args))
+
     @classmethod
     def deserialize(cls, data):
-        args, data = t.deserialize(data, cls.SCHEMA)
+        args, data = deserialize(data, cls.SCHEMA)
         return cls(*args), data
 
     @classmethod
     def print(cls, line):
-        print('\t\t' + ' ' * (cls._lpad - 1) + line)
+        print(indent(cls._lpad) + line)
 
     def pretty_print(self, *args):
         raise NotImplemented
@@ -178,29 +414,39 @@ class Bytes(bytes):
         return cls(data), b''
 
 
-class DeviceState(t.uint8_t):
+# (_lpad, value) -> all the lines DeviceState.pretty_print() prints
+DEVICE_STATE_BLOCKS = {}
+
+
+class DeviceState(uint8_t):
     _lpad = LPAD
 
     @classmethod
     def print(cls, line):
-        print('\t\t' + ' ' * (cls._lpad - 1) + line)
+        print(indent(cls._lpad) + line)
 
     def pretty_print(self, *args):
-        self.print("Device State: 0x{:02x}".format(self))
+        # only 256 values, each one is rendered once
+        key = (self._lpad, int(self))
+        try:
+            block = DEVICE_STATE_BLOCKS[key]
+        except KeyError:
+            prefix = indent(self._lpad)
+            block = DEVICE_STATE_BLOCKS[key] = '\n'.join(
+                prefix + line for line in self._lines())
+        print(block)
+
+    def _lines(self):
         net_state = NetworkState(self & 0x03)
-        self.print(
-            'Dev state: {} -- {}'.format(self._mask(0x03), str(net_state)))
-        self.print(
-            'Dev state: {} -- APSDE-DATA.confirm'.format(self._mask(0x04))
-        )
-        self.print(
-            'Dev state: {} -- APSDE-DATA.indication'.format(self._mask(0x08))
-        )
-        self.print(
-            'Dev state: {} -- Configuration Changed'.format(self._mask(0x10))
-        )
-        self.print(
-            'Dev state: {} -- APSDE free slots'.format(self._mask(0x20))
+        return (
+            "Device State: 0x{:02x}".format(self),
+            'Dev state: {} -- {}'.format(self._mask(0x03), str(net_state)),
+            'Dev state: {} -- APSDE-DATA.confirm'.format(self._mask(0x04)),
+            'Dev state: {} -- APSDE-DATA.indication'.format(
+                self._mask(0x08)),
+            'Dev state: {} -- Configuration Changed'.format(
+                self._mask(0x10)),
+            'Dev state: {} -- APSDE free slots'.format(self._mask(0x20)),
         )
 
     def _mask(self, mask: int) -> str:
@@ -215,34 +461,40 @@ class DeviceState(t.uint8_t):
         return masked[:4] + ' ' + masked[4:]
 
 
-class ApsDataIndicationFlags(t.uint8_t, enum.Enum):
+class ApsDataIndicationFlags(uint8_t, enum.Enum):
     SRC_ADDR_NWK = 0x01
     LAST_HOP = 0x02
     INCLUDE_IEEE = 0x04
 
 
-class ApsTxOptions(t.uint8_t):
+TX_OPTIONS_LINES = {}
+
+
+class ApsTxOptions(uint8_t):
     _lpad = LPAD
 
     @classmethod
     def print(cls, line):
-        print('\t\t' + ' ' * (cls._lpad - 1) + line)
+        print(indent(cls._lpad) + line)
 
     def pretty_print(self, *args):
-        self.print("TX Options: 0x{:02x}".format(self))
+        key = (self._lpad, int(self))
+        try:
+            line = TX_OPTIONS_LINES[key]
+        except KeyError:
+            line = TX_OPTIONS_LINES[key] = indent(self._lpad) + \
+                "TX Options: 0x{:02x}".format(self)
+        print(line)
 
 
 class UnknownConfirmStatus(UndefEnum):
     cls_name = 'ConfirmStatus'
 
 
-class ConfirmStatus(t.uint8_t, enum.Enum):
+class ConfirmStatus(uint8_t, enum.Enum):
     @classmethod
     def deserialize(cls, data):
-        try:
-            return super().deserialize(data)
-        except ValueError:
-            return UnknownConfirmStatus.deserialize(data)
+        return _lookup(cls, data)
 
     # A request has been executed successfully
     SUCCESS = 0x00
@@ -380,3 +632,6 @@ class ConfirmStatus(t.uint8_t, enum.Enum):
     # An APSME-GET.request or APSMESET.request has been issued with an unknown
     # attribute identifier
     APS_UNSUPPORTED_ATTRIBUTE = 0xb0
+
+
+lookup_table(ConfirmStatus, UnknownConfirmStatus)